@@ -1,77 +1,124 @@
 import pandas as pd
+import copy
 import json
+import logging
 from datetime import datetime
 import numpy as np
-from dateutil import parser
-from scipy.optimize import newton
 import os
-from datetime import datetime
 import math
-import pandas as pd
-from datetime import datetime
+import re
+import threading
+from contextlib import nullcontext
 from dateutil.relativedelta import relativedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from cache import TTLCache, memoize
+import data_sources
+import shared_frames
+import validation
 
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 
-# --- XIRR function ---
-def xirr(cashflows, dates):
-    """Compute annualized IRR for irregular cashflows"""
-    if len(cashflows) != len(dates):
-        raise ValueError("Cashflows and dates must be same length")
-    
-    days = [(d - dates[0]).days for d in dates]
+# Per-investor calculation trace (DEBUG); batch passes run it for every investor
+log = logging.getLogger(__name__)
 
-    def npv(rate):
-        return sum(cf / (1 + rate) ** (t/365) for cf, t in zip(cashflows, days))
+# Parsed-as-read source sheets keyed by link / path, shared by all routes
+FRAME_CACHE = TTLCache(ttl=float(os.environ.get("FRAME_CACHE_TTL", 60)), maxsize=128)
+# Lifetime of memoized analysis results shared by the requests of one page load
+MEMO_TTL = float(os.environ.get("MEMO_TTL", 5))
 
-    return newton(npv, 0.1)  # start guess 10%
+# --- XIRR function ---
+def xirr(cashflows, dates, guess: float = 0.1):
+    """
+    Compute annualized IRR for irregular cashflows (Newton from `guess`).
+    `cashflows` and `dates` may be lists or NumPy arrays; the NPV is
+    evaluated over arrays. The root is then polished with brentq on a fixed
+    1e-6-aligned bracket, so a warm start (e.g. yesterday's IRR) and a cold
+    start agree to within brentq's tolerance (~1e-15), not necessarily to
+    the last bit.
+    """
+    from scipy.optimize import newton, brentq   # imported lazily: scipy is slow to load
 
+    flows = np.asarray(cashflows, dtype=float)
+    dates = np.asarray(dates, dtype="datetime64[ns]")
+    if flows.size != dates.size:
+        raise ValueError("Cashflows and dates must be same length")
 
-# --- Main function ---
-def performance_metrics(email, json_file="investors.json", year: str | None = None):
-    # Load investor parameters
+    years = ((dates - dates[0]) // np.timedelta64(1, "D")) / 365
+
+    def npv(rate):
+        with np.errstate(invalid="ignore"):
+            return float(np.sum(flows / (1 + rate) ** years))
+
+    root = newton(npv, guess)  # default start guess 10%
+    if not math.isfinite(root):
+        raise ValueError("XIRR did not converge")
+    lo = math.floor(root * 1e6) / 1e6 - 1e-6
+    hi = lo + 3e-6
+    if npv(lo) * npv(hi) < 0:
+        return brentq(npv, lo, hi, xtol=1e-15)
+    return root
+
+
+class Investor:
+    """One investors.json entry with its fee parameters parsed once."""
+
+    __slots__ = ("email", "name", "currency", "hurdle", "mgmt_fee", "perf_fee",
+                 "fiscal_year_start", "join_date", "performance_file", "config")
+
+    def __init__(self, email: str, config: dict):
+        fees = config.get("fees", {})
+        self.email = email
+        self.name = config.get("name")
+        self.currency = config.get("currency", "USD")
+        self.hurdle = float(fees.get("hurdle_rate", 0.5))
+        self.mgmt_fee = float(fees.get("management_fee", 0.02))
+        self.perf_fee = float(fees.get("performance_fee", 0.25))
+        self.fiscal_year_start = config.get("Fiscal_year_start")
+        self.join_date = config.get("join_date")
+        self.performance_file = config.get("performance_file")
+        self.config = config        # raw entry, for links and display fields
+
+    @property
+    def fee_params(self):
+        """(hurdle, management fee, performance fee)"""
+        return self.hurdle, self.mgmt_fee, self.perf_fee
+
+
+def _load_config():
     json_path = os.path.join(BASE_DIR, "static", "investors.json")
     with open(json_path, "r", encoding="utf-8") as f:
-        config = json.load(f)
-    if email not in config:
-        raise ValueError(f"Investor {email} not found in JSON config")
-
-    inv = config[email]
-    fees = inv.get("fees", {})
-    H = fees.get("hurdle_rate", 0.5)
-    Mg = fees.get("management_fee", 0.02)
-    Pf = fees.get("performance_fee", 0.25)
+        return json.load(f)
 
-    print(f"\n--- Investor {email} ---")
-    print(f"Using file: {inv['performance_file']}")
-    print(f"Hurdle={H}, MgmtFee={Mg}, PerfFee={Pf}")
 
-    # Load CSV (resolve inside static/)
-    #csv_path = os.path.join(BASE_DIR, "static", inv["performance_file"])
-    #if not os.path.exists(csv_path):
-    #    raise FileNotFoundError(f"CSV not found: {csv_path}")
+def _load_investor(email, config=None) -> Investor:
+    """The Investor record for `email` from static/investors.json (or a loaded config)."""
+    if config is None:
+        config = _load_config()
+    if email not in config:
+        raise ValueError(f"Investor {email} not found in JSON config")
+    return Investor(email, config[email])
 
-    #df = pd.read_csv(csv_path, skip_blank_lines=True)
-    
-    
-    df = _load_csv(inv, year=year)
-    
-    
-    
-    
-    df = df.dropna(how="all")
-    print("\nCSV columns:", df.columns.tolist())
-    print("First 5 rows:\n", df.head())
 
-    # Parse dates safely
+def _parse_dates(df):
+    """Parse the 'Date' column in place ('17-Oct-24' first, day-first fallback)."""
+    if validation.is_clean(df):
+        return df
     try:
         df["Date"] = pd.to_datetime(df["Date"], format="%d-%b-%y")
     except Exception as e:
         print("⚠️ Date parsing failed, falling back to auto-parse:", e)
         df["Date"] = pd.to_datetime(df["Date"], dayfirst=True)
+    return df
 
-    # --- Handle actual today vs available data ---
-    sys_today = pd.to_datetime(datetime.now().date())
+
+def _valuation_row(df, sys_today=None):
+    """
+    Row used as 'today': the system date if present with a valid asset value,
+    otherwise the latest valid row before it.
+    """
+    if sys_today is None:
+        sys_today = pd.to_datetime(datetime.now().date())
 
     if sys_today in df["Date"].values:
         today_row = df[df["Date"] == sys_today].iloc[0]
@@ -88,148 +135,417 @@ def performance_metrics(email, json_file="investors.json", year: str | None = No
         if df_actual.empty:
             raise ValueError("No actual data available up to system today")
         today_row = df_actual.iloc[-1]
+    return today_row
 
-    today = today_row["Date"]
-    Ret_today = today_row["Ret"]
-    Asset_today = today_row["Historical Asset Value"]
-
-    print(f"\nSystem today={sys_today.date()}, Using CSV today={today.date()}, Ret_today={Ret_today}, Asset_today={Asset_today}")
-
-    # --- Last row (projection) ---
-    last_row = df.iloc[-1]
-    Ret_future  = last_row["Ret"]
-    date_future = last_row["Date"]
-    print(f"Last row in CSV: {date_future.date()}, Ret_future={Ret_future}")
-
-    mgmt_fees, perf_fees, cashflows, dates = [], [], [], []
-
-    # --- Loop over contributions (only actual rows, up to CSV 'today') ---
-    # --- Loop over contributions (only actual rows, up to CSV 'today') ---
-    df_until_today = df[df["Date"] <= today]
-    for i, row in df_until_today.iterrows():
-        contrib = row["Contribution"]
-        if contrib != 0:
-            # --- NEW: get hurdle rate for this contribution ---
-            if "Hurdle Rate" in df_until_today.columns:
-                # use the per-row value if present and valid
-                try:
-                    hurdle_rate = float(row["Hurdle Rate"])
-                except Exception:
-                    hurdle_rate = H  # fallback to global
-            else:
-                hurdle_rate = H  # fallback when column absent
 
-            dateA = row["Date"]
-            RetA = row["Ret"]
+def contribution_fees(contrib, R, T_days, Mg, hurdle, Pf):
+    """
+    Vectorized fee rule used by performance_metrics, broadcasting over any
+    shape (contributions, paths, scenarios...).
 
-            try:
-                R = (1 + Ret_today) / (1 + RetA) - 1
-            except Exception as e:
-                print(f"⚠️ Ret calc error at row {i}: RetA={RetA}, Err={e}")
-                R = float("nan")
+    contrib : contribution amounts
+    R       : gross return of each contribution since its date
+    T_days  : days since each contribution
+    hurdle  : annual hurdle rate (scalar or per contribution)
+
+    Returns (management_fee, performance_fee) arrays.
+    """
+    contrib = np.asarray(contrib, dtype=float)
+    R = np.asarray(R, dtype=float)
+    years = np.asarray(T_days, dtype=float) / 365
+    mgmt = ((1 + Mg) ** years - 1) * contrib
+    yearH = (1 + hurdle) ** years - 1
+    perf = np.where(R > yearH, (R - np.maximum(yearH, (1 - Pf) * R)) * contrib, 0.0)
+    return mgmt, perf
 
-            # T = today - contribution_date
-            T = (today - dateA).days
-            MgFee = ((1 + Mg) ** (T / 365) - 1) * contrib
-            yearH = (1 + hurdle_rate) ** (T / 365) - 1   # 👈 per-contribution hurdle
 
-            if R > yearH:
-                PerfFee = (R - max(yearH, (1 - Pf) * R)) * contrib
+class ContributionLedger:
+    """
+    Contributions of one sheet as parallel NumPy arrays: dates
+    (datetime64[ns]), amounts, per-contribution hurdle rates and the
+    cumulative 'Ret' on each contribution date.
+    """
+
+    __slots__ = ("dates", "amounts", "hurdles", "rets")
+
+    def __init__(self, dates=(), amounts=(), hurdles=(), rets=()):
+        self.dates = np.asarray(dates, dtype="datetime64[ns]")
+        self.amounts = np.asarray(amounts, dtype=float)
+        self.hurdles = np.asarray(hurdles, dtype=float)
+        self.rets = np.asarray(rets, dtype=float)
+
+    @classmethod
+    def from_frame(cls, df, H):
+        """
+        Ledger of the rows of df with a non-zero 'Contribution'. A per-row
+        'Hurdle Rate' overrides H; cells that cannot be parsed fall back to H.
+        """
+        rows = df[df["Contribution"] != 0]
+        if "Hurdle Rate" in rows.columns:
+            raw = rows["Hurdle Rate"]
+            hurdles = pd.to_numeric(raw, errors="coerce")
+            hurdles = hurdles.where(hurdles.notna() | raw.isna(), H)
+        else:
+            hurdles = pd.Series(H, index=rows.index, dtype=float)
+        return cls(
+            rows["Date"].to_numpy(),
+            rows["Contribution"].to_numpy(dtype=float),
+            hurdles.to_numpy(dtype=float),
+            rows["Ret"].to_numpy(dtype=float),
+        )
+
+    def __len__(self):
+        return self.amounts.size
+
+    def extend(self, other: "ContributionLedger"):
+        for name in self.__slots__:
+            setattr(self, name, np.concatenate([getattr(self, name), getattr(other, name)]))
+
+    def age_days(self, today):
+        """Whole days from each contribution to `today`."""
+        return np.floor((np.datetime64(today, "ns") - self.dates) / np.timedelta64(1, "D"))
+
+    def fees(self, today, ret_today, Mg, Pf):
+        """Per-contribution (management, performance) fees when valued at `today`."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            R = (1 + ret_today) / (1 + self.rets) - 1
+        return contribution_fees(self.amounts, R, self.age_days(today), Mg, self.hurdles, Pf)
+
+    def total(self, since=None) -> float:
+        """Sum of the amounts contributed (on or after `since`)."""
+        if since is None:
+            return float(self.amounts.sum())
+        return float(self.amounts[self.dates >= np.datetime64(since, "ns")].sum())
+
+    def cashflows(self, terminal_date, terminal_value):
+        """(dates, flows) for XIRR: contributions as outflows plus the terminal value."""
+        dates = np.append(self.dates, np.datetime64(terminal_date, "ns"))
+        flows = np.append(-self.amounts, terminal_value)
+        return dates, flows
+
+    def chart_points(self):
+        """Contributions as [{"date": "YYYY-MM-DD", "value": -amount}] for the cashflow chart."""
+        dates = np.datetime_as_string(self.dates, unit="D").tolist()
+        return [{"date": d, "value": v} for d, v in zip(dates, (-self.amounts).tolist())]
+
+
+class NavState:
+    """
+    Valuation state of one investor's sheet at its last valuation date.
+
+    Holds the ContributionLedger, the cumulative 'Ret' at the valuation
+    date, running moments of the daily log returns and the last IRR, so that
+    when rows are appended to the sheet only the new rows are turned into
+    ledger entries and return moments (`advance`). Fees and NAV are always
+    re-evaluated over the whole ledger with the same code path as a full
+    build, so both give identical results; the IRR is warm-started from the
+    previous value and the volatility comes from the merged moments, so
+    those two agree with a full build to within floating-point rounding.
+
+    A corrected row anywhere before the valuation date forces a rebuild: the
+    state keeps a digest of the consumed rows, extended with the hashes of
+    each advance's new rows. It is checked against the frame (one vectorized
+    hash of rows 0..pos) only when the frame may hold different data than
+    last time, i.e. when the caller's `data_key` (source and fetch
+    generation) changed or is not given; otherwise an advance costs
+    O(appended rows) plus the valuation-row search over the rest of the
+    sheet.
+    """
+
+    def __init__(self, H, Mg, Pf):
+        self.H, self.Mg, self.Pf = H, Mg, Pf
+        self.ledger = ContributionLedger()
+        self.pos = -1              # position of the valuation row in the frame
+        self.checkpoint = None     # (Date, Ret, Asset) of that row, to detect edits
+        self.digest = None         # _digest of the rows up to that row
+        self.data_key = None       # caller's key of the data the state was last checked against
+        self.head = None           # (Date, Ret) of the first row
+        self.moments = (0, 0.0, 0.0)   # (count, mean, M2) of the daily log returns up to that row
+        self.last_log = None       # log1p of the last valid 'Ret' up to that row
+        self.today = None
+        self.ret_today = None
+        self.asset_today = None
+        self.irr = None
+
+    @classmethod
+    def from_frame(cls, df, H, Mg, Pf, sys_today=None):
+        """Build the state from a parsed frame (RangeIndex, 'Date' as datetimes)."""
+        state = cls(H, Mg, Pf)
+        state._scan(df, 0, sys_today)
+        return state
+
+    @staticmethod
+    def _fingerprint(row):
+        return (row["Date"], row["Ret"], row["Historical Asset Value"])
+
+    @staticmethod
+    def _digest(df, start, stop):
+        """
+        Order-sensitive checksum of the ledger inputs of rows start..stop.
+        Row hashes include the row position and are summed mod 2**64, so the
+        digest of 0..b is that of 0..a plus that of a+1..b.
+        """
+        columns = [c for c in ("Date", "Ret", "Contribution", "Hurdle Rate") if c in df.columns]
+        hashes = pd.util.hash_pandas_object(df.iloc[start:stop + 1][columns], index=True)
+        return int(hashes.to_numpy().sum(dtype=np.uint64))
+
+    def advance(self, df, sys_today=None, data_key=None):
+        """
+        Move the valuation date forward over rows appended since the last
+        call. Returns False (state untouched) if the frame no longer extends
+        the one this state was built from; the caller should rebuild.
+        `data_key` identifies the data df holds (equal keys, equal data); the
+        consumed rows are only re-hashed when it differs from the last one.
+        """
+        if self.pos < 0 or len(df) <= self.pos:
+            return False
+        if self._fingerprint(df.iloc[self.pos]) != self.checkpoint:
+            return False
+        if data_key is None or data_key != self.data_key:
+            if self._digest(df, 0, self.pos) != self.digest:
+                return False      # a consumed row (contribution, hurdle, return) was corrected
+        try:
+            self._scan(df, self.pos, sys_today)
+        except ValueError:
+            return False
+        return True
+
+    def _scan(self, df, start, sys_today):
+        tail = df.iloc[start:]
+        today_row = _valuation_row(tail, sys_today)
+        pos = df.index.get_loc(today_row.name)
+        if pos < self.pos:
+            raise ValueError("Valuation date moved backwards")
+
+        first = start if self.pos < 0 else self.pos + 1
+        new_rows = df.iloc[first:pos + 1]
+        self.ledger.extend(ContributionLedger.from_frame(new_rows, self.H))
+        self._add_returns(new_rows["Ret"])
+
+        head = df.iloc[0]
+        self.head = (head["Date"], head["Ret"])
+        self.pos = pos
+        self.checkpoint = self._fingerprint(today_row)
+        self.digest = ((self.digest or 0) + self._digest(df, first, pos)) % 2**64
+        self.today = today_row["Date"]
+        self.ret_today = today_row["Ret"]
+        self.asset_today = today_row["Historical Asset Value"]
+
+    def _add_returns(self, cum_ret):
+        """
+        Merge the daily log returns of newly consumed cumulative 'Ret' values
+        into the running (count, mean, M2), as _annualized_volatility
+        filters them (Chan et al.'s pairwise update).
+        """
+        r = pd.to_numeric(pd.Series(cum_ret), errors="coerce").to_numpy(dtype=float)
+        logs = np.log1p(r[np.isfinite(r) & (r > -1.0)])
+        if logs.size == 0:
+            return
+        daily = np.diff(logs if self.last_log is None else np.concatenate(([self.last_log], logs)))
+        self.last_log = float(logs[-1])
+        if daily.size == 0:
+            return
+        n_a, mean_a, m2_a = self.moments
+        n_b, mean_b = daily.size, float(daily.mean())
+        m2_b = float(((daily - mean_b) ** 2).sum())
+        n = n_a + n_b
+        delta = mean_b - mean_a
+        self.moments = (n, mean_a + delta * n_b / n, m2_a + m2_b + delta * delta * n_a * n_b / n)
+
+    def volatility(self, periods_per_year: int = 365):
+        """Annualized volatility of the daily log returns up to the valuation date (see _annualized_volatility)."""
+        n, _, m2 = self.moments
+        if n < 2:
+            return None
+        return float(math.sqrt(m2 / (n - 1)) * math.sqrt(periods_per_year))
+
+    def fees(self):
+        """Per-contribution (management, performance) fees at the valuation date."""
+        return self.ledger.fees(self.today, self.ret_today, self.Mg, self.Pf)
+
+    def metrics(self, last_row):
+        """Metrics dict at the valuation date; last_row is the frame's final (projection) row."""
+        H, Mg, Pf = self.H, self.Mg, self.Pf
+        today = self.today
+        Ret_today = self.ret_today
+
+        mgmt, perf = self.fees()
+        total_mgmt = float(mgmt.sum())
+        total_perf = float(perf.sum())
+        total_fees = total_mgmt + total_perf
+        portfolio_value_nav = self.asset_today - total_fees
+
+        log.debug("Contributions=%d, Total MgmtFee=%.2f, Total PerfFee=%.2f, NAV=%.2f",
+                  len(self.ledger), total_mgmt, total_perf, portfolio_value_nav)
+
+        # --- Compute IRR (warm-started from the previous valuation) ---
+        dates, cashflows = self.ledger.cashflows(today, portfolio_value_nav)
+        try:
+            irr_value = xirr(cashflows, dates, guess=self.irr if self.irr is not None else 0.1)
+        except Exception as e:
+            print("⚠️ XIRR failed:", e)
+            irr_value = None
+        self.irr = irr_value
+
+        # --- YTD return (before fees, annualized) ---
+        first_date, first_ret = self.head
+        T_total = (today - first_date).days
+        Ret_cum = (1 + Ret_today) / (1 + first_ret) - 1
+        ytd_return = (1 + Ret_cum) ** (365 / T_total) - 1 if T_total > 0 else None
+
+        # --- Locked-in return (today → last CSV date) ---
+        Ret_future = last_row["Ret"]
+        date_future = last_row["Date"]
+        T_locked = (date_future - today).days
+        locked_in = ((1 + Ret_future) / (1 + Ret_today)) - 1
+        if T_locked > 0:
+            gross_ann = (1 + locked_in) ** (365 / T_locked) - 1
+            hurdle_ann = H   # already annual rate from JSON
+            if gross_ann > hurdle_ann:
+                investor_share = max(hurdle_ann, (1 - Pf) * gross_ann)
             else:
-                PerfFee = 0
+                investor_share = gross_ann
+            locked_in_return = investor_share - Mg
+        else:
+            locked_in_return = None
+
+        log.debug("YTD return=%s, Locked-in return=%s", ytd_return, locked_in_return)
+
+        # --- Build cashflow_chart dict ---
+        cashflow_chart = {
+            "valuation_date": today.strftime("%Y-%m-%d"),
+            "xirr": irr_value,
+            "contributions": self.ledger.chart_points(),
+            "terminal": {
+                "investor_share": portfolio_value_nav,
+                "perf_fee": total_perf,
+                "mgmt_fee": total_mgmt,
+            }
+        }
 
-            mgmt_fees.append(MgFee)
-            perf_fees.append(PerfFee)
-            cashflows.append(-contrib)
-            dates.append(dateA)
+        return {
+            "portfolio_value_nav": portfolio_value_nav,
+            "management_fees_total": total_mgmt,
+            "performance_fees_total": total_perf,
+            "total_fees": total_fees,
+            "irr": irr_value,
+            "ytd_return": ytd_return,
+            "locked_in_return": locked_in_return,
+            "locked_in_after_fee": locked_in_return,        # alias for projection API
+            "cashflow_chart": cashflow_chart
+        }
 
-            print(f"\nRow {i}: Date={dateA.date()}, Contrib={contrib}, "
-                f"HurdleRate={hurdle_rate}, R={R:.4f}, "
-                f"T={T}, MgFee={MgFee:.2f}, PerfFee={PerfFee:.2f}, yearH={yearH:.6f}")
 
-    total_mgmt = sum(mgmt_fees)
-    total_perf = sum(perf_fees)
-    total_fees = total_mgmt + total_perf
-    portfolio_value_nav = Asset_today - total_fees
+# Last NavState per (email, year), advanced in place on the next request
+_NAV_STATES = {}
+_NAV_LOCKS = {}
+_NAV_LOCKS_GUARD = threading.Lock()
 
-    print(f"\nTotal MgmtFee={total_mgmt:.2f}, Total PerfFee={total_perf:.2f}, NAV={portfolio_value_nav:.2f}")
 
-    # --- Cashflows for IRR ---
-    cashflows.append(portfolio_value_nav)
-    dates.append(today)
+def _nav_lock(key):
+    """Lock serializing the advance/rebuild and metrics of one _NAV_STATES entry."""
+    with _NAV_LOCKS_GUARD:
+        return _NAV_LOCKS.setdefault(key, threading.Lock())
 
-    print("\nCashflows + Dates for IRR:")
-    for d, cf in zip(dates, cashflows):
-        print(f"{d.date()} : {cf}")
 
-    # --- Compute IRR ---
-    try:
-        irr_value = xirr(cashflows, dates)
-    except Exception as e:
-        print("⚠️ XIRR failed:", e)
-        irr_value = None
-
-    # --- YTD return (before fees, annualized) ---
-    first_date = df_until_today["Date"].iloc[0]
-    T_total = (today - first_date).days
-    Ret_cum = (1 + Ret_today) / (1 + df_until_today["Ret"].iloc[0]) - 1
-    ytd_return = (1 + Ret_cum) ** (365 / T_total) - 1 if T_total > 0 else None
-
-    # --- Locked-in return (today → last CSV date) ---
-    T_locked = (date_future - today).days
-    locked_in = ((1 + Ret_future) / (1 + Ret_today)) - 1
-    print("Ret_today:", Ret_today)
-    print("Ret_future:", Ret_future)
-    if T_locked > 0:
-        gross_ann = (1 + locked_in) ** (365 / T_locked) - 1
-        hurdle_ann = H   # already annual rate from JSON
-        if gross_ann > hurdle_ann:
-            investor_share = max(hurdle_ann, (1 - Pf) * gross_ann)
-        else:
-            investor_share = gross_ann
-        locked_in_return = investor_share - Mg
+def _metrics_key(email, json_file="investors.json", year=None, incremental=True, frame=None, config=None):
+    # Calls with a preloaded frame/config (batch passes) are not memoized
+    if frame is not None or config is not None:
+        return None
+    return (email, year, incremental)
+
+
+# --- Main function ---
+@memoize(ttl=MEMO_TTL, key=_metrics_key, copy=copy.deepcopy)
+def performance_metrics(email, json_file="investors.json", year: str | None = None,
+                        incremental: bool = True, frame=None, config=None):
+    """
+    Fees, NAV, IRR, YTD and locked-in return for one investor at today's
+    valuation row. With `incremental`, the NavState from the previous call is
+    advanced over appended rows instead of rebuilding the ledger and return
+    moments from the whole history (the sheet itself still comes whole from
+    the frame cache; its consumed rows are re-hashed only when the source
+    was refetched with new data, see NavState). Concurrent requests for the
+    same (email, year) take turns on the stored state.
+    `frame` (an already loaded sheet) and `config` (loaded investors.json)
+    let batch callers share one load across investors.
+    """
+    # Load investor parameters
+    investor = _load_investor(email, config)
+    H, Mg, Pf = investor.fee_params
+
+    log.debug("--- Investor %s --- file=%s Hurdle=%s, MgmtFee=%s, PerfFee=%s",
+              email, investor.performance_file, H, Mg, Pf)
+
+    # Key of the loaded data: only for registered sources (whose generation
+    # moves with their data) and when no refresh landed during the load
+    data_key = None
+    if frame is None:
+        source = _source_for(email, year)
+        before = _frame_key(source) if data_sources.generation(source) else None
+        df = _read_source(source)
+        if before is not None and _frame_key(source) == before:
+            data_key = before
     else:
-        locked_in_return = None
-        print("DEBUG locked_in_after_fee:", date_future)
+        df = frame.copy()
+    if not validation.is_clean(df):
+        # Frames that skipped the ingest validation (see validation.py)
+        df = df.dropna(how="all").reset_index(drop=True)
+        _parse_dates(df)
 
-    print(f"\nYTD return={ytd_return}, Locked-in return={locked_in_return}")
+    # --- Handle actual today vs available data ---
+    sys_today = pd.to_datetime(datetime.now().date())
+    key = (email, year)
+    with _nav_lock(key) if incremental else nullcontext():
+        state = _NAV_STATES.get(key) if incremental else None
+        if (state is None or (state.H, state.Mg, state.Pf) != (H, Mg, Pf)
+                or not state.advance(df, sys_today, data_key)):
+            state = NavState.from_frame(df, H, Mg, Pf, sys_today)
+        state.data_key = data_key
+        if incremental:
+            _NAV_STATES[key] = state
+
+        log.debug("System today=%s, Using CSV today=%s, Ret_today=%s, Asset_today=%s",
+                  sys_today.date(), state.today.date(), state.ret_today, state.asset_today)
+
+        result = state.metrics(df.iloc[-1])
+        result["ret_volatility"] = state.volatility()
+    return result
+
+def batch_performance_metrics(emails=None, year: str | None = None, max_workers: int = 8):
+    """
+    Yield (email, metrics or exception) for many investors in one pass.
+    Every distinct source (sheet link or CSV) is fetched once, concurrently,
+    and shared by all investors that point at it.
+    """
+    config = _load_config()
+    emails = list(config) if emails is None else list(emails)
 
-    # --- Build cashflow_chart dict ---
-    cf_contributions = []
-    for d, cf in zip(dates[:-1], cashflows[:-1]):  # contributions only
+    groups = {}
+    for email in emails:
         try:
-            val = float(cf)
-        except (TypeError, ValueError):
-            val = 0.0
-        cf_contributions.append({
-            "date": d.strftime("%Y-%m-%d"),
-            "value": val   # ✅ match JS field name
-        })
-
-    cashflow_chart = {
-        "valuation_date": today.strftime("%Y-%m-%d"),
-        "xirr": irr_value,
-        "contributions": cf_contributions,
-        "terminal": {
-            "investor_share": portfolio_value_nav,
-            "perf_fee": total_perf,
-            "mgmt_fee": total_mgmt,
-        }
-    }
-    total_fees = total_mgmt + total_perf
+            groups.setdefault(_source_for(email, year), []).append(email)
+        except KeyError as e:
+            yield email, ValueError(f"Investor {email} has no data source: {e}")
+
+    if not groups:
+        return
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(groups))) as pool:
+        futures = {pool.submit(_read_source, src): src for src in groups}
+        for fut in as_completed(futures):
+            members = groups[futures[fut]]
+            try:
+                frame = fut.result()
+            except Exception as e:
+                for email in members:
+                    yield email, e
+                continue
+            for email in members:
+                try:
+                    yield email, performance_metrics(email, year=year, frame=frame, config=config)
+                except Exception as e:
+                    yield email, e
 
-    return {
-        "portfolio_value_nav": portfolio_value_nav,
-        "management_fees_total": total_mgmt,
-        "performance_fees_total": total_perf,
-        "total_fees": total_fees, 
-        "irr": irr_value,
-        "ytd_return": ytd_return,
-        "locked_in_return": locked_in_return,
-        "locked_in_after_fee": locked_in_return,        # alias for projection API
-
-        "cashflow_chart": cashflow_chart
-    }
 
 def _to_num(s):
     """Coerce to float, accepting % and localized commas. Returns NaN on failure."""
@@ -283,6 +599,7 @@ def _sanitize_list(arr):
 
 
 
+@memoize(ttl=MEMO_TTL, copy=copy.deepcopy)
 def compute_rebased_indices(
     csv_path: str,
     start_date: str,
@@ -295,13 +612,13 @@ def compute_rebased_indices(
     Read CSV and return rebased indices for columns 1..4 plus a 5th 'after-fee'
     series computed off column 1 using the provided fee rules.
     """
-    # Load & parse
-    df = pd.read_csv(csv_path)
-    # Dates
-    try:
-        df['Date'] = pd.to_datetime(df['Date'], format='%d-%b-%y', errors='coerce')
-    except Exception:
-        df['Date'] = pd.to_datetime(df['Date'], dayfirst=True, errors='coerce')
+    # Load & parse (shared frame cache; validated frames already have parsed dates)
+    df = _read_source(csv_path)
+    if not validation.is_clean(df):
+        try:
+            df['Date'] = pd.to_datetime(df['Date'], format='%d-%b-%y', errors='coerce')
+        except Exception:
+            df['Date'] = pd.to_datetime(df['Date'], dayfirst=True, errors='coerce')
     df = df.dropna(subset=['Date']).sort_values('Date').reset_index(drop=True)
 
     # Coerce numeric returns for cols 1..4
@@ -357,50 +674,103 @@ def compute_rebased_indices(
         "series_matrix": series_matrix        # ← data are built from same list
     }
 
- 
-def compute_lockedin_projection(current_nav: float,
-                                locked_in_after_fee: float,
-                                years: float = 3):
+
+PROJECTION_FREQUENCIES = ("daily", "monthly")
+MAX_PROJECTION_YEARS = 30
+
+
+def parse_horizon(value, default: str = "3m") -> relativedelta:
     """
-    Simple projection using already-computed locked-in after-fee return (annualized).
+    Parse a projection horizon such as '90d', '6m', '2y' or a bare number of
+    years ('0.25') into a relativedelta.
     """
-    
-    today = datetime.today().date()
-    months = int(round(years * 12))
-    monthly_rate = (1 + locked_in_after_fee) ** (1/12) - 1
+    s = str(value if value not in (None, "") else default).strip().lower()
+    m = re.fullmatch(r"(\d+(?:\.\d+)?)\s*([dmy]?)", s)
+    if not m:
+        raise ValueError(f"Invalid horizon: {value!r}")
+    n, unit = float(m.group(1)), m.group(2) or "y"
+    if unit == "d":
+        delta, days = relativedelta(days=int(n)), n
+    else:
+        months = int(round(n * (12 if unit == "y" else 1)))
+        delta, days = relativedelta(months=months), months * 31
+    if days <= 0 or days > MAX_PROJECTION_YEARS * 366:
+        raise ValueError(f"Horizon out of range: {value!r}")
+    return delta
 
-    dates = [today + relativedelta(months=m) for m in range(months+1)]
-    values = [current_nav * ((1 + monthly_rate) ** m) for m in range(months+1)]
 
-    return {
-        "dates": [d.isoformat() for d in dates],
-        "series": {
-            "Projection (After Fee)": _sanitize_list(values)
-        },
-        "locked_in_after_fee": locked_in_after_fee
-    }
+def _annualized_volatility(cum_ret, periods_per_year: int = 365):
+    """Annualized volatility of the daily log returns implied by a cumulative 'Ret' series."""
+    r = pd.to_numeric(pd.Series(cum_ret), errors="coerce").to_numpy(dtype=float)
+    r = r[np.isfinite(r) & (r > -1.0)]
+    if r.size < 3:
+        return None
+    daily = np.diff(np.log1p(r))
+    return float(np.std(daily, ddof=1) * math.sqrt(periods_per_year))
+
+
+def _projection_grid(start, end, freq: str):
+    """
+    Return (dates, t_years) for a daily or monthly grid from start to end (inclusive).
+    Monthly steps keep the start day-of-month, clamped to month end like relativedelta.
+    """
+    d0 = np.datetime64(start, "D")
+    if freq == "daily":
+        dates = np.arange(d0, np.datetime64(end, "D") + 1)
+        t = (dates - d0).astype(float) / 365.0
+        return dates, t
+
+    n = (end.year - start.year) * 12 + (end.month - start.month)
+    if start + relativedelta(months=n) > end:
+        n -= 1
+    k = np.arange(n + 1)
+    month_start = np.datetime64(start, "M") + k
+    first_day = month_start.astype("datetime64[D]")
+    month_len = ((month_start + 1).astype("datetime64[D]") - first_day).astype(int)
+    dates = first_day + np.minimum(start.day, month_len) - 1
+    return dates, k / 12.0
 
 
- 
 def compute_lockedin_projection(current_nav: float,
                                 locked_in_after_fee: float,
-                                years: float = 3):
+                                years: float = 3,
+                                horizon: relativedelta | None = None,
+                                freq: str = "monthly",
+                                volatility: float | None = None,
+                                band_sigma: float = 1.0,
+                                start=None):
     """
-    Simple projection using already-computed locked-in after-fee return (annualized).
+    Project the NAV forward at the already-computed locked-in after-fee return
+    (annualized), on a daily or monthly grid over an arbitrary horizon.
+
+    If `volatility` (annualized, e.g. from `_annualized_volatility` of the
+    historical 'Ret' column) is given, optimistic / pessimistic bands are added
+    at +/- `band_sigma` standard deviations around the base path.
     """
-    
-    today = datetime.today().date()
-    months = int(round(years * 12))
-    monthly_rate = (1 + locked_in_after_fee) ** (1/12) - 1
+    if freq not in PROJECTION_FREQUENCIES:
+        raise ValueError(f"Unknown frequency: {freq!r}")
+    if horizon is None:
+        horizon = relativedelta(months=int(round(years * 12)))
+
+    start = start or datetime.today().date()
+    end = start + horizon
+    dates, t = _projection_grid(start, end, freq)
 
-    dates = [today + relativedelta(months=m) for m in range(months+1)]
-    values = [current_nav * ((1 + monthly_rate) ** m) for m in range(months+1)]
+    rate = locked_in_after_fee or 0.0
+    base = current_nav * np.power(1.0 + rate, t)
+    series = {"Projection (After Fee)": _sanitize_list(base.tolist())}
+
+    if volatility is not None and np.isfinite(volatility):
+        spread = np.exp(band_sigma * volatility * np.sqrt(t))
+        series["Projection (Optimistic)"] = _sanitize_list((base * spread).tolist())
+        series["Projection (Pessimistic)"] = _sanitize_list((base / spread).tolist())
 
     return {
-        "dates": [d.isoformat() for d in dates],
-        "series": {
-            "Projection (After Fee)": _sanitize_list(values)
-        },
+        "dates": np.datetime_as_string(dates, unit="D").tolist(),
+        "series": series,
+        "frequency": freq,
+        "horizon_end": end.isoformat(),
+        "volatility": volatility,
         "locked_in_after_fee": locked_in_after_fee
     }
 
@@ -449,21 +819,25 @@ def compensation_chart_data(hurdle_rate=0.05, mgmt_fee=0.02, perf_fee=0.2, step=
 
 
 
-def performance_metric_public(csv_path: str):
+def performance_metric_public(csv_path: str | None = None):
     """
     Compute public fund performance metrics:
       - YTD Fund Return (before fees)
       - Locked-in return (projection from current to last available forward date)
 
+    The sheet (default: the registered "public-fund" source) is read through
+    the frame cache, so a fresh fetch of the source is reused.
+
     Returns:
         dict with {"ytd_return": float, "locked_in_return": float}
     """
 
-    df = pd.read_csv(csv_path)
+    df = _read_source(csv_path or data_sources.location("public-fund"))
     # Normalize date column
     if "Date" not in df.columns:
         raise ValueError("CSV must contain a 'Date' column")
-    df["Date"] = pd.to_datetime(df["Date"])
+    if not validation.is_clean(df):
+        df["Date"] = pd.to_datetime(df["Date"])
     df = df.sort_values("Date")
 
     if "Fund" not in df.columns:
@@ -501,31 +875,55 @@ def performance_metric_public(csv_path: str):
     }
 
 
-def _load_csv(inv, year: str | None = None):
-    """Return a DataFrame from either a Google Sheets link or a local CSV file.
-       If year is provided and e.g. '2024-Link' exists, use that instead of 'link'.
+def _source_for(email, year: str | None = None):
+    """Google Sheets link or local CSV path the investor's data (for `year`) is read from."""
+    return data_sources.investor_source(email, year).location
+
+
+def data_version():
+    """Published shared-frames version when SHARED_FRAMES=1, else None."""
+    return shared_frames.current_version() if shared_frames.ENABLED else None
+
+
+def _frame_key(source):
+    return (source, data_version(), data_sources.generation(source))
+
+
+@memoize(cache=FRAME_CACHE, key=_frame_key, copy=shared_frames.private_copy)
+def _read_source(source: str):
     """
-    link = None
-    if year:
-        candidates = [
-            f"{year}-Link",     # current code
-            f"{year}-link",     # lowercase L
-            f"link_{year}",     # another common pattern
-            f"link-{year}",     # another common pattern
-            print(f"🌐 Loading from Google Sheets: {year}")
-        ]
-        for key in candidates:
-            if key in inv:
-                link = inv[key]
-                break
-    if not link:
-        link = inv.get("link")
-
-    if link:
-        print(f"🌐 Loading from Google Sheets2: {link}")
-        df = pd.read_csv(link, skip_blank_lines=True)
+    Read a link or local CSV through the frame cache; returns a private copy
+    (copy-on-write: columns are only copied when the caller writes them).
+    With shared frames enabled the published (memory-mapped) copy is used
+    when present, and the data version is part of the cache key. Registered
+    sources are served from their last fetch while it is fresh (see
+    data_sources.py); each refresh bumps the key. Every frame is validated
+    once on its way into the cache (validation.py); published frames were
+    validated by the refresher.
+    """
+    if shared_frames.ENABLED:
+        df = shared_frames.attach(source)
+        if df is not None:
+            if not validation.is_clean(df):
+                return validation.validate(df, source)
+            published = shared_frames.report(source)
+            if published is not None:
+                validation.REPORTS[source] = published
+            return df
+    registered = data_sources.by_location(source)
+    if registered is not None:
+        df = registered.fresh_frame()
+        if df is not None:
+            return df
+    if data_sources.is_remote(source):
+        print(f"🌐 Loading from Google Sheets: {source}")
     else:
-        csv_path = os.path.join(BASE_DIR, "static", inv["performance_file"])
-        print(f"📂 Loading local CSV: {csv_path}")
-        df = pd.read_csv(csv_path, skip_blank_lines=True)
-    return df
\ No newline at end of file
+        print(f"📂 Loading local CSV: {source}")
+    if registered is not None:
+        return registered.fetch()
+    return validation.validate(pd.read_csv(source, skip_blank_lines=True), source)
+
+
+def _load_csv(email, year: str | None = None):
+    """Return the investor's DataFrame from either a Google Sheets link or a local CSV file."""
+    return _read_source(_source_for(email, year))
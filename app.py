@@ -1,12 +1,12 @@
 # app.py (patched)
 
 import os
-from flask import Flask, redirect, url_for, session, render_template, request, jsonify
+from flask import Flask, redirect, url_for, session, render_template, request, jsonify, Response, stream_with_context
 from authlib.integrations.flask_client import OAuth
 from datetime import datetime
 from werkzeug.middleware.proxy_fix import ProxyFix
 import re
-from flask import send_from_directory, abort
+from flask import send_from_directory, abort, copy_current_request_context
 from werkzeug.utils import safe_join
 # (optional) server-side sessions are more robust behind VPNs/ad-blockers
 try:
@@ -15,17 +15,49 @@ try:
 except Exception:
     HAVE_FLASK_SESSION = False
 
-from analysis_functions import (
-    performance_metrics,
-    compute_rebased_indices,
-    compute_lockedin_projection,
-    compensation_chart_data,
-    performance_metric_public
-)
-import numpy as np
+import importlib
+from concurrent.futures import ThreadPoolExecutor
+import sys
 import math
 import json
-import pandas as pd
+from cache import TTLCache
+import profiling
+
+
+class _LazyModule:
+    """
+    Import a module on first attribute access. The analytics modules pull in
+    pandas / numpy / scipy, which pages like `/` and `/login` never need.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+analysis = _LazyModule("analysis_functions")
+fee_simulation = _LazyModule("fee_simulation")
+rolling_analytics = _LazyModule("rolling_analytics")
+data_sources = _LazyModule("data_sources")
+fiscal_periods = _LazyModule("fiscal_periods")
+validation = _LazyModule("validation")
+public_series = _LazyModule("public_series")
+fee_scenarios = _LazyModule("fee_scenarios")
+shared_frames = _LazyModule("shared_frames")
+
+
+def warm_up():
+    """
+    Import the analytics stack up front. Called from gunicorn.conf.py in the
+    master when preload_app is on, so forked workers inherit the loaded modules.
+    """
+    for name in ("numpy", "pandas", "scipy.optimize", "data_sources", "analysis_functions", "fee_simulation", "rolling_analytics", "fiscal_periods", "public_series", "fee_scenarios"):
+        importlib.import_module(name)
 
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 # -------- Per-user documents configuration --------
@@ -37,11 +69,24 @@ DOC_CATEGORIES = {
 }
 ALLOWED_EXT = {".pdf", ".png", ".jpg", ".jpeg", ".docx", ".xlsx", ".csv", ".txt", ".zip"}
 
+# Projections keyed by (investor, year, horizon, frequency, day)
+PROJECTION_CACHE = TTLCache(ttl=float(os.environ.get("PROJECTION_CACHE_TTL", 300)))
+# Worker threads for the independent parts of /api/portal-bootstrap
+BOOTSTRAP_POOL = ThreadPoolExecutor(max_workers=int(os.environ.get("BOOTSTRAP_WORKERS", 8)))
+SIMULATION_CACHE = TTLCache(ttl=float(os.environ.get("SIMULATION_CACHE_TTL", 600)), maxsize=64)
+
+# Comma-separated list of administrator emails (e.g. ADMIN_EMAILS="a@x.com,b@y.com")
+ADMIN_EMAILS = {e.strip().lower() for e in os.environ.get("ADMIN_EMAILS", "").split(",") if e.strip()}
+
 def _current_user_email():
     # Works with MOCK_MODE or real OAuth
     user = session.get("user") or {}
     return user.get("email")
 
+def _is_admin() -> bool:
+    email = _current_user_email()
+    return bool(email) and email.lower() in ADMIN_EMAILS
+
 def _user_key_from_email(email: str) -> str:
     if email.endswith("@gmail.com"):
         local = email[:-10]
@@ -76,16 +121,34 @@ app.config.update(
 # Trust Render's proxy headers so url_for builds https:// and correct host
 app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
 
-# (optional) Server-side sessions (recommended if VPN causes random cookie drops)
-if HAVE_FLASK_SESSION:
+# Server-side sessions (recommended if VPN causes random cookie drops).
+# Default is flask_session's filesystem store when installed (else Flask's signed
+# cookies); SESSION_TYPE=sqlite opts into the built-in SQLite store (faster under
+# load, see bench_sessions.py), SESSION_TYPE=redis/... uses flask_session and
+# SESSION_TYPE=cookie keeps Flask's signed cookies.
+SESSION_TYPE = os.environ.get("SESSION_TYPE", "filesystem")
+if SESSION_TYPE == "sqlite":
+    from sqlite_session import SqliteSessionInterface
+    app.config.update(SESSION_PERMANENT=False)
+    app.session_interface = SqliteSessionInterface(
+        os.environ.get("SESSION_SQLITE_PATH", os.path.join(app.instance_path, "sessions.sqlite3"))
+    )
+elif SESSION_TYPE != "cookie" and HAVE_FLASK_SESSION:
     app.config.update(
-        SESSION_TYPE=os.environ.get("SESSION_TYPE", "filesystem"),
+        SESSION_TYPE=SESSION_TYPE,
         SESSION_PERMANENT=False,
     )
     Session(app)
 
-# --- Toggle this for mock login ---
-MOCK_MODE = False
+# Opt-in request profiling (?profile=1 for admins, PROFILE_SAMPLE_RATE for a random share)
+profiling.install(app, is_admin=_is_admin, current_user=_current_user_email)
+
+# --- Mock login (MOCK_MODE=1): local development and loadtest.py only ---
+# Never enable it in a deployment: it logs visitors in without Google.
+MOCK_MODE = os.environ.get("MOCK_MODE", "0") == "1"
+MOCK_USER_EMAIL = os.environ.get("MOCK_USER_EMAIL", "sajjadnoun@gmail.com")
+if MOCK_MODE and os.environ.get("RENDER"):
+    raise RuntimeError("MOCK_MODE must not be enabled on Render")
 
 oauth = OAuth(app)
 google = oauth.register(
@@ -114,8 +177,8 @@ def fund():
 def client_portal():
     if not session.get("user"):
         return redirect(url_for("login", next="client_portal"))
-    selected_year = (request.args.get("year") or "2025").strip() or None  # 👈 NEW
     investor_email = session["user"].get("email")
+    selected_year = _resolve_year(investor_email, request.args.get("year"))
 
     try:
         json_path = os.path.join(BASE_DIR, "static", "investors.json")
@@ -136,7 +199,7 @@ def client_portal():
     currency = investor_info.get("currency", "USD")
 
     try:
-        metrics = performance_metrics(investor_email, "static/investors.json",year=selected_year)
+        metrics = fiscal_periods.period_metrics(investor_email, selected_year)
     except Exception as e:
         print("⚠️ Metrics calculation failed:", e)
         metrics = {
@@ -156,6 +219,7 @@ def client_portal():
         performance_file=performance_file,
         join_date=join_date,
         selected_year=selected_year,
+        fiscal_years=[p.year for p in reversed(fiscal_periods.fiscal_periods(investor_info))],
         currency=currency,
         metrics=metrics,
         cf_data=metrics.get("cashflow_chart")
@@ -167,9 +231,13 @@ def login():
     session["next_page"] = next_page
 
     if MOCK_MODE:
+        # ?as=<email> lets the load-test harness log in as one of the ADMIN_EMAILS
+        email = (request.args.get("as") or "").strip() or MOCK_USER_EMAIL
+        if email != MOCK_USER_EMAIL and email.lower() not in ADMIN_EMAILS:
+            abort(403)
         session["user"] = {
             "name": "Test Investor",
-            "email": "sajjadnoun@gmail.com",
+            "email": email,
             "picture": "https://via.placeholder.com/150"
         }
         return redirect(url_for(next_page))
@@ -198,6 +266,7 @@ def logout():
     return redirect(url_for("homepage"))
 
 def _clean_for_json(obj, path="root"):
+    np = sys.modules.get("numpy")   # numpy values can only exist once numpy has been imported
     if isinstance(obj, dict):
         return {k: _clean_for_json(v, f"{path}.{k}") for k, v in obj.items()}
     elif isinstance(obj, list):
@@ -205,31 +274,27 @@ def _clean_for_json(obj, path="root"):
     elif isinstance(obj, float) and (math.isnan(obj) or math.isinf(obj)):
         print(f"⚠️ Found invalid float at {path}: {obj}, replacing with None")
         return None
-    elif isinstance(obj, (np.floating, np.integer)) and (np.isnan(obj) or np.isinf(obj)):
+    elif np is not None and isinstance(obj, (np.floating, np.integer)) and (np.isnan(obj) or np.isinf(obj)):
         print(f"⚠️ Found invalid numpy value at {path}: {obj}, replacing with None")
         return None
     return obj
 
-@app.get("/api/fund-series")
-def api_fund_series():
-    if not session.get("user"):
-        return jsonify({"error": "unauthorized"}), 401
-
-    investor_email = session["user"].get("email")
+def _investor_config(email):
     json_path = os.path.join(BASE_DIR, "static", "investors.json")
     with open(json_path, "r", encoding="utf-8") as f:
         cfg = json.load(f)
-    inv = cfg.get(investor_email, {})
+    return cfg.get(email, {})
 
-    # 👇 NEW: pick year-specific link if provided (e.g., "2024-Link"), else fallback to "link" or local file
-    year = (request.args.get("year") or "").strip()
-    if year:
-        csv_path = inv.get(f"{year}-Link") \
-            or inv.get("link") \
-            or os.path.join(BASE_DIR, "static", inv.get("performance_file", ""))
-    else:
-        csv_path = inv.get("link") \
-            or os.path.join(BASE_DIR, "static", inv.get("performance_file", ""))
+def _resolve_year(email, requested=None):
+    """?year= if given, else the investor's default year (latest with a <year>-Link sheet)."""
+    requested = (requested or "").strip()
+    if requested:
+        return requested
+    return fiscal_periods.default_year(_investor_config(email))
+
+def _fund_series_payload(email, inv, year, start=None, end=None):
+    # Year-specific source if declared (e.g., "2024-Link"), else the investor's link or local file
+    csv_path = analysis._source_for(email, year or None)
 
     fees = inv.get("fees", {})
     fixed   = float(fees.get("management_fee", 0.02))
@@ -237,25 +302,20 @@ def api_fund_series():
     perffee = float(fees.get("performance_fee", 0.25))
 
     today = datetime.now().strftime("%Y-%m-%d")
-    year = (request.args.get("year") or "").strip()
-
-    # 👇 NEW: smart start/end defaults by year
-    start = request.args.get("start")
-    end   = request.args.get("end")
 
+    # Default window: the selected fiscal period, else everything since Fiscal_year_start
     if not start or not end:
-        if year == "2024":
-            start = "2024-10-17"
-            end   = "2025-10-17"
-        elif year == "2025":
-            start = "2025-10-18"
-            end   = today
+        try:
+            period = fiscal_periods.period_for(inv, year) if year else None
+        except ValueError:
+            period = None
+        if period is not None:
+            start, end = period.start.isoformat(), period.end.isoformat()
         else:
-            # generic fallback
             start = inv.get("Fiscal_year_start", "2024-10-01")
             end   = today
 
-    payload = compute_rebased_indices(
+    payload = analysis.compute_rebased_indices(
         csv_path=csv_path,
         start_date=start,
         end_date=end,
@@ -266,7 +326,38 @@ def api_fund_series():
     payload["fiscal_year_start"] = inv.get("Fiscal_year_start")
     payload["resolved_start"] = start        # 👈 ADD
     payload["resolved_end"]   = end          # 👈 ADD
-    return jsonify(_clean_for_json(payload))
+    return _clean_for_json(payload)
+
+@app.get("/api/fund-series")
+def api_fund_series():
+    if not session.get("user"):
+        return jsonify({"error": "unauthorized"}), 401
+
+    email = session["user"].get("email")
+    inv = _investor_config(email)
+    year = (request.args.get("year") or "").strip()
+    return jsonify(_fund_series_payload(email, inv, year, request.args.get("start"), request.args.get("end")))
+
+def _projection_payload(investor_email, year, horizon_arg="3m", freq="monthly", metrics=None):
+    """Cached projection for (investor, year, horizon, freq); `metrics` skips recomputing performance_metrics."""
+    if freq not in analysis.PROJECTION_FREQUENCIES:
+        raise ValueError(f"freq must be one of {', '.join(analysis.PROJECTION_FREQUENCIES)}")
+    horizon = analysis.parse_horizon(horizon_arg)
+
+    def build():
+        m = metrics or fiscal_periods.period_metrics(investor_email, year)
+        current_nav = m.get("portfolio_value_nav") or 1000.0
+        locked_in_after_fee = m.get("locked_in_after_fee") or 0.0
+        return _clean_for_json(analysis.compute_lockedin_projection(
+            current_nav=current_nav,
+            locked_in_after_fee=locked_in_after_fee,
+            horizon=horizon,
+            freq=freq,
+            volatility=m.get("ret_volatility")
+        ))
+
+    key = (investor_email, year, horizon_arg, freq, datetime.now().date().isoformat())
+    return PROJECTION_CACHE.get_or_compute(key, build)
 
 @app.get("/api/fund-projection")
 def api_fund_projection():
@@ -274,74 +365,155 @@ def api_fund_projection():
         return jsonify({"error": "unauthorized"}), 401
 
     investor_email = session["user"].get("email")
-    year = (request.args.get("year") or "2025").strip() or None  # 👈 NEW
-    json_path = os.path.join(BASE_DIR, "static", "investors.json")
-    with open(json_path, "r", encoding="utf-8") as f:
-        cfg = json.load(f)
-    inv = cfg.get(investor_email, {})
+    year = _resolve_year(investor_email, request.args.get("year"))
+    horizon_arg = (request.args.get("horizon") or "3m").strip().lower()
+    freq = (request.args.get("freq") or "monthly").strip().lower()
+    try:
+        payload = _projection_payload(investor_email, year, horizon_arg, freq)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(payload)
 
-    fees = inv.get("fees", {})
-    fixed   = float(fees.get("management_fee", 0.02))
-    hurdle  = float(fees.get("hurdle_rate", 0.50))
-    perffee = float(fees.get("performance_fee", 0.25))
+@app.get("/api/portal-bootstrap")
+def api_portal_bootstrap():
+    """
+    Everything the client portal needs on first load in one round trip:
+    metrics and projection (computed once, sharing one performance_metrics
+    call) plus the series, compensation curve and documents, which run
+    concurrently in a thread pool. A failing part is reported as
+    {"error": ...} without failing the others.
+    """
+    if not session.get("user"):
+        return jsonify({"error": "unauthorized"}), 401
 
-    metrics = performance_metrics(investor_email, "static/investors.json", year=year)  # 👈 CHANGED
-    current_nav = metrics.get("portfolio_value_nav", 1000.0)
-    locked_in_after_fee = metrics.get("locked_in_after_fee", 0.0)
+    investor_email = session["user"].get("email")
+    inv = _investor_config(investor_email)
+    series_year = (request.args.get("year") or "").strip()
+    year = _resolve_year(investor_email, series_year)
+    start, end = request.args.get("start"), request.args.get("end")
+
+    docs = copy_current_request_context(_docs_payload)
+    futures = {
+        "series": BOOTSTRAP_POOL.submit(_fund_series_payload, investor_email, inv, series_year, start, end),
+        "compensation": BOOTSTRAP_POOL.submit(_compensation_payload, inv),
+        "docs": BOOTSTRAP_POOL.submit(docs, investor_email),
+    }
 
-    payload = compute_lockedin_projection(
-        current_nav=current_nav,
-        locked_in_after_fee=locked_in_after_fee,
-        years=1/4
-    )
+    payload = {}
+    try:
+        metrics = fiscal_periods.period_metrics(investor_email, year)
+        payload["metrics"] = _clean_for_json(metrics)
+        payload["projection"] = _projection_payload(investor_email, year, metrics=metrics)
+    except Exception as e:
+        print("⚠️ Metrics calculation failed:", e)
+        payload["metrics"] = payload["projection"] = {"error": str(e)}
+
+    for name, fut in futures.items():
+        try:
+            payload[name] = fut.result()
+        except Exception as e:
+            print(f"⚠️ portal-bootstrap {name} failed:", e)
+            payload[name] = {"error": str(e)}
     return jsonify(payload)
 
-@app.get("/api/compensation-chart")
-def api_compensation_chart():
+@app.get("/api/fee-simulation")
+def api_fee_simulation():
     if not session.get("user"):
         return jsonify({"error": "unauthorized"}), 401
 
     investor_email = session["user"].get("email")
-    json_path = os.path.join(BASE_DIR, "static", "investors.json")
-    with open(json_path, "r", encoding="utf-8") as f:
-        cfg = json.load(f)
-    inv = cfg.get(investor_email, {})
+    year = _resolve_year(investor_email, request.args.get("year"))
+    source = (request.args.get("source") or "investor").strip().lower()
+    try:
+        n_paths = int(request.args.get("paths", 10000))
+        block = int(request.args.get("block", 20))
+        seed = int(request.args.get("seed", 0))
+        today = datetime.now().date()
+        horizon_days = ((today + analysis.parse_horizon(request.args.get("horizon"), default="1y")) - today).days
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    key = (investor_email, year, source, n_paths, horizon_days, block, seed, today.isoformat())
+    try:
+        payload = SIMULATION_CACHE.get_or_compute(key, lambda: fee_simulation.simulate_fee_outcomes(
+            investor_email,
+            year=year,
+            n_paths=n_paths,
+            horizon_days=horizon_days,
+            block=block,
+            seed=seed,
+            source=source
+        ))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(_clean_for_json(payload))
 
+@app.get("/api/fee-scenarios")
+def api_fee_scenarios():
+    """
+    NAV / fee surface of the investor's contributions under a grid of fee
+    schedules: ?mgmt=0,0.01,0.02&hurdle=0:0.6:0.1&perf=0.1:0.3:0.05 (see fee_scenarios.py).
+    """
+    if not session.get("user"):
+        return jsonify({"error": "unauthorized"}), 401
+
+    investor_email = session["user"].get("email")
+    year = _resolve_year(investor_email, request.args.get("year"))
+    try:
+        grid = {
+            "management_fees": fee_scenarios.parse_axis("management_fee", request.args.get("mgmt")),
+            "hurdles": fee_scenarios.parse_axis("hurdle", request.args.get("hurdle")),
+            "performance_fees": fee_scenarios.parse_axis("performance_fee", request.args.get("perf")),
+        }
+        payload = fee_scenarios.fee_scenarios(investor_email, year=year, **grid)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(_clean_for_json(payload))
+
+def _compensation_payload(inv):
     fees   = inv.get("fees", {})
     hurdle = float(fees.get("hurdle_rate", 0.50))
     mgmt   = float(fees.get("management_fee", 0.02))
     perf   = float(fees.get("performance_fee", 0.25))
 
-    df = compensation_chart_data(hurdle_rate=hurdle, mgmt_fee=mgmt, perf_fee=perf)
-    payload = {
+    df = analysis.compensation_chart_data(hurdle_rate=hurdle, mgmt_fee=mgmt, perf_fee=perf)
+    return {
         "Ret": (df["Ret"] * 100).tolist(),
         "Investor": (df["Investor"] * 100).tolist(),
         "Fund": (df["Fund"] * 100).tolist()
     }
-    return jsonify(payload)
+
+@app.get("/api/compensation-chart")
+def api_compensation_chart():
+    if not session.get("user"):
+        return jsonify({"error": "unauthorized"}), 401
+
+    inv = _investor_config(session["user"].get("email"))
+    return jsonify(_compensation_payload(inv))
 
 @app.get("/api/public-fund-series")
 def api_public_fund_series():
-    csv_path = "https://docs.google.com/spreadsheets/d/1-f9vZ7zGOg2vrViKBlxo07AwiYXLhg2rmlowyU7OKBo/gviz/tq?tqx=out:csv&sheet=Inv0"
-    start = request.args.get("start") or "2020-10-17"
+    """Rebased and after-fee (2%/50%/25%) series, served pre-serialized (see public_series.py)."""
+    start = request.args.get("start") or public_series.DEFAULT_START
     end   = request.args.get("end") or datetime.now().strftime("%Y-%m-%d")
-    payload = compute_rebased_indices(
-        csv_path=csv_path,
-        start_date=start,
-        end_date=end,
-        fixed=0.02,
-        hurdle=0.50,
-        perf_fee=0.25
-    )
-    if "series" in payload:
-        payload["series_names"] = list(payload["series"].keys())
-    return jsonify(_clean_for_json(payload))
+    try:
+        body = public_series.build_public_series().body(start, end)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if "gzip" in request.accept_encodings:
+        resp = Response(body.gzipped, mimetype="application/json")
+        resp.headers["Content-Encoding"] = "gzip"
+    else:
+        resp = Response(body.json(), mimetype="application/json")
+    resp.headers["Vary"] = "Accept-Encoding"
+    resp.set_etag(body.etag)
+    return resp.make_conditional(request)
 
 @app.get("/api/public-fund-metrics")
 def api_public_fund_metrics():
-    csv_path = "https://docs.google.com/spreadsheets/d/1-f9vZ7zGOg2vrViKBlxo07AwiYXLhg2rmlowyU7OKBo/gviz/tq?tqx=out:csv&sheet=Inv0"
     try:
-        metrics = performance_metric_public(csv_path)
+        metrics = analysis.performance_metric_public()
         payload = {
             "ytd_return": metrics.get("ytd_return"),
             "locked_in_return": metrics.get("locked_in_return"),
@@ -351,9 +523,30 @@ def api_public_fund_metrics():
         payload = {"ytd_return": None, "locked_in_return": None}
     return jsonify(payload)
 
+@app.get("/api/public-fund-analytics")
+def api_public_fund_analytics():
+    """Rolling return / volatility / Sharpe and drawdown of the fund and benchmarks (?window=30|90|365)."""
+    try:
+        window = int(request.args.get("window", 90))
+        table = rolling_analytics.build_analytics_table()
+        payload = table.rolling_payload(window, request.args.get("start"), request.args.get("end"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(payload)
+
+@app.get("/api/public-fund-analytics/window")
+def api_public_fund_analytics_window():
+    """Return, volatility, Sharpe and max drawdown of every series between ?start= and ?end=."""
+    try:
+        table = rolling_analytics.build_analytics_table()
+        payload = table.window(request.args.get("start") or None, request.args.get("end") or None)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(_clean_for_json(payload))
+
 @app.get("/api/public-compensation-chart")
 def api_public_compensation_chart():
-    df = compensation_chart_data(hurdle_rate=0.50, mgmt_fee=0.02, perf_fee=0.25)
+    df = analysis.compensation_chart_data(hurdle_rate=0.50, mgmt_fee=0.02, perf_fee=0.25)
     payload = {
         "Ret": (df["Ret"] * 100).tolist(),
         "Investor": (df["Investor"] * 100).tolist(),
@@ -362,12 +555,127 @@ def api_public_compensation_chart():
     return jsonify(payload)
 
 
-@app.get("/api/docs")
-def api_list_docs():
-    email = _current_user_email()
-    if not email:
-        return jsonify({"error": "not_authenticated"}), 401
+@app.get("/api/admin/metrics")
+def api_admin_metrics():
+    """Stream NAV / fees / IRR / YTD for every investor as NDJSON (one JSON object per line)."""
+    if not session.get("user"):
+        return jsonify({"error": "unauthorized"}), 401
+    if not _is_admin():
+        return jsonify({"error": "forbidden"}), 403
+
+    requested_year = (request.args.get("year") or "").strip() or None
+    emails = [e.strip() for e in (request.args.get("emails") or "").split(",") if e.strip()] or None
+
+    def results():
+        # One batch per year: ?year= for everyone, else each investor's default year
+        config = analysis._load_config()
+        by_year = {}
+        for email in emails or list(config):
+            year = requested_year or fiscal_periods.default_year(config.get(email, {}))
+            by_year.setdefault(year, []).append(email)
+        for year, group in by_year.items():
+            for email, result in analysis.batch_performance_metrics(group, year=year):
+                yield email, year, result
+
+    def generate():
+        started = datetime.now()
+        count = 0
+        for email, year, result in results():
+            count += 1
+            if isinstance(result, Exception):
+                row = {"email": email, "year": year, "error": str(result)}
+            else:
+                row = {
+                    "email": email,
+                    "year": year,
+                    "valuation_date": result["cashflow_chart"]["valuation_date"],
+                    "portfolio_value_nav": result["portfolio_value_nav"],
+                    "management_fees_total": result["management_fees_total"],
+                    "performance_fees_total": result["performance_fees_total"],
+                    "total_fees": result["total_fees"],
+                    "irr": result["irr"],
+                    "ytd_return": result["ytd_return"],
+                    "locked_in_return": result["locked_in_return"],
+                }
+            yield json.dumps(_clean_for_json(row), default=float) + "\n"
+        elapsed = (datetime.now() - started).total_seconds()
+        yield json.dumps({"summary": {"investors": count, "elapsed_seconds": elapsed}}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+@app.get("/api/fiscal-periods")
+def api_fiscal_periods():
+    """The investor's fiscal periods with precomputed return, contributions, fees, NAV and IRR."""
+    if not session.get("user"):
+        return jsonify({"error": "unauthorized"}), 401
 
+    email = session["user"].get("email")
+    try:
+        periods = fiscal_periods.period_table(email)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 404
+    return jsonify(_clean_for_json({
+        "current_year": periods[-1]["year"] if periods else None,
+        "periods": periods,
+    }))
+
+@app.get("/api/data-sources")
+def api_data_sources():
+    """Freshness of every registered data source (last fetch, age, next refresh, last error)."""
+    if not session.get("user"):
+        return jsonify({"error": "unauthorized"}), 401
+    if not _is_admin():
+        return jsonify({"error": "forbidden"}), 403
+    # Workers fed by the shared scheduler process report its view of the sources
+    shared = shared_frames.scheduler_status() if shared_frames.ENABLED else None
+    if shared is not None:
+        return jsonify({"scheduler_running": True, "scheduler_pid": shared["pid"], "sources": shared["sources"]})
+    return jsonify({
+        "scheduler_running": data_sources.scheduler_running(),
+        "sources": data_sources.freshness(),
+    })
+
+@app.get("/api/admin/profiles")
+def api_admin_profiles():
+    """Captured request profiles (route, status, timing, top functions), newest first."""
+    if not session.get("user"):
+        return jsonify({"error": "unauthorized"}), 401
+    if not _is_admin():
+        return jsonify({"error": "forbidden"}), 403
+    return jsonify({
+        "sample_rate": profiling.SAMPLE_RATE,
+        "pyinstrument": profiling.HAVE_PYINSTRUMENT,
+        "profiles": profiling.list_profiles(app),
+    })
+
+@app.get("/api/admin/profiles/<profile_id>")
+def api_admin_profile_file(profile_id):
+    """Raw capture: cProfile .prof (pstats format) or pyinstrument .html."""
+    if not session.get("user"):
+        return jsonify({"error": "unauthorized"}), 401
+    if not _is_admin():
+        return jsonify({"error": "forbidden"}), 403
+    for meta in profiling.list_profiles(app):
+        if meta["id"] == profile_id:
+            return send_from_directory(profiling.profile_dir(app), meta["file"], as_attachment=True)
+    abort(404)
+
+@app.get("/api/data-quality")
+def api_data_quality():
+    """Last validation report of every source read by this process (see validation.py)."""
+    if not session.get("user"):
+        return jsonify({"error": "unauthorized"}), 401
+    if not _is_admin():
+        return jsonify({"error": "forbidden"}), 403
+    reports = list(validation.REPORTS.values())
+    return jsonify({
+        "sources": len(reports),
+        "failing": [r["source"] for r in reports if not r["ok"]],
+        "reports": sorted(reports, key=lambda r: (r["ok"], r["source"])),
+    })
+
+def _docs_payload(email):
     root = _user_docs_root(email)
     payload = {}
 
@@ -400,7 +708,15 @@ def api_list_docs():
         files.sort(key=lambda x: x["modified"], reverse=True)
         payload[cat_label] = files
 
-    return jsonify(payload)
+    return payload
+
+@app.get("/api/docs")
+def api_list_docs():
+    email = _current_user_email()
+    if not email:
+        return jsonify({"error": "not_authenticated"}), 401
+
+    return jsonify(_docs_payload(email))
 
 @app.get("/docs/<category>/<path:filename>")
 def serve_user_doc(category, filename):
@@ -416,5 +732,10 @@ def serve_user_doc(category, filename):
         abort(404)
 
     return send_from_directory(base, filename, as_attachment=False)
+# SOURCE_SCHEDULER=1 refreshes data sources in the background (under gunicorn in one
+# shared_frames.py schedule process for all workers)
 if __name__ == "__main__":
+    # Only in the reloader's serving child, not the watcher parent
+    if os.environ.get("SOURCE_SCHEDULER", "0") == "1" and os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        data_sources.start_scheduler()
     app.run(debug=True)
@@ -0,0 +1,259 @@
+"""
+ASGI deployment mode:  uvicorn asgi:application --workers 2 --port 10000
+(or gunicorn asgi:application -k uvicorn.workers.UvicornWorker).
+
+The Flask routes stay synchronous; this module puts an asyncio front end in
+front of them so a few workers can serve many investors while upstream
+sheets are slow:
+
+  * Before a request reaches Flask, the data sources it will read (the
+    public fund sheet, fund-data.csv, the investor's sheet for the requested
+    year) are fetched with async I/O if they are not fresh. A per-source
+    semaphore makes concurrent requests for one sheet share a single
+    download, and at most FETCH_CONCURRENCY downloads run at once.
+  * Parsing and the Flask handlers themselves (pandas / numpy analysis) run
+    in a bounded pool of ASGI_THREADS threads, which never wait on the network
+    for registered sources because the frames are already fresh.
+
+Downloads use httpx when installed, else urllib in a separate I/O pool. A
+failed prefetch is only logged: the Flask route then fetches (and reports
+the error) exactly as under WSGI.
+"""
+import asyncio
+import os
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from urllib.parse import parse_qs
+
+from flask import session
+
+import data_sources
+import shared_frames
+from app import _resolve_year, app as flask_app
+
+try:
+    import httpx
+    HAVE_HTTPX = True
+except ImportError:
+    HAVE_HTTPX = False
+
+ASGI_THREADS = int(os.environ.get("ASGI_THREADS", 8))
+FETCH_CONCURRENCY = int(os.environ.get("FETCH_CONCURRENCY", 8))
+SOURCE_CONCURRENCY = 1       # downloads of one source at a time (the rest wait and reuse it)
+FETCH_TIMEOUT = float(os.environ.get("FETCH_TIMEOUT", 30))
+
+# Sources read by the public routes, by path (all through _read_source, which serves
+# a source's fresh frame)
+PUBLIC_ROUTES = {
+    "/api/public-fund-series": ("public-fund",),
+    "/api/public-fund-metrics": ("public-fund",),
+    "/api/public-fund-analytics": ("fund-data",),
+    "/api/public-fund-analytics/window": ("fund-data",),
+}
+# Routes that read the signed-in investor's sheet
+INVESTOR_ROUTES = {"/client-portal", "/api/fund-series", "/api/fund-projection", "/api/portal-bootstrap", "/api/fee-simulation",
+                   "/api/fee-scenarios"}
+
+_handler_pool = ThreadPoolExecutor(max_workers=ASGI_THREADS, thread_name_prefix="asgi-handler")
+_io_pool = None
+_http = None
+_fetch_slots = None
+_source_slots = {}
+
+
+# --- Async source prefetch ---
+def _investor_years(path, year, email):
+    """Years whose sources the route reads, mirroring the route's own defaults."""
+    if path == "/api/fund-series":
+        return {year or None}
+    if path == "/api/portal-bootstrap":
+        return {year or None, _resolve_year(email, year)}
+    return {_resolve_year(email, year)}
+
+
+def _session_years(environ, path, year):
+    """(email, years) of the signed-in investor, or (None, ()) without a session."""
+    with flask_app.request_context(dict(environ)):
+        email = (session.get("user") or {}).get("email")
+        return (email, _investor_years(path, year, email)) if email else (None, ())
+
+
+async def _needed_sources(path, args, environ):
+    names = list(PUBLIC_ROUTES.get(path, ()))
+    if path in INVESTOR_ROUTES:
+        loop = asyncio.get_running_loop()
+        year = (args.get("year", [""])[0]).strip()
+        email, years = await loop.run_in_executor(_handler_pool, _session_years, environ, path, year)
+        if email:
+            for y in years:
+                try:
+                    names.append(data_sources.investor_source(email, y).name)
+                except KeyError:
+                    pass
+        if path == "/api/fee-simulation" and args.get("source", [""])[0] == "fund":
+            names.append("fund-data")
+    sources = data_sources.registry()
+    return [sources[n] for n in dict.fromkeys(names) if n in sources]
+
+
+async def _download(url: str) -> bytes:
+    if HAVE_HTTPX:
+        resp = await _http.get(url)
+        resp.raise_for_status()
+        return resp.content
+
+    def read():
+        with urllib.request.urlopen(url, timeout=FETCH_TIMEOUT) as r:
+            return r.read()
+    return await asyncio.get_running_loop().run_in_executor(_io_pool, read)
+
+
+async def _prefetch(source):
+    slot = _source_slots.setdefault(source.name, asyncio.Semaphore(SOURCE_CONCURRENCY))
+    async with slot:
+        if source.fresh_frame() is not None:
+            return
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            if data_sources.is_remote(source.location):
+                async with _fetch_slots:
+                    content = await _download(source.location)
+                print(f"🌐 Prefetched {source.name} ({len(content)} bytes)")
+                await loop.run_in_executor(_handler_pool, source.fetch, content, started)
+            else:
+                await loop.run_in_executor(_handler_pool, source.fetch)
+        except Exception as e:
+            print(f"⚠️ Prefetch of {source.name} failed: {e}", file=sys.stderr)
+
+
+# --- WSGI bridge (bounded executor, streamed responses) ---
+def _environ(scope, body: bytes):
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope["query_string"].decode("latin-1"),
+        "SERVER_PROTOCOL": f"HTTP/{scope['http_version']}",
+        "SERVER_NAME": (scope.get("server") or ("localhost", 80))[0],
+        "SERVER_PORT": str((scope.get("server") or ("localhost", 80))[1]),
+        "REMOTE_ADDR": (scope.get("client") or ("", 0))[0],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope.get("headers", []):
+        name, value = name.decode("latin-1"), value.decode("latin-1")
+        key = {"content-type": "CONTENT_TYPE", "content-length": "CONTENT_LENGTH"}.get(
+            name, "HTTP_" + name.upper().replace("-", "_")
+        )
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+_DONE = object()
+
+
+async def _call_flask(environ, send):
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response["status"] = int(status.split(" ", 1)[0])
+        response["headers"] = [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers]
+
+    def run():
+        try:
+            result = flask_app(environ, start_response)
+            try:
+                for chunk in result:
+                    if chunk:
+                        loop.call_soon_threadsafe(queue.put_nowait, chunk)
+            finally:
+                if hasattr(result, "close"):
+                    result.close()
+        except BaseException as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        loop.call_soon_threadsafe(queue.put_nowait, _DONE)
+
+    worker = loop.run_in_executor(_handler_pool, run)
+    started = False
+    while True:
+        item = await queue.get()
+        if item is _DONE:
+            break
+        if isinstance(item, BaseException):
+            print(f"⚠️ Unhandled error in WSGI app: {item!r}", file=sys.stderr)
+            if not started:
+                response = {"status": 500, "headers": [(b"content-type", b"text/plain")]}
+            break
+        if not started:
+            await send({"type": "http.response.start", "status": response["status"], "headers": response["headers"]})
+            started = True
+        await send({"type": "http.response.body", "body": item, "more_body": True})
+    if not started:
+        await send({"type": "http.response.start", "status": response["status"], "headers": response["headers"]})
+    await send({"type": "http.response.body", "body": b""})
+    await worker
+
+
+# --- ASGI application ---
+async def _lifespan(receive, send):
+    global _http, _io_pool, _fetch_slots
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            _fetch_slots = asyncio.Semaphore(FETCH_CONCURRENCY)
+            if HAVE_HTTPX:
+                _http = httpx.AsyncClient(follow_redirects=True, timeout=FETCH_TIMEOUT)
+            else:
+                _io_pool = ThreadPoolExecutor(max_workers=FETCH_CONCURRENCY, thread_name_prefix="asgi-fetch")
+            # With shared frames the scheduler runs once per machine (shared_frames.py schedule)
+            if os.environ.get("SOURCE_SCHEDULER", "0") == "1" and not shared_frames.ENABLED:
+                data_sources.start_scheduler()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            if _http is not None:
+                await _http.aclose()
+            if _io_pool is not None:
+                _io_pool.shutdown(wait=False)
+            _handler_pool.shutdown(wait=False)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await _lifespan(receive, send)
+    if scope["type"] != "http":
+        return
+
+    body = bytearray()
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            break
+    environ = _environ(scope, bytes(body))
+
+    if _fetch_slots is not None:   # servers without lifespan support skip the prefetch
+        args = parse_qs(environ["QUERY_STRING"])
+        sources = await _needed_sources(scope["path"], args, environ)
+        if sources:
+            await asyncio.gather(*(_prefetch(s) for s in sources))
+
+    await _call_flask(environ, send)
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run("asgi:application", host="0.0.0.0", port=int(os.environ.get("PORT", 10000)),
+                workers=int(os.environ.get("WEB_CONCURRENCY", 2)))
@@ -0,0 +1,111 @@
+"""
+Session-store load test: built-in SQLite backend vs flask_session filesystem.
+
+Each simulated investor gets its own client: one login (session write),
+then a mix of page views (session reads) and occasional writes, from
+`--threads` concurrent threads. Reports throughput and p50/p95/p99 latency
+per backend. The filesystem backend is skipped if flask_session is missing.
+
+Usage:  python bench_sessions.py [--users 200] [--requests 20] [--threads 16]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Flask, session
+
+from sqlite_session import SqliteSessionInterface
+
+
+def make_app(backend: str, workdir: str) -> Flask:
+    app = Flask(__name__)
+    app.config.update(SECRET_KEY="bench", SESSION_PERMANENT=False)
+    if backend == "sqlite":
+        app.session_interface = SqliteSessionInterface(os.path.join(workdir, "sessions.sqlite3"))
+    else:
+        from flask_session import Session
+        app.config.update(SESSION_TYPE="filesystem", SESSION_FILE_DIR=os.path.join(workdir, "sessions"))
+        Session(app)
+
+    @app.get("/login/<int:n>")
+    def login(n):
+        session["user"] = {"email": f"investor{n}@example.com", "name": f"Investor {n}"}
+        session["next_page"] = "client_portal"
+        return "ok"
+
+    @app.get("/page")
+    def page():
+        return (session.get("user") or {}).get("email", "anonymous")
+
+    @app.get("/touch")
+    def touch():
+        session["last_seen"] = time.time()
+        return "ok"
+
+    return app
+
+
+def run_user(app, n, requests, latencies, lock):
+    client = app.test_client()
+    local = []
+    for i in range(requests + 1):
+        url = f"/login/{n}" if i == 0 else ("/touch" if i % 10 == 0 else "/page")
+        t0 = time.perf_counter()
+        resp = client.get(url)
+        local.append(time.perf_counter() - t0)
+        assert resp.status_code == 200
+    with lock:
+        latencies.extend(local)
+
+
+def bench(backend, users, requests, threads):
+    workdir = tempfile.mkdtemp(prefix=f"bench-{backend}-")
+    try:
+        app = make_app(backend, workdir)
+        latencies, lock = [], threading.Lock()
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            for f in [pool.submit(run_user, app, n, requests, latencies, lock) for n in range(users)]:
+                f.result()
+        elapsed = time.perf_counter() - t0
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    q = statistics.quantiles(latencies, n=100)
+    return {
+        "backend": backend,
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed,
+        "p50": q[49] * 1000,
+        "p95": q[94] * 1000,
+        "p99": q[98] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Session-store load test")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=20, help="requests per user after login")
+    parser.add_argument("--threads", type=int, default=16)
+    args = parser.parse_args()
+
+    backends = ["sqlite"]
+    try:
+        import flask_session  # noqa: F401
+        backends.append("filesystem")
+    except ImportError:
+        print("flask_session not installed: skipping the filesystem backend")
+
+    print(f"{'backend':<12} {'requests':>9} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for backend in backends:
+        r = bench(backend, args.users, args.requests, args.threads)
+        print(f"{r['backend']:<12} {r['requests']:>9} {r['rps']:>9.0f} {r['p50']:>8.2f} {r['p95']:>8.2f} {r['p99']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
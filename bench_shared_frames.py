@@ -0,0 +1,120 @@
+"""
+Memory-per-worker benchmark of shared frames.
+
+Starts N worker processes that each load the same set of investor sheets
+through analysis_functions._read_source and touch every column, once with private
+frames (SHARED_FRAMES=0: every worker parses its own copy) and once with
+shared frames (SHARED_FRAMES=1: published, memory-mapped columns). All
+workers stay alive until every one has loaded, then report the growth of
+their resident set (RSS) and proportional set size (PSS: shared pages split
+between the processes mapping them) from /proc/self/smaps_rollup.
+
+Usage:  python bench_shared_frames.py [--workers 4] [--sheets 40] [--rows 5000]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+
+WORKER = """
+import contextlib, io, sys
+
+def memory():
+    values = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            name, _, rest = line.partition(":")
+            if name in ("Rss", "Pss"):
+                values[name] = int(rest.split()[0])
+    return values["Rss"], values["Pss"]
+
+import analysis_functions
+rss0, pss0 = memory()
+frames = []
+with contextlib.redirect_stdout(io.StringIO()):
+    for source in sys.argv[1:]:
+        df = analysis_functions._read_source(source)
+        touched = sum(float(df[c].to_numpy(dtype=float).sum()) for c in df.columns if c != "Date")
+        touched += int(df["Date"].to_numpy().view("int64")[-1])
+        frames.append(df)
+print("loaded", flush=True)
+sys.stdin.readline()           # wait until every worker has loaded
+rss1, pss1 = memory()
+print(rss1 - rss0, pss1 - pss0, flush=True)
+"""
+
+
+def synthetic_sheet(path: str, rows: int, seed: int = 0):
+    """Investor-style CSV with `rows` daily rows from 2000-01-01."""
+    dates = pd.date_range("2000-01-01", periods=rows, freq="D")
+    rng = np.random.default_rng(seed)
+    ret = np.cumprod(1 + rng.normal(0.0005, 0.01, rows)) - 1
+    frame = {"Date": [f"{d.day}-{d.strftime('%b-%y')}" for d in dates], "Ret": ret}
+    for col in ("Bourse Historical Ret", "Gold Historical", "Dollar Historical",
+                "Historical Ret", "Historical Yearly Ret"):
+        frame[col] = rng.normal(0, 1, rows)
+    frame["Historical Asset Value"] = 1e6 * (1 + ret)
+    frame["Contribution"] = np.where(np.arange(rows) % 30 == 0, 1000.0, 0.0)
+    pd.DataFrame(frame).to_csv(path, index=False)
+
+
+def run(sources, workers: int, env: dict):
+    procs = [
+        subprocess.Popen([sys.executable, "-c", WORKER, *sources], cwd=BASE_DIR, env=env,
+                         stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        for _ in range(workers)
+    ]
+    for p in procs:
+        line = p.stdout.readline()
+        if not line.startswith("loaded"):
+            for q in procs:
+                q.kill()
+            raise RuntimeError("a worker failed to load the sheets")
+    for p in procs:
+        p.stdin.write("\n")
+        p.stdin.flush()
+    results = []
+    for p in procs:
+        rss, pss = (int(x) for x in p.stdout.readline().split())
+        p.wait()
+        results.append((rss / 1024, pss / 1024))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resident memory per worker with and without shared frames")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--sheets", type=int, default=40)
+    parser.add_argument("--rows", type=int, default=5000, help="rows per sheet (at most 36500)")
+    args = parser.parse_args()
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        sys.exit("bench_shared_frames.py needs Linux /proc/self/smaps_rollup")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sources = [os.path.join(tmp, f"sheet{i}.csv") for i in range(args.sheets)]
+        for i, source in enumerate(sources):
+            synthetic_sheet(source, args.rows, seed=i)
+        root = os.path.join(tmp, "frames")
+
+        env = {**os.environ, "SHARED_FRAMES_DIR": root}
+        subprocess.run([sys.executable, "-c", f"import shared_frames; shared_frames.refresh({sources!r})"],
+                       cwd=BASE_DIR, env=env, check=True, stdout=subprocess.DEVNULL)
+
+        print(f"{args.sheets} sheets x {args.rows} rows, {args.workers} workers; growth per worker after load (MiB)")
+        print(f"{'mode':<10} {'RSS median':>11} {'PSS median':>11} {'PSS total':>10}")
+        for mode, shared in (("private", "0"), ("shared", "1")):
+            results = run(sources, args.workers, {**env, "SHARED_FRAMES": shared})
+            rss = statistics.median(r for r, _ in results)
+            pss = [p for _, p in results]
+            print(f"{mode:<10} {rss:>11.1f} {statistics.median(pss):>11.1f} {sum(pss):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
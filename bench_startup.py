@@ -0,0 +1,55 @@
+"""
+Startup-time benchmark.
+
+Runs each scenario in a fresh interpreter and reports the median wall time:
+  import       `import app`                         (what a worker pays at boot)
+  first-page   import + first GET /                 (cold start for a static page)
+  warm-up      import + app.warm_up()               (cost moved into the gunicorn master by PRELOAD_APP=1)
+  analytics    import + first analytics call        (first /api/* request in a lazy worker)
+
+Usage:  python bench_startup.py [runs]
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+
+SCENARIOS = {
+    "import": "import app",
+    "first-page": "import app; app.app.test_client().get('/')",
+    "warm-up": "import app; app.warm_up()",
+    "analytics": "import app; app.analysis.compensation_chart_data()",
+}
+
+TIMER = """
+import time, io, contextlib
+t0 = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    {code}
+print(time.perf_counter() - t0)
+"""
+
+
+def run(code: str, runs: int):
+    times = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", TIMER.format(code=code)],
+            cwd=BASE_DIR, capture_output=True, text=True, check=True,
+        )
+        times.append(float(out.stdout.strip().splitlines()[-1]))
+    return times
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"{'scenario':<12} {'median ms':>10} {'min ms':>10} {'max ms':>10}")
+    for name, code in SCENARIOS.items():
+        t = run(code, runs)
+        print(f"{name:<12} {statistics.median(t) * 1000:>10.1f} {min(t) * 1000:>10.1f} {max(t) * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import functools
+import threading
+import time
+from concurrent.futures import Future
+
+
+class TTLCache:
+    """
+    Small thread-safe in-process cache with per-entry expiry.
+    Entries older than `ttl` seconds are dropped on access; when `maxsize`
+    is reached the oldest entry is evicted. `get_or_compute` is single-flight:
+    concurrent callers missing on the same key wait for one computation.
+    """
+
+    def __init__(self, ttl: float = 300, maxsize: int = 256):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def _lookup(self, key):
+        item = self._data.get(key)
+        if item is None:
+            return _MISSING
+        stored_at, value = item
+        if time.monotonic() - stored_at > self.ttl:
+            del self._data[key]
+            return _MISSING
+        return value
+
+    def _store(self, key, value):
+        if key not in self._data and len(self._data) >= self.maxsize:
+            oldest = min(self._data, key=lambda k: self._data[k][0])
+            del self._data[oldest]
+        self._data[key] = (time.monotonic(), value)
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._lookup(key)
+        return default if value is _MISSING else value
+
+    def set(self, key, value):
+        with self._lock:
+            self._store(key, value)
+
+    def get_or_compute(self, key, fn):
+        """Return the cached value for `key`, computing and storing it with fn() on a miss."""
+        with self._lock:
+            value = self._lookup(key)
+            if value is not _MISSING:
+                return value
+            pending = self._inflight.get(key)
+            if pending is None:
+                pending = self._inflight[key] = Future()
+                owner = True
+            else:
+                owner = False
+
+        if not owner:
+            return pending.result()
+
+        try:
+            value = fn()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            pending.set_exception(e)
+            raise
+        with self._lock:
+            self._store(key, value)
+            self._inflight.pop(key, None)
+        pending.set_result(value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_MISSING = object()
+
+
+def _request_memo():
+    """Per-request memo dict stored on flask.g, or None outside a request."""
+    try:
+        from flask import g, has_request_context
+    except ImportError:
+        return None
+    if not has_request_context():
+        return None
+    memo = g.get("_memo")
+    if memo is None:
+        memo = g._memo = {}
+    return memo
+
+
+def memoize(ttl: float = 5.0, maxsize: int = 256, key=None, copy=None, cache=None):
+    """
+    Two-tier memoization for expensive analysis calls.
+
+    Request tier: results are kept on flask.g, so one request never computes
+    the same call twice. Process tier: a short-lived TTLCache (or `cache`)
+    shared by the near-simultaneous requests of one page load; concurrent
+    misses on the same key are deduplicated by TTLCache.get_or_compute.
+
+    key  : fn(*args, **kwargs) -> hashable key, or None to bypass the memo
+    copy : applied to the value handed to each caller (e.g. DataFrame.copy,
+           copy.deepcopy for nested dicts) when callers may mutate it
+    """
+    def decorator(fn):
+        store = cache if cache is not None else TTLCache(ttl=ttl, maxsize=maxsize)
+        make_key = key or (lambda *args, **kwargs: (args, tuple(sorted(kwargs.items()))))
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            k = make_key(*args, **kwargs)
+            if k is None:
+                return fn(*args, **kwargs)
+
+            memo = _request_memo()
+            memo_key = (fn.__qualname__, k)
+            if memo is not None and memo_key in memo:
+                value = memo[memo_key]
+            else:
+                value = store.get_or_compute(k, lambda: fn(*args, **kwargs))
+                if memo is not None:
+                    memo[memo_key] = value
+            return copy(value) if copy is not None else value
+
+        wrapper.cache = store
+        return wrapper
+    return decorator
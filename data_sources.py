@@ -0,0 +1,345 @@
+"""
+Registry of the data sources the portal reads, with per-source refresh policies.
+
+Each source has a name, a location (Google Sheets CSV export link or local
+path), a format (csv, or xlsm for .xlsm/.xlsx workbooks, see workbooks.py),
+a refresh interval (seconds) and a priority:
+
+    public-fund              the public fund sheet
+    fund-data                static/fund-data.csv (fund + benchmark history)
+    investor:<email>         the investor's `link`, else its performance_file
+    investor:<email>:<year>  the investor's `<year>-Link`
+
+Defaults are derived from static/investors.json. An optional
+static/data_sources.json (or DATA_SOURCES_FILE) maps source names to
+overrides of any field, and can add sources:
+
+    {"public-fund": {"refresh_interval": 120, "priority": 100},
+     "investor:a@x.com:2025": {"location": "https://...", "format": "csv"}}
+
+The registry is rebuilt when either file changes; fetched frames survive the
+rebuild as long as the location is unchanged. A frame is served as fresh for
+`refresh_interval` seconds after it was fetched. A source's `generation`
+only moves when a fetch returns different data, so caches keyed on it
+survive refreshes of an unchanged sheet. `RefreshScheduler` refetches
+sources shortly before that, highest priority first, one download at a time
+with STAGGER seconds between downloads and a jittered lead time, so sources
+do not all refetch at once. Run one scheduler per machine: under gunicorn,
+SOURCE_SCHEDULER=1 starts it in a single `shared_frames.py schedule` process
+that publishes the frames to every worker (see shared_frames.py).
+"""
+import io
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+
+import pandas as pd
+
+import validation
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+INVESTORS_JSON = os.path.join(BASE_DIR, "static", "investors.json")
+OVERRIDES_JSON = os.environ.get("DATA_SOURCES_FILE", os.path.join(BASE_DIR, "static", "data_sources.json"))
+
+PUBLIC_FUND_URL = os.environ.get(
+    "PUBLIC_FUND_URL",
+    "https://docs.google.com/spreadsheets/d/1-f9vZ7zGOg2vrViKBlxo07AwiYXLhg2rmlowyU7OKBo/gviz/tq?tqx=out:csv&sheet=Inv0",
+)
+FUND_DATA_CSV = os.path.join(BASE_DIR, "static", "fund-data.csv")
+
+REMOTE_REFRESH = float(os.environ.get("SOURCE_REFRESH_INTERVAL", 300))
+LOCAL_REFRESH = float(os.environ.get("LOCAL_SOURCE_REFRESH_INTERVAL", 600))
+STAGGER = float(os.environ.get("SOURCE_REFRESH_STAGGER", 2.0))   # seconds between scheduled downloads
+LEAD = (0.80, 0.95)      # refetch at this fraction of the interval, jittered
+RETRY_AFTER = 30.0       # seconds before a failed scheduled fetch is retried
+
+# SHEETS_BASE_URL (e.g. http://127.0.0.1:8765) redirects Google Sheets links to a
+# local server that serves the same CSV exports; used by loadtest.py
+GOOGLE_SHEETS_PREFIX = "https://docs.google.com/spreadsheets"
+SHEETS_BASE_URL = os.environ.get("SHEETS_BASE_URL", "").rstrip("/")
+
+def _read_workbook(location):
+    import workbooks
+    return workbooks.read(location)
+
+
+READERS = {
+    "csv": lambda location: pd.read_csv(location, skip_blank_lines=True),
+    "xlsm": _read_workbook,      # macro workbooks, normalized and cached by workbooks.py
+}
+
+# `<year>-Link`, `<year>-link`, `link_<year>`, `link-<year>`
+_YEAR_LINK = re.compile(r"^(?:(\d{4})-[Ll]ink|link[_-](\d{4}))$")
+
+
+def _sheet_url(link):
+    if link and SHEETS_BASE_URL and link.startswith(GOOGLE_SHEETS_PREFIX):
+        return SHEETS_BASE_URL + link[len(GOOGLE_SHEETS_PREFIX):]
+    return link
+
+
+def is_remote(location: str) -> bool:
+    return location.startswith(("http://", "https://"))
+
+
+def _infer_format(location: str) -> str:
+    path = location.split("?", 1)[0].lower()
+    return "xlsm" if path.endswith((".xlsm", ".xlsx")) else "csv"
+
+
+def _fingerprint(df: pd.DataFrame):
+    """Columns and a row-hash checksum of df; equal for equal data."""
+    return tuple(map(str, df.columns)), len(df), int(pd.util.hash_pandas_object(df, index=False).sum())
+
+
+class DataSource:
+    """One source and its refresh state (last frame, fetch time, last error)."""
+
+    def __init__(self, name, location, format=None, refresh_interval=None, priority=0):
+        format = format or _infer_format(location)
+        if format not in READERS:
+            raise ValueError(f"Unsupported format {format!r} for source {name}")
+        self.name = name
+        self.location = _sheet_url(location)
+        self.format = format
+        self.refresh_interval = float(
+            refresh_interval if refresh_interval is not None
+            else REMOTE_REFRESH if is_remote(self.location) else LOCAL_REFRESH
+        )
+        self.priority = priority
+
+        self.frame = None
+        self.fetched_at = None
+        self.fetch_seconds = None
+        self.generation = 0
+        self.fingerprint = None
+        self.error = None
+        self.next_refresh = None
+        self._lock = threading.Lock()
+
+    def fetch(self, content: bytes | None = None, started: float | None = None):
+        """
+        Read the source now; records the frame (or the error) and schedules the
+        next refresh. The frame goes through validation.validate once here, so
+        readers get it with parsed dates. `content` is an already downloaded body (async fetchers
+        in asgi.py), parsed instead of reading the location; `started` is the
+        perf_counter() at which that download began.
+        """
+        t0 = started or time.perf_counter()
+        try:
+            df = READERS[self.format](self.location if content is None else io.BytesIO(content))
+            df = validation.validate(df, self.location)
+            fingerprint = _fingerprint(df)
+        except Exception as e:
+            with self._lock:
+                self.error = f"{type(e).__name__}: {e}"
+                self.next_refresh = time.time() + min(RETRY_AFTER, self.refresh_interval)
+            raise
+        with self._lock:
+            self.frame = df
+            self.fetched_at = time.time()
+            self.fetch_seconds = time.perf_counter() - t0
+            if fingerprint != self.fingerprint:
+                self.generation += 1
+                self.fingerprint = fingerprint
+            self.error = None
+            self.next_refresh = self.fetched_at + self.refresh_interval * random.uniform(*LEAD)
+        return df
+
+    def fresh_frame(self):
+        """Last fetched frame if it is younger than refresh_interval, else None."""
+        with self._lock:
+            if self.frame is not None and time.time() - self.fetched_at < self.refresh_interval:
+                return self.frame
+        return None
+
+    def status(self, now=None):
+        now = now or time.time()
+        age = None if self.fetched_at is None else now - self.fetched_at
+        return {
+            "name": self.name,
+            "location": self.location,
+            "format": self.format,
+            "remote": is_remote(self.location),
+            "refresh_interval": self.refresh_interval,
+            "priority": self.priority,
+            "fetched_at": _iso(self.fetched_at),
+            "age_seconds": None if age is None else round(age, 1),
+            "fresh": age is not None and age < self.refresh_interval,
+            "fetch_seconds": None if self.fetch_seconds is None else round(self.fetch_seconds, 3),
+            "rows": None if self.frame is None else len(self.frame),
+            "next_refresh": _iso(self.next_refresh),
+            "error": self.error,
+            "validation": validation.summary(self.location),
+        }
+
+
+def _iso(ts):
+    return None if ts is None else time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(ts))
+
+
+# --- Registry ---
+def _default_specs(config: dict) -> dict:
+    specs = {
+        "public-fund": {"location": PUBLIC_FUND_URL, "priority": 100},
+        "fund-data": {"location": FUND_DATA_CSV, "priority": 90},
+    }
+    for email, inv in config.items():
+        base = inv.get("link") or (
+            os.path.join(BASE_DIR, "static", inv["performance_file"]) if inv.get("performance_file") else None
+        )
+        if base:
+            specs[f"investor:{email}"] = {"location": base, "priority": 50}
+        for key, value in inv.items():
+            m = _YEAR_LINK.match(key)
+            if m and value:
+                year = m.group(1) or m.group(2)
+                specs.setdefault(f"investor:{email}:{year}", {"location": value, "priority": 10})
+    return specs
+
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+_sources = {}
+_by_location = {}
+_stamp = object()
+_registry_lock = threading.Lock()
+
+
+def registry() -> dict:
+    """{name: DataSource}, rebuilt when investors.json or the overrides file changes."""
+    global _sources, _by_location, _stamp
+    stamp = (_mtime(INVESTORS_JSON), _mtime(OVERRIDES_JSON))
+    if stamp == _stamp:
+        return _sources
+    with _registry_lock:
+        if stamp == _stamp:
+            return _sources
+        with open(INVESTORS_JSON, "r", encoding="utf-8") as f:
+            specs = _default_specs(json.load(f))
+        if stamp[1] is not None:
+            with open(OVERRIDES_JSON, "r", encoding="utf-8") as f:
+                for name, override in json.load(f).items():
+                    specs[name] = {**specs.get(name, {}), **override}
+
+        sources = {}
+        for name, spec in specs.items():
+            source = DataSource(name, **spec)
+            old = _sources.get(name)
+            if old is not None and (old.location, old.format) == (source.location, source.format):
+                # Keep the fetched frame and schedule; take the new policy
+                old.refresh_interval, old.priority = source.refresh_interval, source.priority
+                source = old
+            sources[name] = source
+        _sources = sources
+        _by_location = {s.location: s for s in sources.values()}
+        _stamp = stamp
+    return _sources
+
+
+def get(name: str) -> DataSource:
+    try:
+        return registry()[name]
+    except KeyError:
+        raise KeyError(f"Unknown data source {name!r}") from None
+
+
+def location(name: str) -> str:
+    return get(name).location
+
+
+def by_location(location: str):
+    """The registered source for a link / path, or None for ad-hoc locations."""
+    registry()
+    return _by_location.get(location)
+
+
+def generation(location: str) -> int:
+    """Data counter of the source at `location` (0 if unregistered); changes when a refresh brings new data."""
+    source = by_location(location)
+    return 0 if source is None else source.generation
+
+
+def investor_source(email: str, year: str | None = None) -> DataSource:
+    """The investor's year-specific source if declared, else its general one."""
+    sources = registry()
+    if year and f"investor:{email}:{year}" in sources:
+        return sources[f"investor:{email}:{year}"]
+    try:
+        return sources[f"investor:{email}"]
+    except KeyError:
+        raise KeyError(f"No data source declared for investor {email}") from None
+
+
+def all_locations():
+    return sorted({s.location for s in registry().values()})
+
+
+def freshness():
+    now = time.time()
+    return [s.status(now) for s in sorted(registry().values(), key=lambda s: (-s.priority, s.name))]
+
+
+# --- Scheduler ---
+class RefreshScheduler(threading.Thread):
+    """
+    Background refresher: repeatedly fetches the source that is due first
+    (never-fetched sources first, by priority), then sleeps `stagger` seconds.
+    """
+
+    def __init__(self, stagger: float = STAGGER):
+        super().__init__(name="data-source-refresh", daemon=True)
+        self.stagger = stagger
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _next_due(self):
+        sources = list(registry().values())
+        if not sources:
+            return None
+        return min(sources, key=lambda s: (s.next_refresh or 0.0, -s.priority))
+
+    def run(self):
+        while not self._stop_event.is_set():
+            source = self._next_due()
+            if source is None:
+                self._stop_event.wait(self.stagger)
+                continue
+            wait = (source.next_refresh or 0.0) - time.time()
+            if wait > 0:
+                # Re-check after at most `stagger` seconds: demand fetches and config edits move deadlines
+                self._stop_event.wait(min(wait, max(self.stagger, 1.0)))
+                continue
+            try:
+                source.fetch()
+                print(f"🔄 Refreshed {source.name} ({len(source.frame)} rows)")
+            except Exception as e:
+                print(f"⚠️ Refresh of {source.name} failed: {e}", file=sys.stderr)
+            self._stop_event.wait(self.stagger)
+
+
+_scheduler = None
+
+
+def start_scheduler(stagger: float = STAGGER) -> RefreshScheduler:
+    """Start the refresher thread once per process (call after forking)."""
+    global _scheduler
+    if _scheduler is None or not _scheduler.is_alive():
+        _scheduler = RefreshScheduler(stagger)
+        _scheduler.start()
+    return _scheduler
+
+
+def scheduler_running() -> bool:
+    return _scheduler is not None and _scheduler.is_alive()
@@ -0,0 +1,155 @@
+"""
+What-if fee recalculation over the investor's actual contributions.
+
+`fee_scenarios` values every contribution of the investor's sheet at the
+current valuation date (the same NavState as `performance_metrics`) under a
+grid of (management fee, hurdle, performance fee) schedules. The gross
+return and age of each contribution are computed once; the grid is then
+one broadcast of `contribution_fees` over scenarios x contributions, so a
+few hundred scenarios cost about as much as one.
+
+The scenario hurdle replaces the investor's default hurdle; contributions
+with their own 'Hurdle Rate' cell keep it, exactly as in
+performance_metrics. The investor's own schedule is always evaluated too
+("current"), and reproduces the portal's fees and NAV.
+
+Grid axes are given as comma lists ("0,0.01,0.02") or start:stop:step
+ranges ("0:0.03:0.005", stop included).
+"""
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import validation
+from analysis_functions import (
+    NavState,
+    _load_csv,
+    _load_investor,
+    _parse_dates,
+    _sanitize_list,
+    contribution_fees,
+)
+
+DEFAULT_GRID = {
+    "management_fee": "0:0.03:0.005",
+    "hurdle": "0:0.6:0.1",
+    "performance_fee": "0.1:0.3:0.05",
+}
+AXIS_LIMITS = {"management_fee": (0.0, 1.0), "hurdle": (0.0, 10.0), "performance_fee": (0.0, 1.0)}
+MAX_AXIS = 200
+MAX_SCENARIOS = 20_000
+
+
+def parse_axis(name: str, value: str | None) -> np.ndarray:
+    """Sorted unique rates of one grid axis from a comma list or a start:stop:step range."""
+    text = str(value if value not in (None, "") else DEFAULT_GRID[name]).strip()
+    try:
+        if ":" in text:
+            start, stop, step = (float(x) for x in text.split(":"))
+            if not step > 0:
+                raise ValueError
+        else:
+            rates = np.array([float(x) for x in text.split(",") if x.strip()])
+    except ValueError:
+        raise ValueError(f"Invalid {name} grid: {value!r}") from None
+    if ":" in text:
+        if (stop - start) / step + 1 > MAX_AXIS:
+            raise ValueError(f"Too many {name} values (max {MAX_AXIS})")
+        rates = np.arange(start, stop + step / 2, step).round(10)
+
+    lo, hi = AXIS_LIMITS[name]
+    if rates.size == 0 or not np.all(np.isfinite(rates)) or rates.min() < lo or rates.max() > hi:
+        raise ValueError(f"{name} values must be between {lo} and {hi}")
+    rates = np.unique(rates)
+    if rates.size > MAX_AXIS:
+        raise ValueError(f"Too many {name} values (max {MAX_AXIS})")
+    return rates
+
+
+def _default_hurdle_mask(df, pos):
+    """Contributions (in ledger order) whose hurdle is the investor default rather than their own cell."""
+    rows = df.iloc[:pos + 1]
+    rows = rows[rows["Contribution"] != 0]
+    if "Hurdle Rate" not in rows.columns:
+        return np.ones(len(rows), dtype=bool)
+    raw = rows["Hurdle Rate"]
+    # ContributionLedger.from_frame falls back to the default only for cells that do not parse
+    return (raw.notna() & pd.to_numeric(raw, errors="coerce").isna()).to_numpy(dtype=bool)
+
+
+def fee_scenarios(email, year: str | None = None, management_fees=None, hurdles=None, performance_fees=None):
+    """
+    NAV and fee surface over the grid management_fees x hurdles x
+    performance_fees (arrays of annual rates), indexed [mgmt][hurdle][perf].
+    """
+    t0 = time.perf_counter()
+    investor = _load_investor(email)
+    H, Mg, Pf = investor.fee_params
+
+    df = _load_csv(email, year=year)
+    if not validation.is_clean(df):
+        df = df.dropna(how="all").reset_index(drop=True)
+        _parse_dates(df)
+    state = NavState.from_frame(df, H, Mg, Pf, pd.to_datetime(datetime.now().date()))
+    ledger = state.ledger
+
+    mg = np.asarray(management_fees if management_fees is not None else parse_axis("management_fee", None), dtype=float)
+    hu = np.asarray(hurdles if hurdles is not None else parse_axis("hurdle", None), dtype=float)
+    pf = np.asarray(performance_fees if performance_fees is not None else parse_axis("performance_fee", None), dtype=float)
+    if mg.size * hu.size * pf.size > MAX_SCENARIOS:
+        raise ValueError(f"Grid too large: {mg.size * hu.size * pf.size} scenarios (max {MAX_SCENARIOS})")
+
+    # Per contribution, independent of the schedule
+    with np.errstate(divide="ignore", invalid="ignore"):
+        R = (1 + state.ret_today) / (1 + ledger.rets) - 1
+    T = ledger.age_days(state.today)
+    default = _default_hurdle_mask(df, state.pos)
+
+    # Scenarios on the leading axes, contributions last: (M, H, P, C)
+    Mg_s = mg[:, None, None, None]
+    Pf_s = pf[None, None, :, None]
+    hurdle_s = np.where(default, hu[None, :, None, None], ledger.hurdles)
+    mgmt, perf = contribution_fees(ledger.amounts, R, T, Mg_s, hurdle_s, Pf_s)
+    shape = (mg.size, hu.size, pf.size)
+    # Management fees only vary with mg, performance fees with (hurdle, perf): sum before broadcasting
+    mgmt = np.broadcast_to(mgmt.sum(axis=-1), shape)
+    perf = np.broadcast_to(perf.sum(axis=-1), shape)
+    total = mgmt + perf
+    nav = state.asset_today - total
+
+    cur_mgmt, cur_perf = state.fees()
+    current_fees = float(cur_mgmt.sum() + cur_perf.sum())
+
+    def surface(values):
+        return [[_sanitize_list(row) for row in plane] for plane in values.tolist()]
+
+    return {
+        "valuation_date": state.today.strftime("%Y-%m-%d"),
+        "asset_value": float(state.asset_today),
+        "contributions": len(ledger),
+        "contributed": ledger.total(),
+        "current": {
+            "management_fee": Mg,
+            "hurdle": H,
+            "performance_fee": Pf,
+            "management_fees": float(cur_mgmt.sum()),
+            "performance_fees": float(cur_perf.sum()),
+            "total_fees": current_fees,
+            "nav": float(state.asset_today - current_fees),
+        },
+        "axes": {
+            "management_fee": mg.tolist(),
+            "hurdle": hu.tolist(),
+            "performance_fee": pf.tolist(),
+        },
+        "shape": [mg.size, hu.size, pf.size],
+        "nav": surface(nav),
+        "nav_change": surface(nav - (state.asset_today - current_fees)),
+        "management_fees": surface(mgmt),
+        "performance_fees": surface(perf),
+        "total_fees": surface(total),
+        "scenarios": int(mg.size * hu.size * pf.size),
+        "compute_ms": round((time.perf_counter() - t0) * 1000, 2),
+    }
@@ -0,0 +1,167 @@
+"""
+Monte Carlo fee-outcome simulator.
+
+Future paths are built by block-bootstrapping the historical daily returns of
+an investor's sheet (or the public fund series in fund-data.csv). Each path is
+valued with the same management / hurdle / performance-fee rules as
+`performance_metrics`, and percentile bands of after-fee NAV and fees are
+returned. Paths are simulated in fixed-size chunks, each with its own child
+seed, so results are reproducible regardless of how many worker processes run.
+
+Large simulations run on a process pool created on first use. Its workers are
+spawned, not forked: the pool is created from a request thread of an already
+multithreaded server process, and forking that could copy a lock another
+thread holds.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import data_sources
+import validation
+from analysis_functions import (
+    _load_investor,
+    _load_csv,
+    _read_source,
+    _parse_dates,
+    _valuation_row,
+    ContributionLedger,
+    _sanitize_list,
+    contribution_fees,
+)
+
+PERCENTILES = (5, 25, 50, 75, 95)
+CHUNK_PATHS = 1000
+MAX_PATHS = 100_000
+POOL_MIN_CELLS = 2_000_000   # paths x checkpoints x contributions below which a pool is not worth it
+SIM_WORKERS = int(os.environ.get("SIM_WORKERS", os.cpu_count() or 1))
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+def _get_pool():
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ProcessPoolExecutor(max_workers=SIM_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _POOL
+
+
+def daily_log_returns(cum_ret):
+    """Daily log returns implied by a cumulative return series ('Ret' / 'Fund')."""
+    r = pd.to_numeric(pd.Series(cum_ret), errors="coerce").to_numpy(dtype=float)
+    r = r[np.isfinite(r) & (r > -1.0)]
+    return np.diff(np.log1p(r))
+
+
+def _simulate_chunk(seed, n_paths, log_returns, block, horizon, checkpoints,
+                    contrib, growth_base, T0, hurdles, Mg, Pf, asset_today):
+    """Simulate one chunk of paths; returns (nav, fees), each of shape (paths, checkpoints)."""
+    rng = np.random.default_rng(seed)
+    n_blocks = -(-horizon // block)
+    starts = rng.integers(0, log_returns.size - block + 1, size=(n_paths, n_blocks))
+    idx = (starts[:, :, None] + np.arange(block)).reshape(n_paths, -1)[:, :horizon]
+    growth = np.exp(np.cumsum(log_returns[idx], axis=1)[:, checkpoints - 1])   # (P, K)
+
+    # Gross return of every contribution at every checkpoint: (P, K, C)
+    R = growth[:, :, None] * growth_base - 1.0
+    T = T0[None, :] + checkpoints[:, None]                                      # (K, C)
+    mgmt, perf = contribution_fees(contrib, R, T, Mg, hurdles, Pf)
+    fees = (mgmt + perf).sum(axis=-1)
+    nav = asset_today * growth - fees
+    return nav, fees
+
+
+def _fund_returns_until(today):
+    df = _read_source(data_sources.location("fund-data"))
+    _parse_dates(df)
+    return df.loc[df["Date"] <= today, "Fund"]
+
+
+def simulate_fee_outcomes(email,
+                          year: str | None = None,
+                          n_paths: int = 10_000,
+                          horizon_days: int = 365,
+                          block: int = 20,
+                          seed: int = 0,
+                          source: str = "investor",
+                          n_points: int = 13,
+                          workers: int | None = None):
+    """
+    Simulate `n_paths` future paths over `horizon_days` and return percentile
+    bands of after-fee NAV and accrued fees at `n_points` checkpoints.
+
+    source : 'investor' bootstraps the investor's own 'Ret' history,
+             'fund' bootstraps the public 'Fund' column of fund-data.csv.
+    """
+    if not 1 <= n_paths <= MAX_PATHS:
+        raise ValueError(f"n_paths must be between 1 and {MAX_PATHS}")
+    if horizon_days < 1:
+        raise ValueError("horizon_days must be positive")
+
+    H, Mg, Pf = _load_investor(email).fee_params
+    df = _load_csv(email, year=year)
+    if not validation.is_clean(df):
+        df = df.dropna(how="all")
+        _parse_dates(df)
+    today_row = _valuation_row(df)
+    today = today_row["Date"]
+    Ret_today = float(today_row["Ret"])
+    Asset_today = float(today_row["Historical Asset Value"])
+
+    if source == "fund":
+        log_returns = daily_log_returns(_fund_returns_until(today))
+    elif source == "investor":
+        log_returns = daily_log_returns(df.loc[df["Date"] <= today, "Ret"])
+    else:
+        raise ValueError(f"Unknown source: {source!r}")
+    if log_returns.size < 2:
+        raise ValueError("Not enough return history to bootstrap")
+    block = max(1, min(int(block), log_returns.size))
+
+    ledger = ContributionLedger.from_frame(df[df["Date"] <= today], H)
+    contrib, hurdles = ledger.amounts, ledger.hurdles
+    growth_base = (1 + Ret_today) / (1 + ledger.rets)
+    T0 = ledger.age_days(today)
+
+    checkpoints = np.unique(np.linspace(1, horizon_days, min(n_points, horizon_days)).round().astype(int))
+
+    sizes = [CHUNK_PATHS] * (n_paths // CHUNK_PATHS)
+    if n_paths % CHUNK_PATHS:
+        sizes.append(n_paths % CHUNK_PATHS)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = (log_returns, block, horizon_days, checkpoints,
+            contrib, growth_base, T0, hurdles, Mg, Pf, Asset_today)
+
+    workers = SIM_WORKERS if workers is None else workers
+    cells = n_paths * checkpoints.size * max(contrib.size, 1)
+    if workers > 1 and len(sizes) > 1 and cells >= POOL_MIN_CELLS:
+        pool = _get_pool()
+        futures = [pool.submit(_simulate_chunk, sd, n, *args) for sd, n in zip(seeds, sizes)]
+        chunks = [f.result() for f in futures]
+    else:
+        chunks = [_simulate_chunk(sd, n, *args) for sd, n in zip(seeds, sizes)]
+
+    nav = np.concatenate([c[0] for c in chunks])
+    fees = np.concatenate([c[1] for c in chunks])
+    nav_q = np.percentile(nav, PERCENTILES, axis=0)
+    fee_q = np.percentile(fees, PERCENTILES, axis=0)
+
+    out_dates = today + pd.to_timedelta(checkpoints, unit="D")
+    return {
+        "valuation_date": today.strftime("%Y-%m-%d"),
+        "dates": out_dates.strftime("%Y-%m-%d").tolist(),
+        "percentiles": list(PERCENTILES),
+        "nav": {f"p{p}": _sanitize_list(q.tolist()) for p, q in zip(PERCENTILES, nav_q)},
+        "fees": {f"p{p}": _sanitize_list(q.tolist()) for p, q in zip(PERCENTILES, fee_q)},
+        "n_paths": n_paths,
+        "horizon_days": horizon_days,
+        "block_size": block,
+        "seed": seed,
+        "source": source,
+    }
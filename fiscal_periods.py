@@ -0,0 +1,183 @@
+"""
+Fiscal periods of each investor and their precomputed aggregates.
+
+An investor's fiscal year starts on the anniversary of `Fiscal_year_start`:
+with Fiscal_year_start 2024-10-16, year "2024" runs 2024-10-16 .. 2025-10-15
+and "2025" from 2025-10-16. Periods that end before `join_date` are skipped
+and the first one starts at `join_date`; the current period ends today. A
+period is valued on the investor's `<year>-Link` sheet when declared, else on
+its general sheet (see data_sources.py). Without ?year= the portal shows
+`default_year`: the latest period with its own `<year>-Link` sheet.
+
+Aggregates of every period (period return, contributions, fees, NAV, IRR)
+are cached by the source's data version and fetch generation (as the frame
+cache) and the valuation date, so they are computed once per data version
+and switching years in the portal is a lookup that does not read the sheet. The current period keeps using performance_metrics, which
+advances its NavState incrementally as rows are appended.
+"""
+import os
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+
+from analysis_functions import (
+    NavState,
+    _annualized_volatility,
+    _frame_key,
+    _load_investor,
+    _parse_dates,
+    _read_source,
+    _source_for,
+    data_version,
+    performance_metrics,
+)
+import data_sources
+import validation
+from cache import TTLCache
+
+# Period aggregates keyed by source version; entries only go stale when the sheet is refreshed
+PERIOD_CACHE = TTLCache(ttl=float(os.environ.get("PERIOD_CACHE_TTL", 24 * 3600)), maxsize=512)
+
+
+class FiscalPeriod:
+    def __init__(self, year: str, start: date, end: date, closed: bool):
+        self.year = year
+        self.start = start
+        self.end = end          # last day (today for the current period)
+        self.closed = closed
+
+    def as_dict(self):
+        return {
+            "year": self.year,
+            "start": self.start.isoformat(),
+            "end": self.end.isoformat(),
+            "closed": self.closed,
+        }
+
+
+def _to_date(value):
+    if not value:
+        return None
+    try:
+        return pd.Timestamp(value).date()
+    except (ValueError, TypeError):
+        return None
+
+
+def fiscal_periods(inv: dict, today: date | None = None):
+    """Periods from the investor's first fiscal year through the one containing `today`."""
+    today = today or date.today()
+    join = _to_date(inv.get("join_date"))
+    first = _to_date(inv.get("Fiscal_year_start")) or join
+    if first is None:
+        return []
+
+    periods = []
+    year = first.year
+    while True:
+        start = first + relativedelta(years=year - first.year)
+        if start > today:
+            break
+        end = first + relativedelta(years=year + 1 - first.year) - timedelta(days=1)
+        if join is None or join <= end:
+            if join is not None:
+                start = max(start, join)
+            periods.append(FiscalPeriod(str(year), start, min(end, today), end < today))
+        year += 1
+    return periods
+
+
+def period_for(inv: dict, year: str, today: date | None = None) -> FiscalPeriod:
+    for period in fiscal_periods(inv, today):
+        if period.year == str(year):
+            return period
+    raise ValueError(f"No fiscal year {year} for this investor")
+
+
+def current_year(inv: dict, today: date | None = None):
+    """Year label of the period containing today, or None if the investor has none yet."""
+    periods = fiscal_periods(inv, today)
+    return periods[-1].year if periods else None
+
+
+def default_year(inv: dict, today: date | None = None):
+    """
+    Year shown when none is requested: the latest period with its own
+    `<year>-Link` sheet, else the current one (None if the investor has none yet).
+    """
+    periods = fiscal_periods(inv, today)
+    linked = [p.year for p in periods if inv.get(f"{p.year}-Link")]
+    if linked:
+        return linked[-1]
+    return periods[-1].year if periods else None
+
+
+# --- Aggregates ---
+
+def _summarize(df, H, Mg, Pf, period: FiscalPeriod):
+    """performance_metrics-style dict valued at the period's last day, plus period aggregates."""
+    if not validation.is_clean(df):
+        df = df.dropna(how="all").reset_index(drop=True)
+        _parse_dates(df)
+    state = NavState.from_frame(df, H, Mg, Pf, pd.Timestamp(period.end))
+    result = state.metrics(df.iloc[-1])
+    history = df.iloc[:state.pos + 1]
+    result["ret_volatility"] = _annualized_volatility(history["Ret"])
+
+    in_period = history[history["Date"] >= pd.Timestamp(period.start)]
+    ret_start = in_period["Ret"].iloc[0] if len(in_period) else np.nan
+    result.update({
+        "period": period.as_dict(),
+        "period_return": float((1 + state.ret_today) / (1 + ret_start) - 1),
+        "contributions_period": state.ledger.total(since=period.start),
+        "contributions_total": state.ledger.total(),
+    })
+    return result
+
+
+def period_summary(email: str, year: str, today: date | None = None):
+    """Aggregates of one fiscal period, computed once per source version and valuation date."""
+    investor = _load_investor(email)
+    H, Mg, Pf = investor.fee_params
+    period = period_for(investor.config, year, today)
+    source = _source_for(email, period.year)
+    if data_version() is None and data_sources.generation(source) == 0:
+        _read_source(source)        # never fetched yet: the key needs its generation
+    key = (email, period.year, period.start, period.end, H, Mg, Pf) + _frame_key(source)
+    return dict(PERIOD_CACHE.get_or_compute(key, lambda: _summarize(_read_source(source), H, Mg, Pf, period)))
+
+
+def period_metrics(email: str, year: str | None = None):
+    """
+    Metrics for the portal's year selector: closed periods come from the
+    precomputed summaries, the current period (or no year) from
+    performance_metrics.
+    """
+    if year:
+        try:
+            period = period_for(_load_investor(email).config, year)
+        except ValueError:
+            period = None
+        if period is not None and period.closed:
+            return period_summary(email, year)
+    return performance_metrics(email, "static/investors.json", year=year)
+
+
+def period_table(email: str, today: date | None = None):
+    """Every fiscal period of the investor with its summary (or the error that prevented it)."""
+    rows = []
+    for period in fiscal_periods(_load_investor(email).config, today):
+        row = period.as_dict()
+        try:
+            summary = period_summary(email, period.year, today)
+            for name in ("period_return", "contributions_period", "contributions_total",
+                         "portfolio_value_nav", "management_fees_total", "performance_fees_total",
+                         "total_fees", "irr"):
+                row[name] = summary[name]
+            row["valuation_date"] = summary["cashflow_chart"]["valuation_date"]
+        except Exception as e:
+            row["error"] = str(e)
+        rows.append(row)
+    return rows
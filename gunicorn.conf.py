@@ -0,0 +1,55 @@
+# gunicorn.conf.py — picked up automatically by `gunicorn app:app`
+import os
+import subprocess
+import sys
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '10000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+
+# PRELOAD_APP=1 imports the app and the analytics stack (pandas/numpy/scipy) once
+# in the master; workers are forked with it already loaded, so boot is fast.
+preload_app = os.environ.get("PRELOAD_APP", "0") == "1"
+
+# SOURCE_SCHEDULER=1: one process refreshes the data sources ahead of demand and
+# publishes them to the workers through shared frames, so it implies SHARED_FRAMES=1
+source_scheduler = os.environ.get("SOURCE_SCHEDULER", "0") == "1"
+if source_scheduler:
+    os.environ["SHARED_FRAMES"] = "1"
+
+
+def on_starting(server):
+    if preload_app:
+        from app import warm_up
+        warm_up()
+        server.log.info("Analytics stack preloaded in master")
+
+
+def post_fork(server, worker):
+    # Without preload, WARM_UP=1 still loads the stack at worker boot instead of on the first request
+    if not preload_app and os.environ.get("WARM_UP", "0") == "1":
+        from app import warm_up
+        warm_up()
+
+
+# SHARED_FRAMES=1: one refresher process publishes source frames as memory-mapped
+# arrays (see shared_frames.py) that every worker attaches to zero-copy. With
+# SOURCE_SCHEDULER=1 it runs the per-source refresh scheduler ("schedule"),
+# else it refetches everything periodically ("watch").
+_refresher = None
+
+
+def when_ready(server):
+    global _refresher
+    if os.environ.get("SHARED_FRAMES", "0") == "1":
+        mode = "schedule" if source_scheduler else "watch"
+        _refresher = subprocess.Popen(
+            [sys.executable, "shared_frames.py", mode],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+        server.log.info("Shared-frames refresher started (%s, pid %s)", mode, _refresher.pid)
+
+
+def on_exit(server):
+    if _refresher is not None:
+        _refresher.terminate()
@@ -0,0 +1,334 @@
+"""
+Load test for the portal endpoints with mocked OAuth and a local sheet server.
+
+Starts (unless --url is given) the app in MOCK_MODE with SHEETS_BASE_URL
+pointing at a local HTTP server that serves the Google Sheets CSV exports
+from local files, so no Google account or network access is needed. Then
+`--concurrency` virtual users log in via /login?as=<email> and hit a
+weighted mix of /client-portal, the /api/* routes and /docs for
+`--duration` seconds over keep-alive connections (asyncio, stdlib only).
+
+Reports per-route request count, errors, p50/p95/p99 latency and throughput.
+
+Usage:
+  python loadtest.py [--concurrency 20] [--duration 30] [--server werkzeug|gunicorn|uvicorn]
+  python loadtest.py --url http://127.0.0.1:8000 --email investor@example.com
+
+With --url the app must run with MOCK_MODE=1 and the tested emails in
+ADMIN_EMAILS (mock logins via ?as= are limited to them).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlparse
+
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# (name, path, weight): roughly one portal page load per round
+ROUTES = [
+    ("/client-portal", "/client-portal", 2),
+    ("/api/portal-bootstrap", "/api/portal-bootstrap", 2),
+    ("/api/fund-series", "/api/fund-series", 3),
+    ("/api/fund-projection", "/api/fund-projection?horizon=3y&freq=monthly", 2),
+    ("/api/compensation-chart", "/api/compensation-chart", 2),
+    ("/api/fee-simulation", "/api/fee-simulation?paths=1000&horizon=1y&seed=1", 1),
+    ("/api/fee-scenarios", "/api/fee-scenarios", 1),
+    ("/api/public-fund-series", "/api/public-fund-series", 2),
+    ("/api/public-fund-metrics", "/api/public-fund-metrics", 2),
+    ("/api/public-fund-analytics", "/api/public-fund-analytics?window=90", 1),
+    ("/api/public-fund-analytics/window", "/api/public-fund-analytics/window", 1),
+    ("/api/public-compensation-chart", "/api/public-compensation-chart", 1),
+    ("/api/admin/metrics", "/api/admin/metrics", 1),
+    ("/api/data-sources", "/api/data-sources", 1),
+    ("/api/data-quality", "/api/data-quality", 1),
+    ("/api/admin/profiles", "/api/admin/profiles", 1),
+    ("/api/fiscal-periods", "/api/fiscal-periods", 1),
+    ("/api/docs", "/api/docs", 2),
+    ("/docs", None, 1),  # a file picked from the user's /api/docs listing
+]
+
+
+# --- Local sheet server ---
+def shifted_csv(path: str) -> bytes:
+    """
+    CSV bytes with dates moved so the last fully-valued row (third column
+    filled) is today; rows after it stay in the future as projections.
+    """
+    df = pd.read_csv(path)
+    dates = pd.to_datetime(df["Date"], format="%d-%b-%y", errors="coerce")
+    last = dates[df.iloc[:, 2].notna()].max()
+    df["Date"] = (dates + (pd.Timestamp.today().normalize() - last)).dt.strftime("%d-%b-%y")
+    return df.to_csv(index=False).encode("utf-8")
+
+
+def start_sheet_server(fund_csv: str, investor_csv: str, latency: float, shift: bool):
+    """Serve ?sheet=Inv0 from fund_csv and every other sheet from investor_csv."""
+    load = shifted_csv if shift else (lambda p: open(p, "rb").read())
+    fund, investor = load(fund_csv), load(investor_csv)
+
+    class SheetHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            sheet = parse_qs(urlparse(self.path).query).get("sheet", [""])[0]
+            body = fund if sheet == "Inv0" else investor
+            if latency:
+                time.sleep(latency)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/csv; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SheetHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# --- App under test ---
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_app(kind: str, port: int, sheets_url: str, emails, log_path: str):
+    env = dict(
+        os.environ,
+        MOCK_MODE="1",
+        MOCK_USER_EMAIL=emails[0],
+        ADMIN_EMAILS=",".join(emails),
+        SHEETS_BASE_URL=sheets_url,
+        SECRET_KEY=os.environ.get("SECRET_KEY", "loadtest"),   # read by app.py; shared by all workers
+    )
+    if kind == "gunicorn":
+        cmd = [sys.executable, "-m", "gunicorn", "app:app", "-c", "gunicorn.conf.py", "-b", f"127.0.0.1:{port}"]
+    elif kind == "uvicorn":
+        cmd = [sys.executable, "-m", "uvicorn", "asgi:application", "--host", "127.0.0.1", "--port", str(port), "--no-access-log"]
+    else:
+        cmd = [sys.executable, "-c", f"from app import app; app.run(host='127.0.0.1', port={port}, threaded=True)"]
+    log = open(log_path, "wb")
+    proc = subprocess.Popen(cmd, cwd=BASE_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"app exited with code {proc.returncode}; see {log_path}")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise SystemExit(f"app did not start listening on port {port}; see {log_path}")
+
+
+# --- Minimal keep-alive HTTP/1.1 client ---
+class Connection:
+    def __init__(self, host: str, port: int):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+        self.cookies = {}
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except Exception:
+                pass
+        self.reader = self.writer = None
+
+    async def get(self, path: str):
+        """GET `path`; returns (status, body). Reconnects once if the server dropped the connection."""
+        for attempt in (0, 1):
+            if self.writer is None:
+                self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+            try:
+                return await self._roundtrip(path)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                await self.close()
+                if attempt:
+                    raise
+
+    async def _roundtrip(self, path):
+        headers = [f"GET {path} HTTP/1.1", f"Host: {self.host}:{self.port}", "Accept-Encoding: identity"]
+        if self.cookies:
+            headers.append("Cookie: " + "; ".join(f"{k}={v}" for k, v in self.cookies.items()))
+        self.writer.write(("\r\n".join(headers) + "\r\n\r\n").encode("latin-1"))
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("connection closed")
+        version, status = status_line.decode("latin-1").split()[:2]
+        response = {}
+        while True:
+            line = (await self.reader.readline()).decode("latin-1").rstrip("\r\n")
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            name, value = name.strip().lower(), value.strip()
+            if name == "set-cookie":
+                self._set_cookie(value)
+            else:
+                response[name] = value
+
+        if response.get("transfer-encoding", "").lower() == "chunked":
+            body = bytearray()
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await self.reader.readline()
+                    break
+                body += await self.reader.readexactly(size)
+                await self.reader.readexactly(2)
+            body = bytes(body)
+        elif "content-length" in response:
+            body = await self.reader.readexactly(int(response["content-length"]))
+        else:
+            body = await self.reader.read()
+            await self.close()
+            return int(status), body
+
+        if response.get("connection", "").lower() == "close" or version == "HTTP/1.0":
+            await self.close()
+        return int(status), body
+
+    def _set_cookie(self, header):
+        # The app sets Secure cookies; this client sends them over plain HTTP anyway
+        name, _, rest = header.partition("=")
+        value = rest.split(";", 1)[0]
+        expired = "expires=thu, 01 jan 1970" in header.lower() or "max-age=0" in header.lower()
+        if not value or expired:
+            self.cookies.pop(name.strip(), None)
+        else:
+            self.cookies[name.strip()] = value
+
+
+# --- Virtual users ---
+class Stats:
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+
+    def record(self, route, seconds, ok):
+        self.latencies.setdefault(route, []).append(seconds)
+        if not ok:
+            self.errors[route] = self.errors.get(route, 0) + 1
+
+
+async def virtual_user(n, host, port, email, deadline, stats, seed):
+    rng = random.Random(seed + n)
+    conn = Connection(host, port)
+    try:
+        status, _ = await conn.get(f"/login?as={quote(email)}")
+        if status not in (200, 302):
+            print(f"⚠️ user {n}: login returned {status}", file=sys.stderr)
+            return
+
+        doc_urls = []
+        status, body = await conn.get("/api/docs")
+        if status == 200:
+            doc_urls = [f["url"] for files in json.loads(body).values() for f in files]
+
+        routes = [r for r in ROUTES if r[1] is not None or doc_urls]
+        weights = [r[2] for r in routes]
+        while time.monotonic() < deadline:
+            name, path, _ = rng.choices(routes, weights)[0]
+            path = path or rng.choice(doc_urls)
+            t0 = time.perf_counter()
+            try:
+                status, _ = await conn.get(path)
+                ok = status == 200
+            except Exception:
+                await conn.close()
+                ok = False
+            stats.record(name, time.perf_counter() - t0, ok)
+    finally:
+        await conn.close()
+
+
+async def run(host, port, emails, concurrency, duration, seed):
+    stats = Stats()
+    deadline = time.monotonic() + duration
+    t0 = time.perf_counter()
+    await asyncio.gather(*(
+        virtual_user(n, host, port, emails[n % len(emails)], deadline, stats, seed)
+        for n in range(concurrency)
+    ))
+    return stats, time.perf_counter() - t0
+
+
+def report(stats: Stats, elapsed: float):
+    print(f"{'route':<36} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    everything = []
+    for route, _, _ in ROUTES:
+        lat = stats.latencies.get(route)
+        if not lat:
+            continue
+        everything.extend(lat)
+        print(_row(route, lat, stats.errors.get(route, 0), elapsed))
+    if everything:
+        print(_row("total", everything, sum(stats.errors.values()), elapsed))
+
+
+def _row(name, lat, errors, elapsed):
+    q = statistics.quantiles(lat, n=100) if len(lat) > 1 else [lat[0]] * 99
+    return (f"{name:<36} {len(lat):>9} {errors:>7} {len(lat) / elapsed:>8.1f} "
+            f"{q[49] * 1000:>8.1f} {q[94] * 1000:>8.1f} {q[98] * 1000:>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Portal load test")
+    parser.add_argument("--concurrency", type=int, default=20, help="virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of load")
+    parser.add_argument("--url", help="test an already running app (MOCK_MODE=1, emails in ADMIN_EMAILS)")
+    parser.add_argument("--server", choices=["werkzeug", "gunicorn", "uvicorn"], default="werkzeug")
+    parser.add_argument("--email", action="append", help="investor to log in as (repeatable)")
+    parser.add_argument("--fund-csv", default=os.path.join(BASE_DIR, "static", "fund-data.csv"))
+    parser.add_argument("--investor-csv", default=os.path.join(BASE_DIR, "static", "investor-example-com-data.csv"))
+    parser.add_argument("--sheet-latency", type=float, default=0.0, help="seconds added to each sheet fetch")
+    parser.add_argument("--no-shift", action="store_true", help="serve the CSVs with their original dates")
+    parser.add_argument("--app-log", default=os.path.join(BASE_DIR, "instance", "loadtest-app.log"))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    emails = args.email or ["sajjadnoun@gmail.com"]
+    proc = None
+    if args.url:
+        target = urlparse(args.url)
+        host, port = target.hostname, target.port or 80
+    else:
+        sheets = start_sheet_server(args.fund_csv, args.investor_csv, args.sheet_latency, not args.no_shift)
+        sheets_url = f"http://127.0.0.1:{sheets.server_address[1]}"
+        os.makedirs(os.path.dirname(os.path.abspath(args.app_log)), exist_ok=True)
+        host, port = "127.0.0.1", _free_port()
+        proc = start_app(args.server, port, sheets_url, emails, args.app_log)
+        print(f"app ({args.server}) on :{port}, sheets on {sheets_url}, log {args.app_log}")
+
+    try:
+        stats, elapsed = asyncio.run(run(host, port, emails, args.concurrency, args.duration, args.seed))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+    print(f"{args.concurrency} users for {elapsed:.1f}s")
+    report(stats, elapsed)
+
+
+if __name__ == "__main__":
+    main()
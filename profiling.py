@@ -0,0 +1,182 @@
+"""
+Opt-in per-request profiling.
+
+A request is profiled when an admin adds ?profile=1 (or ?profile=pyinstrument)
+or when it is drawn by PROFILE_SAMPLE_RATE (e.g. 0.01 profiles a random 1%
+of requests; 0 disables sampling). The profiler runs from before_request to
+after_request on the request's own thread and the capture is written to
+PROFILE_DIR (default instance/profiles):
+
+    <id>.prof   cProfile stats (open with pstats or snakeviz), or
+    <id>.html   pyinstrument report when that profiler was requested and installed
+    <id>.json   route, method, status, user, trigger, duration and the
+                functions with the most own time
+
+Only one request is profiled at a time (Python's profilers are process-wide
+on newer interpreters); others run unprofiled. At most MAX_PROFILES
+captures are kept. Streamed response bodies are produced after the capture
+ends and are not included.
+"""
+import cProfile
+import json
+import os
+import pstats
+import random
+import threading
+import time
+import uuid
+
+from flask import g, request
+
+try:
+    from pyinstrument import Profiler as PyinstrumentProfiler
+    HAVE_PYINSTRUMENT = True
+except ImportError:
+    HAVE_PYINSTRUMENT = False
+
+PROFILE_DIR = os.environ.get("PROFILE_DIR")       # default: <instance path>/profiles
+SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 0.0))
+MAX_PROFILES = int(os.environ.get("PROFILE_MAX_FILES", 200))
+TOP_FUNCTIONS = 15
+
+_active = threading.Lock()
+
+
+def profile_dir(app) -> str:
+    return PROFILE_DIR or os.path.join(app.instance_path, "profiles")
+
+
+def _trigger(is_admin):
+    """('param' | 'sample', profiler name) if this request should be profiled, else None."""
+    if request.endpoint in (None, "static"):
+        return None
+    asked = request.args.get("profile", "")
+    if asked and asked != "0" and is_admin():
+        wanted = "pyinstrument" if asked == "pyinstrument" and HAVE_PYINSTRUMENT else "cprofile"
+        return "param", wanted
+    if SAMPLE_RATE > 0 and random.random() < SAMPLE_RATE:
+        return "sample", "cprofile"
+    return None
+
+
+def _top_functions(profiler):
+    stats = pstats.Stats(profiler)
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:TOP_FUNCTIONS]
+    return [
+        {
+            "function": f"{os.path.basename(filename)}:{line}({name})",
+            "calls": nc,
+            "own_ms": round(tt * 1000, 2),
+            "cumulative_ms": round(ct * 1000, 2),
+        }
+        for (filename, line, name), (cc, nc, tt, ct, callers) in rows
+    ]
+
+
+def _prune(root):
+    captures = sorted(f for f in os.listdir(root) if f.endswith(".json"))
+    for name in captures[:max(0, len(captures) - MAX_PROFILES)]:
+        stem = name[:-5]
+        for ext in (".json", ".prof", ".html"):
+            try:
+                os.remove(os.path.join(root, stem + ext))
+            except FileNotFoundError:
+                pass
+
+
+def _save(app, capture, response, duration, user):
+    root = profile_dir(app)
+    os.makedirs(root, exist_ok=True)
+    now = time.time()
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now)) + f"{int(now % 1 * 1000):03d}"
+    profile_id = f"{stamp}-{uuid.uuid4().hex[:6]}"    # sorts by capture time
+    meta = {
+        "id": profile_id,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(now)),
+        "route": request.url_rule.rule if request.url_rule else None,
+        "endpoint": request.endpoint,
+        "method": request.method,
+        "path": request.full_path.rstrip("?"),
+        "status": response.status_code,
+        "duration_ms": round(duration * 1000, 2),
+        "user": user,
+        "trigger": capture["trigger"],
+        "profiler": capture["profiler"],
+    }
+    profiler = capture["instance"]
+    if capture["profiler"] == "pyinstrument":
+        meta["file"] = f"{profile_id}.html"
+        with open(os.path.join(root, meta["file"]), "w", encoding="utf-8") as f:
+            f.write(profiler.output_html())
+    else:
+        meta["file"] = f"{profile_id}.prof"
+        profiler.dump_stats(os.path.join(root, meta["file"]))
+        meta["top_functions"] = _top_functions(profiler)
+    with open(os.path.join(root, f"{profile_id}.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    _prune(root)
+    return profile_id
+
+
+def install(app, is_admin, current_user):
+    """Register the before/after request hooks on `app`."""
+
+    @app.before_request
+    def _start_profile():
+        trigger = _trigger(is_admin)
+        if trigger is None or not _active.acquire(blocking=False):
+            return
+        profiler = PyinstrumentProfiler() if trigger[1] == "pyinstrument" else cProfile.Profile()
+        g._profile = {"trigger": trigger[0], "profiler": trigger[1], "instance": profiler,
+                      "started": time.perf_counter()}
+        if trigger[1] == "pyinstrument":
+            profiler.start()
+        else:
+            profiler.enable()
+
+    @app.after_request
+    def _stop_profile(response):
+        capture = g.pop("_profile", None)
+        if capture is None:
+            return response
+        try:
+            if capture["profiler"] == "pyinstrument":
+                capture["instance"].stop()
+            else:
+                capture["instance"].disable()
+            duration = time.perf_counter() - capture["started"]
+            profile_id = _save(app, capture, response, duration, current_user())
+            print(f"🔬 Profiled {request.path} ({duration * 1000:.0f} ms) -> {profile_id}")
+            if capture["trigger"] == "param":
+                response.headers["X-Profile-Id"] = profile_id
+        except Exception as e:
+            print(f"⚠️ Saving profile failed: {e}")
+        finally:
+            _active.release()
+        return response
+
+    @app.teardown_request
+    def _drop_profile(exc):
+        # A request that raised skips after_request: stop the profiler and free the slot
+        capture = g.pop("_profile", None)
+        if capture is not None:
+            if capture["profiler"] == "pyinstrument":
+                capture["instance"].stop()
+            else:
+                capture["instance"].disable()
+            _active.release()
+
+
+def list_profiles(app):
+    """Metadata of the stored captures, newest first."""
+    root = profile_dir(app)
+    if not os.path.isdir(root):
+        return []
+    profiles = []
+    for name in sorted((f for f in os.listdir(root) if f.endswith(".json")), reverse=True):
+        try:
+            with open(os.path.join(root, name), "r", encoding="utf-8") as f:
+                profiles.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return profiles
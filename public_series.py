@@ -0,0 +1,148 @@
+"""
+Materialized rebased / after-fee series of the public fund page.
+
+`build_public_series` turns the public fund sheet into date-sorted NumPy
+arrays (Date + the four cumulative-return columns) for one fee schedule and
+serializes the page's default window (DEFAULT_START .. today) once, as
+gzip-compressed JSON. It is kept in SERIES_CACHE, keyed by the source's
+data version and generation and the date, so it is rebuilt only when the
+sheet's data changes or a new day begins (not on every frame-cache
+expiry), and /api/public-fund-series serves the stored bytes as they are.
+
+Other windows are answered by slicing the arrays (np.searchsorted) and
+rebasing the slice; their bodies are kept on the same object, so a repeated
+window is also served without recomputing. Both paths give exactly what
+analysis_functions.compute_rebased_indices returns for that window.
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import data_sources
+import validation
+from analysis_functions import _read_source, _sanitize_list, _to_num, data_version
+from cache import TTLCache, memoize
+
+DEFAULT_START = "2020-10-17"
+PUBLIC_FEES = {"fixed": 0.02, "hurdle": 0.50, "perf_fee": 0.25}
+SERIES_NAMES = ["Fund (Before Fee)", "Bourse Index", "Gold Index", "Dollar Index"]
+AFTER_FEE = "Fund (After Fee)"
+MAX_WINDOWS = 32          # serialized sub-window bodies kept per build
+GZIP_LEVEL = 6
+
+# Entries are keyed by data generation and date; the TTL only bounds how long a stale key lingers
+SERIES_CACHE = TTLCache(ttl=float(os.environ.get("PUBLIC_SERIES_TTL", 86400)), maxsize=16)
+
+
+class SeriesBody:
+    """One serialized window: compressed JSON plus its ETag."""
+
+    __slots__ = ("gzipped", "etag", "size")
+
+    def __init__(self, payload: dict):
+        raw = json.dumps(payload, separators=(",", ":"), allow_nan=False).encode("utf-8")
+        self.gzipped = gzip.compress(raw, compresslevel=GZIP_LEVEL, mtime=0)
+        self.etag = hashlib.sha1(raw).hexdigest()[:20]
+        self.size = len(raw)
+
+    def json(self) -> bytes:
+        return gzip.decompress(self.gzipped)
+
+
+class PublicSeries:
+    """Date-sorted cumulative returns of the public fund and its benchmarks, for one fee schedule."""
+
+    def __init__(self, dates, cum_returns, fixed: float, hurdle: float, perf_fee: float):
+        self.dates = np.asarray(dates, dtype="datetime64[ns]")
+        self.cum = np.asarray(cum_returns, dtype=float)        # (4, n)
+        self.fixed, self.hurdle, self.perf_fee = fixed, hurdle, perf_fee
+        self._bodies = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _slice(self, start, end):
+        lo = np.searchsorted(self.dates, np.datetime64(pd.to_datetime(start), "ns"), side="left")
+        hi = np.searchsorted(self.dates, np.datetime64(pd.to_datetime(end), "ns"), side="right")
+        return lo, max(lo, hi)
+
+    def window(self, start, end) -> dict:
+        """compute_rebased_indices payload for [start, end]."""
+        lo, hi = self._slice(start, end)
+        if lo == hi:
+            return {"dates": [], "series_names": [], "series": {}}
+        dates = self.dates[lo:hi]
+        cum = self.cum[:, lo:hi]
+
+        # Rebase each series on its first valid value in the window
+        rebased = np.full_like(cum, np.nan)
+        for i, values in enumerate(cum):
+            valid = np.flatnonzero(~np.isnan(values))
+            if valid.size:
+                rebased[i] = (1.0 + values) / (1.0 + values[valid[0]]) - 1.0
+
+        # After-fee fund: time-scaled fixed fee and hurdle from the window start
+        T_days = ((dates - dates[0]) // np.timedelta64(1, "D")).astype(float)
+        m_T = (1.0 + self.fixed) ** (T_days / 365.0) - 1.0
+        h_T = (1.0 + self.hurdle) ** (T_days / 365.0) - 1.0
+        fund = rebased[0]
+        share = np.where(fund > h_T, np.maximum(h_T, (1.0 - self.perf_fee) * fund), fund)
+
+        series = {name: _sanitize_list(rebased[i].tolist()) for i, name in enumerate(SERIES_NAMES)}
+        series[AFTER_FEE] = _sanitize_list((share - m_T).tolist())
+        order = SERIES_NAMES + [AFTER_FEE]
+        return {
+            "dates": pd.DatetimeIndex(dates).strftime("%Y-%m-%d").tolist(),
+            "series_names": order,
+            "series": series,
+            "series_matrix": [series[k] for k in order],
+        }
+
+    def body(self, start, end) -> SeriesBody:
+        """Serialized window, built once per (start, end) and kept for later requests."""
+        key = (str(start), str(end))
+        with self._lock:
+            if key in self._bodies:
+                self._bodies.move_to_end(key)
+                return self._bodies[key]
+        body = SeriesBody(self.window(start, end))
+        with self._lock:
+            self._bodies[key] = body
+            while len(self._bodies) > MAX_WINDOWS:
+                self._bodies.popitem(last=False)
+        return body
+
+
+def _series_key(csv_path=None, fixed=PUBLIC_FEES["fixed"], hurdle=PUBLIC_FEES["hurdle"],
+                perf_fee=PUBLIC_FEES["perf_fee"]):
+    csv_path = csv_path or data_sources.location("public-fund")
+    _read_source(csv_path)      # refetches a stale source first, so its generation is current
+    today = datetime.now().strftime("%Y-%m-%d")
+    return ("public-series", csv_path, fixed, hurdle, perf_fee, today,
+            data_version(), data_sources.generation(csv_path))
+
+
+@memoize(cache=SERIES_CACHE, key=_series_key)
+def build_public_series(csv_path: str | None = None, fixed: float = PUBLIC_FEES["fixed"],
+                        hurdle: float = PUBLIC_FEES["hurdle"], perf_fee: float = PUBLIC_FEES["perf_fee"]):
+    """
+    Build (and keep in SERIES_CACHE) the PublicSeries of a public-fund style
+    sheet, with the default window already serialized.
+    """
+    df = _read_source(csv_path or data_sources.location("public-fund"))
+    if not validation.is_clean(df):
+        try:
+            df["Date"] = pd.to_datetime(df["Date"], format="%d-%b-%y", errors="coerce")
+        except Exception:
+            df["Date"] = pd.to_datetime(df["Date"], dayfirst=True, errors="coerce")
+    df = df.dropna(subset=["Date"]).sort_values("Date").reset_index(drop=True)
+
+    cum = np.vstack([df[col].map(_to_num).to_numpy(dtype=float) for col in df.columns[1:5]])
+    series = PublicSeries(df["Date"].to_numpy(), cum, fixed, hurdle, perf_fee)
+    series.body(DEFAULT_START, datetime.now().strftime("%Y-%m-%d"))
+    return series
@@ -0,0 +1,227 @@
+"""
+Precomputed rolling analytics for the fund and its benchmarks.
+
+`build_analytics_table` turns the cumulative-return columns of fund-data.csv
+(Fund, Bourse, Gold, Dollar) into prefix sums of daily log returns and of
+their squares, running peaks and drawdowns, plus rolling 30/90/365-day
+return, volatility and Sharpe-style columns, and sparse tables of range
+max / min / max drawdown of the wealth curve. Building takes O(n) per series
+for the prefix and rolling arrays and O(n log n) time and memory for the
+sparse tables; it is cached alongside the source frame, and statistics for
+any window are then answered in O(1) per series, without rescanning the
+data.
+"""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import data_sources
+import validation
+from analysis_functions import FRAME_CACHE, _read_source, _to_num, _sanitize_list, data_version
+from cache import memoize
+
+SERIES_NAMES = ["Fund", "Bourse Index", "Gold Index", "Dollar Index"]
+WINDOWS = (30, 90, 365)
+DAYS_PER_YEAR = 365
+
+
+class RangeDrawdown:
+    """
+    Sparse tables over one wealth curve: level k holds the max, the min and
+    the max drawdown of every run of 2**k points. O(n log n) to build and to
+    store; `query` answers any range in O(1).
+    """
+
+    def __init__(self, wealth):
+        wealth = np.asarray(wealth, dtype=float)
+        self.highs, self.lows, self.drawdowns = [wealth], [wealth], [np.zeros(wealth.size)]
+        half = 1
+        while 2 * half <= wealth.size:
+            hi, lo, dd = self.highs[-1], self.lows[-1], self.drawdowns[-1]
+            # Run [i, i + 2*half) = [i, i + half) then [i + half, i + 2*half)
+            self.highs.append(np.maximum(hi[:-half], hi[half:]))
+            self.lows.append(np.minimum(lo[:-half], lo[half:]))
+            self.drawdowns.append(np.minimum(np.minimum(dd[:-half], dd[half:]), lo[half:] / hi[:-half] - 1.0))
+            half *= 2
+
+    @staticmethod
+    def _level(a, b):
+        return int(b - a + 1).bit_length() - 1
+
+    def high(self, a, b):
+        k = self._level(a, b)
+        return max(self.highs[k][a], self.highs[k][b - 2 ** k + 1])
+
+    def low(self, a, b):
+        k = self._level(a, b)
+        return min(self.lows[k][a], self.lows[k][b - 2 ** k + 1])
+
+    def query(self, a, b):
+        """
+        Max drawdown (min of wealth / running peak - 1) over points a..b.
+        The two runs covering [a, b] may overlap; a peak in the part only the
+        first covers followed by a trough in the part only the second covers
+        is the one pair neither run sees.
+        """
+        k = self._level(a, b)
+        b0 = b - 2 ** k + 1
+        dd = min(self.drawdowns[k][a], self.drawdowns[k][b0])
+        if b0 > a:
+            dd = min(dd, self.low(a + 2 ** k, b) / self.high(a, b0 - 1) - 1.0)
+        return float(dd)
+
+
+class AnalyticsTable:
+    """Prefix-sum arrays for one dated set of cumulative-return series."""
+
+    def __init__(self, dates, cum_returns: dict, risk_free: float = 0.0):
+        self.dates = np.asarray(dates, dtype="datetime64[D]")
+        self.risk_free = risk_free
+        self.names = list(cum_returns)
+        self.last_valid = {}
+        self.s1, self.s2 = {}, {}
+        self.drawdown, self.max_drawdown = {}, {}
+        self.range_drawdown = {}
+
+        for name, cum in cum_returns.items():
+            cum = np.asarray(cum, dtype=float)
+            valid = np.flatnonzero(np.isfinite(cum))
+            if valid.size == 0:
+                continue
+            last = valid[-1]
+            self.last_valid[name] = last
+
+            # Carry the last known level over gaps, so gaps contribute a zero return
+            wealth = pd.Series(1.0 + cum).ffill().bfill().to_numpy()
+            log_ret = np.concatenate([[0.0], np.diff(np.log(wealth))])
+            self.s1[name] = np.concatenate([[0.0], np.cumsum(log_ret)])
+            self.s2[name] = np.concatenate([[0.0], np.cumsum(log_ret ** 2)])
+
+            peak = np.maximum.accumulate(wealth)
+            drawdown = wealth / peak - 1.0
+            self.drawdown[name] = self._mask(drawdown, last)
+            self.max_drawdown[name] = self._mask(np.minimum.accumulate(drawdown), last)
+            self.range_drawdown[name] = RangeDrawdown(np.exp(self.s1[name][1:last + 2]))
+
+        self.rolling = {
+            name: {
+                f"{stat}_{w}d": values
+                for w in WINDOWS
+                for stat, values in zip(("return", "volatility", "sharpe"), self._rolling(name, w))
+            }
+            for name in self.s1
+        }
+
+    @staticmethod
+    def _mask(values, last):
+        out = np.array(values, dtype=float)
+        out[last + 1:] = np.nan
+        return out
+
+    def _stats(self, name, i, j):
+        """
+        Annualized stats over the daily returns in rows (i, j] (arrays allowed):
+        total return, volatility and Sharpe-style ratio (excess mean / volatility).
+        """
+        s1, s2 = self.s1[name], self.s2[name]
+        n = (j - i).astype(float) if isinstance(j, np.ndarray) else float(j - i)
+        total = s1[j + 1] - s1[i + 1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = total / n
+            var = (s2[j + 1] - s2[i + 1] - n * mean ** 2) / (n - 1)
+            vol = np.sqrt(np.maximum(var, 0.0) * DAYS_PER_YEAR)
+            sharpe = (mean * DAYS_PER_YEAR - self.risk_free) / vol
+        return np.expm1(total), vol, sharpe
+
+    def _rolling(self, name, window):
+        idx = np.arange(self.dates.size)
+        start = np.searchsorted(self.dates, self.dates - np.timedelta64(window, "D"), side="left")
+        ret, vol, sharpe = self._stats(name, start, idx)
+        too_short = (self.dates - self.dates[start]).astype(int) < window
+        last = self.last_valid[name]
+        return [self._mask(np.where(too_short, np.nan, v), last) for v in (ret, vol, sharpe)]
+
+    def window(self, start=None, end=None):
+        """
+        Return / volatility / Sharpe / max drawdown of every series between
+        two dates, in O(1) per series (prefix sums and RangeDrawdown). A
+        window without any row (start after the last date, end before the
+        first, or start after end) gives None for every series.
+        """
+        lo = 0 if start is None else int(np.searchsorted(self.dates, np.datetime64(start, "D"), side="left"))
+        hi = self.dates.size - 1 if end is None else int(np.searchsorted(self.dates, np.datetime64(end, "D"), side="right")) - 1
+        if lo > hi or lo >= self.dates.size:
+            return {"start": None, "end": None, "series": {name: None for name in self.s1}}
+        out = {}
+        for name in self.s1:
+            j = min(hi, self.last_valid[name])
+            if j <= lo:
+                out[name] = None
+                continue
+            ret, vol, sharpe = self._stats(name, lo, j)
+            mdd = self.range_drawdown[name].query(lo, j)
+            out[name] = {
+                "return": float(ret),
+                "volatility": float(vol),
+                "sharpe": float(sharpe),
+                "max_drawdown": mdd,
+            }
+        return {
+            "start": str(self.dates[lo]),
+            "end": str(self.dates[hi]),
+            "series": out,
+        }
+
+    def rolling_payload(self, window: int, start=None, end=None):
+        """Dated rolling return / volatility / Sharpe and drawdown columns for one window."""
+        if window not in WINDOWS:
+            raise ValueError(f"window must be one of {', '.join(map(str, WINDOWS))}")
+        lo = 0 if start is None else int(np.searchsorted(self.dates, np.datetime64(start, "D"), side="left"))
+        hi = self.dates.size if end is None else int(np.searchsorted(self.dates, np.datetime64(end, "D"), side="right"))
+        series = {}
+        for name, cols in self.rolling.items():
+            series[name] = {
+                "return": _sanitize_list(cols[f"return_{window}d"][lo:hi].tolist()),
+                "volatility": _sanitize_list(cols[f"volatility_{window}d"][lo:hi].tolist()),
+                "sharpe": _sanitize_list(cols[f"sharpe_{window}d"][lo:hi].tolist()),
+                "drawdown": _sanitize_list(self.drawdown[name][lo:hi].tolist()),
+                "max_drawdown": _sanitize_list(self.max_drawdown[name][lo:hi].tolist()),
+            }
+        return {
+            "dates": np.datetime_as_string(self.dates[lo:hi], unit="D").tolist(),
+            "window": window,
+            "series_names": list(series),
+            "series": series,
+        }
+
+
+def _analytics_key(csv_path=None, until=None):
+    csv_path = csv_path or data_sources.location("fund-data")
+    return ("analytics", csv_path, until, data_version(), data_sources.generation(csv_path))
+
+
+@memoize(cache=FRAME_CACHE, key=_analytics_key)
+def build_analytics_table(csv_path: str | None = None, until: str | None = None):
+    """
+    Build (and cache with the source frame) the AnalyticsTable for a
+    fund-data style CSV: Date + four cumulative-return columns. Rows after
+    `until` (default: today) are projections and are left out. The default
+    CSV is the registered "fund-data" source.
+    """
+    df = _read_source(csv_path or data_sources.location("fund-data"))
+    if not validation.is_clean(df):
+        try:
+            df["Date"] = pd.to_datetime(df["Date"], format="%d-%b-%y", errors="coerce")
+        except Exception:
+            df["Date"] = pd.to_datetime(df["Date"], dayfirst=True, errors="coerce")
+    df = df.dropna(subset=["Date"]).sort_values("Date").reset_index(drop=True)
+
+    cutoff = pd.Timestamp(until or datetime.today().date())
+    df = df[df["Date"] <= cutoff]
+
+    cum_returns = {
+        name: df[col].map(_to_num).to_numpy(dtype=float)
+        for name, col in zip(SERIES_NAMES, df.columns[1:5])
+    }
+    return AnalyticsTable(df["Date"].to_numpy(), cum_returns)
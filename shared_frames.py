@@ -0,0 +1,321 @@
+"""
+Cross-process cache of source frames backed by memory-mapped .npy files.
+
+One refresher (`python shared_frames.py refresh`, or the process started by
+gunicorn.conf.py) reads every source sheet, writes each column as a .npy
+file under a new versioned directory and then atomically repoints CURRENT:
+
+    <root>/v000012/<source id>/meta.json, c0.npy, c1.npy, ...
+    <root>/CURRENT  ->  "v000012"
+
+The refresher publishes frames already run through validation.validate, so
+dates are datetime64 and the schema columns floats. Those columns are saved
+as raw arrays (dates as their int64 ticks) and workers attach them with
+np.load(mmap_mode="r") as read-only views: every worker shares the same
+physical pages and memory stays flat as workers are added. Only leftover
+text columns (e.g. a 'Hurdle Rate' column with bad cells) are stored as
+fixed-width strings and rebuilt per worker. `python bench_shared_frames.py`
+measures the resident memory per worker.
+
+Because readers always go through CURRENT, all workers switch to a new data
+version together.
+
+`watch` refetches every source each --interval seconds. `schedule` runs the
+data_sources RefreshScheduler instead (per-source intervals and priorities)
+and publishes whatever it refetched every --interval seconds, so each sheet
+is downloaded once per machine rather than once per worker; it also writes
+the sources' freshness to <root>/SCHEDULER for /api/data-sources.
+
+A superseded version is kept for GRACE_SECONDS so workers
+still reading it finish; `attach` retries against the new CURRENT if the
+version disappears mid-read. Enabled with SHARED_FRAMES=1; the root
+defaults to /dev/shm (RAM-backed) when available.
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+ENABLED = os.environ.get("SHARED_FRAMES", "0") == "1"
+ROOT = os.environ.get(
+    "SHARED_FRAMES_DIR",
+    os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(), "client_portal_frames"),
+)
+KEEP_VERSIONS = 2
+GRACE_SECONDS = float(os.environ.get("SHARED_FRAMES_GRACE", 600))   # lifetime of a superseded version
+ATTACH_RETRIES = 3
+
+# private_copy relies on copy-on-write: always on from pandas 3, opt-in on the
+# pinned 2.x, where it is switched on here for the whole process
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.options.mode.copy_on_write = True
+
+
+def source_id(source: str) -> str:
+    return hashlib.sha1(source.encode("utf-8")).hexdigest()[:16]
+
+
+def current_version(root: str = ROOT):
+    """Name of the active version directory, or None if nothing has been published."""
+    try:
+        with open(os.path.join(root, "CURRENT"), "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def private_copy(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Copy of df a caller may modify. Shallow: under copy-on-write a column is
+    copied on its first write, so untouched memory-mapped columns stay shared.
+    """
+    return df.copy(deep=False)
+
+
+# --- Writer side ---
+def write_frame(df: pd.DataFrame, path: str, report: dict | None = None):
+    """
+    Write df as one .npy file per column plus meta.json under a new directory
+    `path`. The validation flag of df and its `report` are kept in meta.json.
+    """
+    os.makedirs(path)
+    columns = []
+    for i, col in enumerate(df.columns):
+        values = df[col]
+        entry = {"name": str(col), "file": f"c{i}.npy"}
+        if values.dtype.kind in "biuf":
+            np.save(os.path.join(path, entry["file"]), values.to_numpy())
+        elif values.dtype.kind == "M":
+            # Naive datetimes as their int64 ticks; NaT is the minimum int64
+            array = values.to_numpy()
+            np.save(os.path.join(path, entry["file"]), array.view("int64"))
+            entry["dtype"] = str(array.dtype)
+        else:
+            # Strings are stored fixed-width; nulls are kept in a separate mask
+            mask = values.isna().to_numpy()
+            np.save(os.path.join(path, entry["file"]), values.fillna("").astype(str).to_numpy(dtype=str))
+            np.save(os.path.join(path, f"c{i}.mask.npy"), mask)
+            entry["mask"] = f"c{i}.mask.npy"
+        columns.append(entry)
+    meta = {"columns": columns, "rows": len(df), "validated": bool(df.attrs.get("validated")), "report": report}
+    with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+
+def publish(frames: dict, root: str = ROOT, reports: dict | None = None) -> str:
+    """
+    Write {source: DataFrame} as a new version and make it current.
+    Returns the new version name. Older versions beyond KEEP_VERSIONS are
+    removed once they have been superseded for GRACE_SECONDS (workers that
+    already mapped them keep their pages until they re-attach).
+    """
+    os.makedirs(root, exist_ok=True)
+    existing = sorted(d for d in os.listdir(root) if d.startswith("v"))
+    number = int(existing[-1][1:]) + 1 if existing else 1
+    version = f"v{number:06d}"
+
+    staging = os.path.join(root, f".staging-{version}-{os.getpid()}")
+    os.makedirs(staging)
+    for source, df in frames.items():
+        write_frame(df, os.path.join(staging, source_id(source)), (reports or {}).get(source))
+    os.rename(staging, os.path.join(root, version))
+
+    tmp = os.path.join(root, f".CURRENT-{os.getpid()}")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(tmp, os.path.join(root, "CURRENT"))
+
+    _remove_expired(root, existing[:-(KEEP_VERSIONS - 1) or None])
+    return version
+
+
+def _remove_expired(root, candidates):
+    """Remove the candidate versions whose successor was published more than GRACE_SECONDS ago."""
+    versions = sorted(d for d in os.listdir(root) if d.startswith("v"))
+    now = time.time()
+    for old in candidates:
+        successor = versions[versions.index(old) + 1]
+        try:
+            superseded_at = os.stat(os.path.join(root, successor)).st_mtime
+        except FileNotFoundError:
+            continue
+        if now - superseded_at >= GRACE_SECONDS:
+            shutil.rmtree(os.path.join(root, old), ignore_errors=True)
+
+
+# --- Reader side ---
+def attach(source: str, version: str | None = None, root: str = ROOT):
+    """
+    DataFrame for `source` from the given (default: current) version, with
+    numeric and date columns memory-mapped read-only; None if it is not
+    published. A current version removed while it is being read is retried
+    against the new CURRENT.
+    """
+    for _ in range(ATTACH_RETRIES):
+        name = version or current_version(root)
+        if name is None:
+            return None
+        try:
+            df = read_frame(os.path.join(root, name, source_id(source)))
+        except FileNotFoundError:
+            df = None
+        if df is not None or version is not None or current_version(root) == name:
+            return df
+    return None
+
+
+def report(source: str, version: str | None = None, root: str = ROOT):
+    """Validation report published with `source` (None if absent)."""
+    version = version or current_version(root)
+    if version is None:
+        return None
+    try:
+        with open(os.path.join(root, version, source_id(source), "meta.json"), "r", encoding="utf-8") as f:
+            return json.load(f).get("report")
+    except FileNotFoundError:
+        return None
+
+
+def read_frame(path: str):
+    """
+    DataFrame written by write_frame, with numeric and date columns
+    memory-mapped read-only (not copied); None if `path` holds no frame.
+    """
+    try:
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except FileNotFoundError:
+        return None
+
+    data = {}
+    for entry in meta["columns"]:
+        values = np.load(os.path.join(path, entry["file"]), mmap_mode="r")
+        if "dtype" in entry:
+            values = values.view(entry["dtype"])
+        elif "mask" in entry:
+            mask = np.load(os.path.join(path, entry["mask"]))
+            values = np.where(mask, np.nan, values.astype(object))
+        data[entry["name"]] = values
+    df = pd.DataFrame(data, copy=False)
+    df.attrs["validated"] = meta.get("validated", False)
+    return df
+
+
+# --- Refresher ---
+def all_sources():
+    """Every registered source location (see data_sources.py)."""
+    import data_sources
+    return data_sources.all_locations()
+
+
+def refresh(sources=None, root: str = ROOT):
+    """
+    Read and validate every source and publish them as one new version.
+    Sources that fail to load are skipped.
+    """
+    import data_sources
+    import validation
+
+    frames = {}
+    for source in sources or all_sources():
+        try:
+            registered = data_sources.by_location(source)
+            if registered is not None:
+                frames[source] = registered.fetch()
+            else:
+                frames[source] = validation.validate(pd.read_csv(source, skip_blank_lines=True), source)
+        except Exception as e:
+            print(f"⚠️ shared_frames: could not load {source}: {e}", file=sys.stderr)
+    version = publish(frames, root, {s: validation.REPORTS.get(s) for s in frames})
+    print(f"shared_frames: published {version} with {len(frames)} sources")
+    return version
+
+
+def refresh_forever(interval: float, stop: threading.Event | None = None):
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        try:
+            refresh()
+        except Exception as e:
+            print(f"⚠️ shared_frames refresh failed: {e}", file=sys.stderr)
+        stop.wait(interval)
+
+
+def _write_status(root, started):
+    """Freshness of the scheduler process's sources, read by `scheduler_status`."""
+    import data_sources
+    status = {"pid": os.getpid(), "started_at": started, "heartbeat": time.time(),
+              "sources": data_sources.freshness()}
+    tmp = os.path.join(root, f".SCHEDULER-{os.getpid()}")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(status, f)
+    os.replace(tmp, os.path.join(root, "SCHEDULER"))
+
+
+def schedule_forever(interval: float, stop: threading.Event | None = None, root: str = ROOT):
+    """
+    Run the data-source RefreshScheduler in this process and publish the
+    fetched frames every `interval` seconds when any of them was refetched.
+    """
+    import data_sources
+    import validation
+
+    stop = stop or threading.Event()
+    os.makedirs(root, exist_ok=True)
+    started = time.time()
+    scheduler = data_sources.start_scheduler()
+    published = {}
+    try:
+        while not stop.wait(interval):
+            try:
+                sources = {s.location: s for s in data_sources.registry().values() if s.frame is not None}
+                generations = {location: s.generation for location, s in sources.items()}
+                if generations != published:
+                    frames = {location: s.frame for location, s in sources.items()}
+                    version = publish(frames, root, {location: validation.REPORTS.get(location) for location in frames})
+                    published = generations
+                    print(f"shared_frames: published {version} with {len(frames)} sources")
+                _write_status(root, started)
+            except Exception as e:
+                print(f"⚠️ shared_frames schedule failed: {e}", file=sys.stderr)
+    finally:
+        scheduler.stop()
+
+
+def scheduler_status(root: str = ROOT, max_age: float = 120.0):
+    """Last status written by a `schedule` process, or None if none has reported within max_age seconds."""
+    try:
+        with open(os.path.join(root, "SCHEDULER"), "r", encoding="utf-8") as f:
+            status = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    return status if time.time() - status.get("heartbeat", 0) <= max_age else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("command", choices=["refresh", "watch", "schedule", "current"])
+    parser.add_argument("--interval", type=float, help="seconds between refreshes (watch, default "
+                        "SHARED_FRAMES_INTERVAL or 300) or publishes (schedule, default 10)")
+    args = parser.parse_args(argv)
+
+    if args.command == "refresh":
+        refresh()
+    elif args.command == "watch":
+        refresh_forever(args.interval or float(os.environ.get("SHARED_FRAMES_INTERVAL", 300)))
+    elif args.command == "schedule":
+        schedule_forever(args.interval or 10.0)
+    else:
+        print(current_version())
+
+
+if __name__ == "__main__":
+    main()
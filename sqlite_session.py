@@ -0,0 +1,147 @@
+"""
+Server-side Flask sessions in a single SQLite database.
+
+Opt-in (SESSION_TYPE=sqlite) alternative to flask_session's filesystem
+backend (one file per session plus a directory scan for cleanup): one
+WAL-mode database shared by all workers:
+
+  * sessions(sid PRIMARY KEY, data, expiry) with an index on expiry
+  * rows are written only when the session changed (or on refresh)
+  * expired rows are deleted in small batches every CLEANUP_EVERY writes,
+    using the expiry index, instead of scanning everything
+
+The cookie only carries the session id, signed with the app's SECRET_KEY.
+"""
+import os
+import secrets
+import sqlite3
+import threading
+import time
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from itsdangerous import BadSignature, Signer
+from werkzeug.datastructures import CallbackDict
+
+CLEANUP_EVERY = 200      # writes between cleanup passes
+CLEANUP_BATCH = 500      # expired rows deleted per pass
+
+
+class SqliteSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(self):
+            self.modified = True
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+
+
+class SqliteSessionInterface(SessionInterface):
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, path: str, cleanup_every: int = CLEANUP_EVERY):
+        self.path = path
+        self.cleanup_every = cleanup_every
+        self._local = threading.local()
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = sqlite3.connect(path)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " sid TEXT PRIMARY KEY, data TEXT NOT NULL, expiry REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_expiry ON sessions (expiry)")
+            conn.commit()
+        finally:
+            conn.close()
+
+    # --- storage ---
+    def _conn(self):
+        # One connection per thread (and per process: created lazily after fork)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _load(self, sid):
+        row = self._conn().execute(
+            "SELECT data FROM sessions WHERE sid = ? AND expiry > ?", (sid, time.time())
+        ).fetchone()
+        return self.serializer.loads(row[0]) if row else None
+
+    def _store(self, sid, data, expiry):
+        self._conn().execute(
+            "INSERT INTO sessions (sid, data, expiry) VALUES (?, ?, ?) "
+            "ON CONFLICT(sid) DO UPDATE SET data = excluded.data, expiry = excluded.expiry",
+            (sid, self.serializer.dumps(data), expiry),
+        )
+        with self._writes_lock:
+            self._writes += 1
+            due = self._writes % self.cleanup_every == 0
+        if due:
+            self.cleanup()
+
+    def _delete(self, sid):
+        self._conn().execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+
+    def cleanup(self, batch: int = CLEANUP_BATCH) -> int:
+        """Delete up to `batch` expired sessions; returns how many were removed."""
+        cur = self._conn().execute(
+            "DELETE FROM sessions WHERE sid IN "
+            "(SELECT sid FROM sessions WHERE expiry <= ? LIMIT ?)",
+            (time.time(), batch),
+        )
+        return cur.rowcount
+
+    # --- SessionInterface ---
+    def _signer(self, app):
+        return Signer(app.secret_key, salt="sqlite-session", key_derivation="hmac")
+
+    def open_session(self, app, request):
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if cookie:
+            try:
+                sid = self._signer(app).unsign(cookie).decode("utf-8")
+            except BadSignature:
+                sid = None
+            if sid:
+                data = self._load(sid)
+                if data is not None:
+                    return SqliteSession(data, sid=sid)
+        return SqliteSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if not session:
+            if session.modified and not session.new:
+                self._delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        refresh = session.permanent and app.config["SESSION_REFRESH_EACH_REQUEST"]
+        if not (session.modified or refresh):
+            return
+
+        expiry = time.time() + app.permanent_session_lifetime.total_seconds()
+        self._store(session.sid, dict(session), expiry)
+        response.set_cookie(
+            name,
+            self._signer(app).sign(session.sid.encode("utf-8")).decode("utf-8"),
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
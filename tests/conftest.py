@@ -0,0 +1,53 @@
+import os
+import sys
+
+# The modules live flat in the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Tests that import app must not create flask_session's filesystem store in the working tree
+os.environ["SESSION_TYPE"] = "cookie"
+
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def fund_sheet(days_before=400, days_after=60):
+    """Public-fund style sheet (Date + cumulative returns) around today, dates as '17-Oct-24'."""
+    today = pd.Timestamp.today().normalize()
+    dates = pd.date_range(today - pd.Timedelta(days=days_before), today + pd.Timedelta(days=days_after))
+    growth = np.linspace(0.0, 0.6, dates.size)
+    return pd.DataFrame({
+        "Date": [f"{d.day}-{d.strftime('%b-%y')}" for d in dates],
+        "Fund": growth,
+        "Firouzen": growth / 2,
+        "Gold": growth / 3,
+        "Dollar": growth / 4,
+    })
+
+
+@pytest.fixture
+def public_fund_source(tmp_path, monkeypatch):
+    """Registry holding only a local "public-fund" source; counts the reads of its file."""
+    import data_sources
+
+    path = str(tmp_path / "public-fund.csv")
+    fund_sheet().to_csv(path, index=False)
+    source = data_sources.DataSource("public-fund", path, priority=100)
+    stamp = (data_sources._mtime(data_sources.INVESTORS_JSON), data_sources._mtime(data_sources.OVERRIDES_JSON))
+    monkeypatch.setattr(data_sources, "_sources", {"public-fund": source})
+    monkeypatch.setattr(data_sources, "_by_location", {path: source})
+    monkeypatch.setattr(data_sources, "_stamp", stamp)
+
+    reads = []
+    read_csv = pd.read_csv
+
+    def counting_read_csv(location, *args, **kwargs):
+        if location == path:
+            reads.append(location)
+        return read_csv(location, *args, **kwargs)
+
+    monkeypatch.setattr(pd, "read_csv", counting_read_csv)
+    source.reads = reads
+    return source
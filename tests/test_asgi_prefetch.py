@@ -0,0 +1,50 @@
+"""The ASGI front end prefetches a public route's source and the handler reuses that frame."""
+import asyncio
+import json
+
+import asgi
+
+
+def _get(path):
+    async def run():
+        asgi._fetch_slots = asyncio.Semaphore(asgi.FETCH_CONCURRENCY)
+        sent = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {"type": "http", "method": "GET", "path": path, "query_string": b"",
+                 "http_version": "1.1", "headers": [], "scheme": "http"}
+        await asgi.application(scope, receive, send)
+        return sent
+
+    sent = asyncio.run(run())
+    status = next(m["status"] for m in sent if m["type"] == "http.response.start")
+    body = b"".join(m.get("body", b"") for m in sent if m["type"] == "http.response.body")
+    return status, json.loads(body)
+
+
+def test_public_metrics_handler_uses_prefetched_frame(public_fund_source, monkeypatch):
+    monkeypatch.setattr(asgi, "_fetch_slots", None)
+    monkeypatch.setattr(asgi, "_source_slots", {})
+    assert asgi.PUBLIC_ROUTES["/api/public-fund-metrics"] == ("public-fund",)
+
+    call_flask = asgi._call_flask
+    fresh_before_handler = []
+
+    async def checked_call_flask(environ, send):
+        fresh_before_handler.append(public_fund_source.fresh_frame() is not None)
+        await call_flask(environ, send)
+
+    monkeypatch.setattr(asgi, "_call_flask", checked_call_flask)
+
+    status, payload = _get("/api/public-fund-metrics")
+    assert status == 200
+    assert payload["ytd_return"] is not None
+    # Read once, by the prefetch: the handler found the source fresh
+    assert fresh_before_handler == [True]
+    assert len(public_fund_source.reads) == 1
+    assert public_fund_source.generation == 1
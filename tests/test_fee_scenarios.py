@@ -0,0 +1,135 @@
+"""The vectorized fee surface matches scalar contribution_fees calls; bad grids are rejected with 400."""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import analysis_functions as af
+import fee_scenarios
+import validation
+
+EMAIL = "investor@example.com"
+FEES = {"hurdle_rate": 0.4, "management_fee": 0.02, "performance_fee": 0.25}
+
+
+def _sheet(days_before=500, days_after=30):
+    """Contributions every 45 rows; some carry their own hurdle, one an unparseable cell, the rest are empty."""
+    today = pd.Timestamp(datetime.now().date())
+    dates = pd.date_range(today - pd.Timedelta(days=days_before), today + pd.Timedelta(days=days_after))
+    rng = np.random.default_rng(9)
+    ret = np.cumprod(1 + rng.normal(0.0009, 0.006, dates.size)) - 1
+    contribution = np.zeros(dates.size)
+    contribution[::45] = rng.integers(1, 10, contribution[::45].size) * 2500.0
+    hurdle = np.full(dates.size, np.nan, dtype=object)
+    hurdle[90] = 0.15
+    hurdle[225] = 0.8
+    hurdle[315] = "n/a"
+    asset = np.cumsum(contribution) * (1 + ret)
+    asset[dates > today] = np.nan
+    return validation.validate(pd.DataFrame({
+        "Date": [d.strftime("%d-%b-%y") for d in dates],
+        "Ret": ret,
+        "Historical Asset Value": asset,
+        "Contribution": contribution,
+        "Hurdle Rate": hurdle,
+    }))
+
+
+@pytest.fixture
+def sheet(monkeypatch):
+    df = _sheet()
+    investor = af.Investor(EMAIL, {"fees": FEES})
+    monkeypatch.setattr(fee_scenarios, "_load_investor", lambda email: investor)
+    monkeypatch.setattr(fee_scenarios, "_load_csv", lambda email, year=None: df.copy())
+    return df
+
+
+def _scalar_fees(df, mg, hurdle, pf):
+    """
+    Total (management, performance) fees of one schedule, one contribution at a
+    time, with the sheet's per-row hurdle rule: a cell that converts with float()
+    is the contribution's hurdle (an empty cell is NaN, so no performance fee);
+    otherwise the schedule's hurdle applies.
+    """
+    today_row = af._valuation_row(df, pd.Timestamp(datetime.now().date()))
+    today, ret_today = today_row["Date"], today_row["Ret"]
+    total_mgmt = total_perf = 0.0
+    for _, row in df.loc[:today_row.name].iterrows():
+        if row["Contribution"] == 0:
+            continue
+        try:
+            h = float(row["Hurdle Rate"])
+        except ValueError:
+            h = hurdle
+        R = (1 + ret_today) / (1 + row["Ret"]) - 1
+        days = (today - row["Date"]).days
+        mgmt, perf = af.contribution_fees(row["Contribution"], R, days, mg, h, pf)
+        total_mgmt += float(mgmt)
+        total_perf += float(perf)
+    return total_mgmt, total_perf, float(today_row["Historical Asset Value"])
+
+
+def test_surface_matches_scalar_fees(sheet):
+    grid = {
+        "management_fees": fee_scenarios.parse_axis("management_fee", "0,0.01,0.025"),
+        "hurdles": fee_scenarios.parse_axis("hurdle", "0:0.6:0.2"),
+        "performance_fees": fee_scenarios.parse_axis("performance_fee", "0.1,0.25,0.3"),
+    }
+    out = fee_scenarios.fee_scenarios(EMAIL, **grid)
+    assert out["shape"] == [3, 4, 3]
+
+    for i, j, k in [(0, 0, 0), (1, 2, 1), (2, 3, 2), (2, 0, 1), (0, 3, 2)]:
+        mg = grid["management_fees"][i]
+        hu = grid["hurdles"][j]
+        pf = grid["performance_fees"][k]
+        mgmt, perf, asset = _scalar_fees(sheet, mg, hu, pf)
+        assert out["management_fees"][i][j][k] == pytest.approx(mgmt, rel=1e-12)
+        assert out["performance_fees"][i][j][k] == pytest.approx(perf, rel=1e-12)
+        assert out["nav"][i][j][k] == pytest.approx(asset - mgmt - perf, rel=1e-12)
+
+
+def test_current_schedule_matches_performance_metrics(sheet):
+    out = fee_scenarios.fee_scenarios(EMAIL)
+    metrics = af.performance_metrics(EMAIL, incremental=False, frame=sheet, config={EMAIL: {"fees": FEES}})
+    assert out["current"]["nav"] == pytest.approx(metrics["portfolio_value_nav"], rel=1e-12)
+    assert out["current"]["total_fees"] == pytest.approx(metrics["total_fees"], rel=1e-12)
+
+
+@pytest.fixture
+def client(sheet):
+    import app as app_module
+
+    app_module.app.config["TESTING"] = True
+    client = app_module.app.test_client()
+    with client.session_transaction() as sess:
+        sess["user"] = {"email": EMAIL}
+    return client
+
+
+@pytest.mark.parametrize("query", [
+    {"mgmt": "abc"},
+    {"mgmt": "0:0.03:0"},
+    {"mgmt": "0,1.5"},
+    {"hurdle": "-0.1,0.2"},
+    {"perf": "0:1:0.001"},
+    {"perf": "nan"},
+    {"mgmt": ",,"},
+    {"mgmt": "0:0.99:0.01", "hurdle": "0:9.9:0.1", "perf": "0:0.2:0.1"},     # too many scenarios
+])
+def test_bad_grid_is_400(client, query):
+    resp = client.get("/api/fee-scenarios", query_string={"year": "2025", **query})
+    assert resp.status_code == 400
+    assert "error" in resp.get_json()
+
+
+def test_valid_grid_is_200(client):
+    resp = client.get("/api/fee-scenarios", query_string={"year": "2025", "mgmt": "0.01,0.02"})
+    assert resp.status_code == 200
+    assert resp.get_json()["shape"][0] == 2
+
+
+def test_unauthenticated_is_401():
+    import app as app_module
+
+    assert app_module.app.test_client().get("/api/fee-scenarios").status_code == 401
@@ -0,0 +1,56 @@
+"""simulate_fee_outcomes is reproducible per seed and the pooled path returns the serial result."""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import analysis_functions as af
+import fee_simulation
+import validation
+
+EMAIL = "investor@example.com"
+
+
+def _sheet(days_before=400, days_after=30):
+    today = pd.Timestamp(datetime.now().date())
+    dates = pd.date_range(today - pd.Timedelta(days=days_before), today + pd.Timedelta(days=days_after))
+    rng = np.random.default_rng(3)
+    ret = np.cumprod(1 + rng.normal(0.0006, 0.005, dates.size)) - 1
+    contribution = np.zeros(dates.size)
+    contribution[::40] = 5000.0
+    asset = np.cumsum(contribution) * (1 + ret)
+    return validation.validate(pd.DataFrame({
+        "Date": [d.strftime("%d-%b-%y") for d in dates],
+        "Ret": ret,
+        "Historical Asset Value": asset,
+        "Contribution": contribution,
+    }))
+
+
+@pytest.fixture(autouse=True)
+def investor(monkeypatch):
+    sheet = _sheet()
+    investor = af.Investor(EMAIL, {"fees": {"hurdle_rate": 0.4, "management_fee": 0.02, "performance_fee": 0.25}})
+    monkeypatch.setattr(fee_simulation, "_load_investor", lambda email: investor)
+    monkeypatch.setattr(fee_simulation, "_load_csv", lambda email, year=None: sheet.copy())
+
+
+def test_same_seed_same_result():
+    first = fee_simulation.simulate_fee_outcomes(EMAIL, n_paths=2500, seed=11, workers=1)
+    assert fee_simulation.simulate_fee_outcomes(EMAIL, n_paths=2500, seed=11, workers=1) == first
+    assert fee_simulation.simulate_fee_outcomes(EMAIL, n_paths=2500, seed=12, workers=1) != first
+
+
+def test_pooled_equals_serial(monkeypatch):
+    monkeypatch.setattr(fee_simulation, "POOL_MIN_CELLS", 0)
+    monkeypatch.setattr(fee_simulation, "SIM_WORKERS", 2)
+    monkeypatch.setattr(fee_simulation, "_POOL", None)
+    try:
+        pooled = fee_simulation.simulate_fee_outcomes(EMAIL, n_paths=3500, seed=5, workers=2)
+        pool = fee_simulation._POOL
+        assert pool is not None and pool._mp_context.get_start_method() == "spawn"
+    finally:
+        if fee_simulation._POOL is not None:
+            fee_simulation._POOL.shutdown()
+    assert pooled == fee_simulation.simulate_fee_outcomes(EMAIL, n_paths=3500, seed=5, workers=1)
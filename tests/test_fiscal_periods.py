@@ -0,0 +1,48 @@
+"""Fiscal periods and the year the portal shows when none is requested."""
+from datetime import date
+
+import fiscal_periods
+
+INVESTOR = {
+    "Fiscal_year_start": "2024-10-16",
+    "join_date": "2024-10-16",
+    "link": "https://example.com/general",
+    "2024-Link": "https://example.com/2024",
+    "2025-Link": "https://example.com/2025",
+}
+
+
+class _Today(date):
+    @classmethod
+    def today(cls):
+        return cls(2026, 10, 19)
+
+
+def test_periods():
+    periods = fiscal_periods.fiscal_periods(INVESTOR, date(2026, 10, 19))
+    assert [(p.year, p.start.isoformat(), p.end.isoformat(), p.closed) for p in periods] == [
+        ("2024", "2024-10-16", "2025-10-15", True),
+        ("2025", "2025-10-16", "2026-10-15", True),
+        ("2026", "2026-10-16", "2026-10-19", False),
+    ]
+
+
+def test_default_year_is_latest_linked_year():
+    # No 2026-Link yet: the 2025 sheet, not the general link
+    assert fiscal_periods.default_year(INVESTOR, date(2026, 10, 19)) == "2025"
+    assert fiscal_periods.default_year(INVESTOR, date(2025, 3, 1)) == "2024"
+    assert fiscal_periods.default_year({**INVESTOR, "2026-Link": "x"}, date(2026, 10, 19)) == "2026"
+
+
+def test_default_year_without_year_links():
+    investor = {k: v for k, v in INVESTOR.items() if not k.endswith("-Link")}
+    assert fiscal_periods.default_year(investor, date(2026, 10, 19)) == "2026"
+    assert fiscal_periods.default_year({}, date(2026, 10, 19)) is None
+
+
+def test_portal_default_year(monkeypatch):
+    import app
+    monkeypatch.setattr(app, "_investor_config", lambda email: INVESTOR)
+    monkeypatch.setattr(fiscal_periods, "date", _Today)
+    assert app._resolve_year("investor@example.com") == "2025"
+    assert app._resolve_year("investor@example.com", " 2024 ") == "2024"
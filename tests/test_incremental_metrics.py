@@ -0,0 +1,164 @@
+"""
+performance_metrics(incremental=True) must match a full rebuild whatever happened to the sheet:
+exactly for fees and NAV, to within rounding for the warm-started IRR and the merged volatility.
+"""
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import analysis_functions as af
+import validation
+
+EMAIL = "investor@example.com"
+
+
+def _config(hurdle=0.5, mgmt=0.02, perf=0.25):
+    return {EMAIL: {"name": "Test", "fees": {"hurdle_rate": hurdle, "management_fee": mgmt,
+                                             "performance_fee": perf}}}
+
+
+def _sheet(days_before=300, days_after=40, seed=7):
+    """Investor sheet ending `days_after` days past today, contributions every 25 rows."""
+    today = pd.Timestamp(datetime.now().date())
+    dates = pd.date_range(today - pd.Timedelta(days=days_before), today + pd.Timedelta(days=days_after))
+    rng = np.random.default_rng(seed)
+    ret = np.cumprod(1 + rng.normal(0.0008, 0.004, dates.size)) - 1
+    contribution = np.zeros(dates.size)
+    contribution[::25] = rng.integers(1, 20, contribution[::25].size) * 1000.0
+    hurdle = np.full(dates.size, np.nan)
+    hurdle[::50] = 0.35
+    asset = np.cumsum(contribution) * (1 + ret)
+    asset[dates > today] = np.nan
+    return pd.DataFrame({
+        "Date": [d.strftime("%d-%b-%y") for d in dates],
+        "Ret": ret,
+        "Historical Asset Value": asset,
+        "Contribution": contribution,
+        "Hurdle Rate": hurdle,
+    })
+
+
+def _same(a, b):
+    """Metrics dicts equal, IRR and volatility to within floating-point rounding."""
+    rounded = ("irr", "ret_volatility")
+    assert {k: v for k, v in a.items() if k not in rounded + ("cashflow_chart",)} == \
+        {k: v for k, v in b.items() if k not in rounded + ("cashflow_chart",)}
+    for key in rounded:
+        assert a[key] == pytest.approx(b[key], rel=1e-12, abs=1e-14)
+    chart_a, chart_b = dict(a["cashflow_chart"]), dict(b["cashflow_chart"])
+    assert chart_a.pop("xirr") == pytest.approx(chart_b.pop("xirr"), rel=1e-12, abs=1e-14)
+    assert chart_a == chart_b
+    return True
+
+
+def _metrics(df, incremental, config=None):
+    frame = validation.validate(df.copy())
+    return af.performance_metrics(EMAIL, incremental=incremental, frame=frame, config=config or _config())
+
+
+@pytest.fixture(autouse=True)
+def _fresh_states():
+    af._NAV_STATES.clear()
+    yield
+    af._NAV_STATES.clear()
+
+
+def test_appended_rows():
+    sheet = _sheet()
+    for rows in (150, 151, 220, 290, len(sheet)):
+        df = sheet.iloc[:rows]
+        assert _same(_metrics(df, True), _metrics(df, False))
+    assert af._NAV_STATES[(EMAIL, None)].pos == 300
+
+
+def test_edited_middle_rows():
+    sheet = _sheet()
+    _metrics(sheet.iloc[:250], True)
+
+    edited = sheet.copy()
+    edited.loc[100, "Contribution"] += 5000.0      # a contribution already in the ledger
+    assert _same(_metrics(edited, True), _metrics(edited, False))
+
+    edited.loc[50, "Hurdle Rate"] = 0.1            # a consumed per-row hurdle
+    assert _same(_metrics(edited, True), _metrics(edited, False))
+
+    edited.loc[10, "Ret"] += 0.01                  # a return used by a contribution's fees
+    assert _same(_metrics(edited, True), _metrics(edited, False))
+
+    edited.loc[40, "Contribution"] = 2500.0        # a new contribution between consumed rows
+    assert _same(_metrics(edited, True), _metrics(edited, False))
+
+
+def test_changed_fee_parameters():
+    sheet = _sheet()
+    _metrics(sheet.iloc[:200], True)
+    for config in (_config(mgmt=0.01), _config(hurdle=0.3), _config(perf=0.2)):
+        assert _same(_metrics(sheet, True, config), _metrics(sheet, False, config))
+
+
+def test_concurrent_advances():
+    sheet = _sheet()
+    _metrics(sheet.iloc[:100], True)
+    expected = _metrics(sheet, False)
+    results, errors = [], []
+
+    def worker():
+        try:
+            results.append(_metrics(sheet, True))
+        except Exception as e:      # pragma: no cover - reported below
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert all(_same(r, expected) for r in results)
+    assert len(af._NAV_STATES[(EMAIL, None)].ledger) == int((sheet.iloc[:301]["Contribution"] != 0).sum())
+
+
+def test_volatility_matches_full_history():
+    sheet = _sheet()
+    for rows in (120, 121, 260, len(sheet)):
+        _metrics(sheet.iloc[:rows], True)
+        state = af._NAV_STATES[(EMAIL, None)]
+        frame = validation.validate(sheet.iloc[:rows].copy())
+        expected = af._annualized_volatility(frame["Ret"].iloc[:state.pos + 1])
+        assert state.volatility() == pytest.approx(expected, rel=1e-12)
+
+
+def test_xirr_warm_start_within_tolerance():
+    today = pd.Timestamp(datetime.now().date())
+    dates = [today - pd.Timedelta(days=d) for d in (700, 400, 90, 0)]
+    flows = [-10000.0, -5000.0, -2500.0, 21000.0]
+    cold = af.xirr(flows, dates)
+    for guess in (cold, cold + 0.05, -0.2, 0.9):
+        assert af.xirr(flows, dates, guess=guess) == pytest.approx(cold, rel=1e-12, abs=1e-14)
+
+
+def test_consumed_rows_rehashed_only_for_new_data(monkeypatch):
+    sheet = validation.validate(_sheet())
+    sys_today = pd.Timestamp(datetime.now().date())
+    state = af.NavState.from_frame(sheet.iloc[:150], 0.5, 0.02, 0.25, sys_today)
+    state.data_key = ("sheet", None, 1)
+
+    hashed = []
+    digest = af.NavState._digest
+    monkeypatch.setattr(af.NavState, "_digest", staticmethod(
+        lambda df, start, stop: hashed.append((start, stop)) or digest(df, start, stop)))
+
+    # Same data key: only the appended rows are hashed
+    assert state.advance(sheet.iloc[:200], sys_today, ("sheet", None, 1))
+    assert hashed == [(150, 199)]
+    assert state.digest == digest(sheet, 0, 199)
+
+    # New data key: the consumed rows are checked, and an edit among them is caught
+    hashed.clear()
+    edited = sheet.copy()
+    edited.loc[30, "Contribution"] += 1000.0
+    assert not state.advance(edited.iloc[:220], sys_today, ("sheet", None, 2))
+    assert hashed == [(0, 199)]
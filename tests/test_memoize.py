@@ -0,0 +1,49 @@
+"""Memoized analysis results are handed out as deep copies: a caller's edits never reach the cache."""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import analysis_functions as af
+
+EMAIL = "investor@example.com"
+
+
+def test_rebased_indices_nested_lists_not_shared(public_fund_source):
+    path = public_fund_source.location
+    first = af.compute_rebased_indices(path, "2020-01-01", "2100-01-01")
+    expected = first["series"]["Fund (Before Fee)"][:]
+    first["series"]["Fund (Before Fee)"].clear()
+    first["series_matrix"][0].append(1.0)
+    first["dates"].pop()
+
+    again = af.compute_rebased_indices(path, "2020-01-01", "2100-01-01")
+    assert again["series"]["Fund (Before Fee)"] == expected
+    assert again["series_matrix"][0] == expected
+    assert len(again["dates"]) == len(expected)
+
+
+def test_performance_metrics_chart_not_shared(tmp_path, monkeypatch):
+    today = pd.Timestamp(datetime.now().date())
+    dates = pd.date_range(today - pd.Timedelta(days=200), today + pd.Timedelta(days=20))
+    ret = np.linspace(0.0, 0.3, dates.size)
+    contribution = np.where(np.arange(dates.size) % 50 == 0, 1000.0, 0.0)
+    path = str(tmp_path / "investor.csv")
+    pd.DataFrame({
+        "Date": [d.strftime("%d-%b-%y") for d in dates],
+        "Ret": ret,
+        "Historical Asset Value": np.cumsum(contribution) * (1 + ret),
+        "Contribution": contribution,
+    }).to_csv(path, index=False)
+    config = {EMAIL: {"fees": {"hurdle_rate": 0.2, "management_fee": 0.02, "performance_fee": 0.25}}}
+    monkeypatch.setattr(af, "_load_config", lambda: config)
+    monkeypatch.setattr(af, "_source_for", lambda email, year=None: path)
+
+    first = af.performance_metrics(EMAIL, year="memo-test")
+    contributions = [dict(c) for c in first["cashflow_chart"]["contributions"]]
+    first["cashflow_chart"]["contributions"].clear()
+    first["cashflow_chart"]["terminal"]["investor_share"] = 0.0
+
+    again = af.performance_metrics(EMAIL, year="memo-test")
+    assert again["cashflow_chart"]["contributions"] == contributions
+    assert again["cashflow_chart"]["terminal"]["investor_share"] == again["portfolio_value_nav"]
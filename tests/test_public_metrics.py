@@ -0,0 +1,30 @@
+"""performance_metric_public reads the registered public-fund source instead of its own read_csv."""
+import numpy as np
+import pandas as pd
+
+import analysis_functions as af
+
+
+def _expected(path):
+    """The former per-request computation, straight from the file."""
+    df = pd.read_csv(path)
+    df["Date"] = pd.to_datetime(df["Date"], format="%d-%b-%y")
+    today = pd.Timestamp(pd.Timestamp.today().date())
+    hist, fut = df[df["Date"] <= today], df[df["Date"] > today]
+    ret_current = hist["Fund"].iloc[-1]
+    ytd = ((1 + ret_current) / (1 + hist["Fund"].iloc[0])) ** (365 / (today - hist["Date"].iloc[0]).days) - 1
+    locked = ((1 + fut["Fund"].iloc[-1]) / (1 + ret_current)) ** (365 / (fut["Date"].iloc[-1] - today).days) - 1
+    return ytd, locked
+
+
+def test_public_metrics_use_the_source_frame(public_fund_source):
+    ytd, locked = _expected(public_fund_source.location)
+    public_fund_source.reads.clear()
+
+    for _ in range(3):
+        metrics = af.performance_metric_public()
+        assert np.isclose(metrics["ytd_return"], ytd, rtol=1e-12)
+        assert np.isclose(metrics["locked_in_return"], locked, rtol=1e-12)
+    # One fetch through the registry, then served from its fresh frame / the frame cache
+    assert len(public_fund_source.reads) == 1
+    assert public_fund_source.generation == 1
@@ -0,0 +1,53 @@
+"""/api/public-fund-series serves compute_rebased_indices, and the built series outlives frame-cache expiry."""
+import json
+
+import pandas as pd
+import pytest
+
+import analysis_functions as af
+import public_series
+
+
+@pytest.fixture
+def client(public_fund_source):
+    import app as app_module
+
+    af.FRAME_CACHE.clear()
+    public_series.SERIES_CACHE.clear()
+    app_module.app.config["TESTING"] = True
+    return app_module.app.test_client()
+
+
+def test_served_series_matches_compute_rebased_indices(client, public_fund_source):
+    today = pd.Timestamp.today().strftime("%Y-%m-%d")
+    month_ago = (pd.Timestamp.today() - pd.Timedelta(days=30)).strftime("%Y-%m-%d")
+    windows = [
+        ({}, (public_series.DEFAULT_START, today)),
+        ({"start": month_ago}, (month_ago, today)),
+        ({"start": month_ago, "end": month_ago}, (month_ago, month_ago)),
+        ({"start": "1990-01-01", "end": "1990-12-31"}, ("1990-01-01", "1990-12-31")),
+    ]
+    for query, (start, end) in windows:
+        resp = client.get("/api/public-fund-series", query_string=query)
+        assert resp.status_code == 200
+        expected = af.compute_rebased_indices(public_fund_source.location, start, end)
+        assert resp.get_json() == json.loads(json.dumps(expected))
+
+
+def test_series_survives_unchanged_refetch(client, public_fund_source):
+    built = public_series.build_public_series()
+
+    # Frame cache expired and the source refetched with the same data: same series object
+    af.FRAME_CACHE.clear()
+    public_fund_source.fetched_at -= public_fund_source.refresh_interval
+    assert public_series.build_public_series() is built
+    assert public_fund_source.generation == 1
+
+    # New data: rebuilt
+    sheet = pd.read_csv(public_fund_source.location)
+    sheet["Fund"] = sheet["Fund"] * 2
+    sheet.to_csv(public_fund_source.location, index=False)
+    af.FRAME_CACHE.clear()
+    public_fund_source.fetched_at -= public_fund_source.refresh_interval
+    assert public_series.build_public_series() is not built
+    assert public_fund_source.generation == 2
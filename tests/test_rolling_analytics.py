@@ -0,0 +1,41 @@
+"""AnalyticsTable.window on windows inside and outside the table's dates."""
+import numpy as np
+import pytest
+
+from rolling_analytics import AnalyticsTable
+
+
+@pytest.fixture
+def table():
+    dates = np.arange("2025-01-01", "2025-03-01", dtype="datetime64[D]")
+    cum = np.linspace(0.0, 0.2, dates.size)
+    return AnalyticsTable(dates, {"Fund": cum, "Gold Index": cum / 2})
+
+
+def test_window_inside(table):
+    out = table.window("2025-01-10", "2025-02-10")
+    assert (out["start"], out["end"]) == ("2025-01-10", "2025-02-10")
+    assert out["series"]["Fund"]["return"] > 0
+
+
+@pytest.mark.parametrize("start, end", [
+    ("2030-01-01", None),             # after the last date
+    (None, "2020-01-01"),             # before the first date
+    ("2025-02-10", "2025-01-10"),     # start after end
+])
+def test_empty_window(table, start, end):
+    assert table.window(start, end) == {"start": None, "end": None,
+                                        "series": {"Fund": None, "Gold Index": None}}
+
+
+def test_window_drawdown_matches_scan():
+    rng = np.random.default_rng(4)
+    dates = np.arange("2020-01-01", "2021-06-01", dtype="datetime64[D]")
+    cum = np.cumprod(1 + rng.normal(0.0, 0.02, dates.size)) - 1
+    cum[-20:] = np.nan
+    table = AnalyticsTable(dates, {"Fund": cum})
+    last = dates.size - 21
+    for lo, hi in [(0, dates.size - 1), (3, 4), (10, 11), (5, 68), (100, 356), (200, 200 + 255), (37, 470)]:
+        out = table.window(dates[lo], dates[hi])["series"]["Fund"]
+        wealth = np.exp(table.s1["Fund"][lo + 1:min(hi, last) + 2])
+        assert out["max_drawdown"] == float(np.min(wealth / np.maximum.accumulate(wealth) - 1.0))
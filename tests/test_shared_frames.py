@@ -0,0 +1,23 @@
+"""private_copy of an attached frame shares its memory-mapped columns until a column is written."""
+import numpy as np
+import pandas as pd
+
+import shared_frames
+
+
+def test_private_copy_shares_until_written(tmp_path):
+    source = "sheet.csv"
+    frame = pd.DataFrame({"Date": pd.date_range("2025-01-01", periods=4),
+                          "Ret": [0.0, 0.01, 0.02, 0.03], "Contribution": [100.0, 0.0, 0.0, 0.0]})
+    shared_frames.publish({source: frame}, root=str(tmp_path))
+
+    attached = shared_frames.attach(source, root=str(tmp_path))
+    df = shared_frames.private_copy(attached)
+    assert np.shares_memory(df["Ret"].to_numpy(), attached["Ret"].to_numpy())
+    assert np.shares_memory(df["Date"].to_numpy(), attached["Date"].to_numpy())
+
+    df["Ret"] = df["Ret"] * 2
+    df.loc[0, "Contribution"] = 0.0
+    assert attached["Ret"].tolist() == [0.0, 0.01, 0.02, 0.03]
+    assert attached.loc[0, "Contribution"] == 100.0
+    assert np.shares_memory(df["Date"].to_numpy(), attached["Date"].to_numpy())
@@ -0,0 +1,40 @@
+"""validate marks a frame clean only when its dates parse and no error issue was reported."""
+import pandas as pd
+
+import validation
+
+
+def _sheet(dates):
+    n = len(dates)
+    return pd.DataFrame({"Date": dates, "Ret": [0.01 * i for i in range(n)],
+                         "Historical Asset Value": [1000.0] * n, "Contribution": [0.0] * n})
+
+
+def _errors(source):
+    return {i["check"] for i in validation.REPORTS[source]["issues"] if i["severity"] == "error"}
+
+
+def test_clean_sheet():
+    df = validation.validate(_sheet(["1-Jan-25", "2-Jan-25", "3-Jan-25"]), "clean")
+    assert validation.is_clean(df)
+    assert validation.REPORTS["clean"]["clean"] and validation.REPORTS["clean"]["ok"]
+
+
+def test_errors_leave_frame_unvalidated():
+    cases = {
+        "order": _sheet(["2-Jan-25", "1-Jan-25", "3-Jan-25"]),
+        "duplicates": _sheet(["1-Jan-25", "1-Jan-25", "2-Jan-25"]),
+        "schema": _sheet(["1-Jan-25", "2-Jan-25", "3-Jan-25"]).drop(columns="Contribution"),
+    }
+    for check, raw in cases.items():
+        df = validation.validate(raw, check)
+        assert check in _errors(check)
+        assert not validation.is_clean(df)
+        assert validation.REPORTS[check]["clean"] is False
+        assert validation.summary(check)["ok"] is False
+
+
+def test_warnings_keep_frame_clean():
+    df = validation.validate(_sheet(["1-Jan-25", "20-Jan-25", "21-Jan-25"]), "gaps")
+    assert not _errors("gaps")
+    assert validation.is_clean(df)
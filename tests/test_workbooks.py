@@ -0,0 +1,96 @@
+"""Workbook extraction into the CSV schemas, and the extract cache keyed by the workbook bytes."""
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+openpyxl = pytest.importorskip("openpyxl")
+
+import data_sources
+import workbooks
+
+
+def _workbook(path, rows, header=("Date", "Ret", "Historical Asset Value", "Contribution", "Hurdle Rate")):
+    wb = openpyxl.Workbook()
+    invoice = wb.active
+    invoice.title = "Invoice"
+    invoice.append(["Item", "Amount"])
+    invoice.append(["Fee", 120])
+    sheet = wb.create_sheet("Performance")
+    sheet.append(list(header))
+    for row in rows:
+        sheet.append(list(row))
+    wb.save(path)
+    return path
+
+
+ROWS = [
+    (datetime(2025, 1, 1), 0.0, 1000.0, 1000.0, None),
+    (None, None, None, None, None),                         # blank row
+    (datetime(2025, 1, 2), 0.01, 1010.0, 0, 0.3),
+    ("3-Jan-25", "0.02", 1020.0, 0, "n/a"),
+]
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(workbooks, "CACHE_DIR", str(tmp_path / "cache"))
+
+
+def test_investor_sheet_is_normalized(tmp_path):
+    df, info = workbooks.load(_workbook(str(tmp_path / "a.xlsm"), ROWS))
+    assert (info["sheet"], info["kind"], info["rows"], info["cached"]) == ("Performance", "investor", 3, False)
+    assert list(df.columns) == workbooks.INVESTOR_COLUMNS + ["Hurdle Rate"]
+    assert df["Date"].tolist() == ["1-Jan-25", "2-Jan-25", "3-Jan-25"]
+    assert df["Ret"].tolist() == [0.0, 0.01, 0.02]
+    assert df["Gold Historical"].isna().all()                 # missing columns are NaN
+    assert np.isnan(df["Hurdle Rate"].iloc[0]) and df["Hurdle Rate"].iloc[1] == 0.3 and np.isnan(df["Hurdle Rate"].iloc[2])
+
+
+def test_fund_sheet_with_alias(tmp_path):
+    path = _workbook(str(tmp_path / "fund.xlsx"), [(datetime(2025, 3, 4), 0.1, 0.2, 0.3, 0.4)],
+                     header=("Date", "Fund Ret", "Firouzen", "Gold", "Dollar"))
+    df, info = workbooks.load(path)
+    assert info["kind"] == "fund"
+    assert df.to_dict("list") == {"Date": ["4-Mar-25"], "Fund": [0.1], "Firouzen": [0.2], "Gold": [0.3], "Dollar": [0.4]}
+
+
+def test_sheet_without_known_header(tmp_path):
+    path = _workbook(str(tmp_path / "other.xlsm"), [(1, 2)], header=("Name", "Amount"))
+    report, = workbooks.ingest([path])
+    assert "No sheet with an investor or fund header" in report["error"]
+
+
+def test_cache_reuses_unchanged_bytes(tmp_path, monkeypatch):
+    path = _workbook(str(tmp_path / "a.xlsm"), ROWS)
+    first, _ = workbooks.load(path)
+
+    extracted = []
+    extract = workbooks._extract
+    monkeypatch.setattr(workbooks, "_extract", lambda source: extracted.append(source) or extract(source))
+
+    again, info = workbooks.load(path)
+    assert info["cached"] and not extracted
+    assert again.equals(first)
+
+    _workbook(path, ROWS[:1])                                 # new bytes at the same path
+    changed, info = workbooks.load(path)
+    assert not info["cached"] and len(extracted) == 1 and len(changed) == 1
+
+    _, info = workbooks.load(path, force=True)
+    assert not info["cached"] and len(extracted) == 2
+
+
+def test_read_hands_out_a_private_copy(tmp_path):
+    path = _workbook(str(tmp_path / "a.xlsm"), ROWS)
+    workbooks.load(path)
+    df = workbooks.read(path)
+    df["Ret"] = df["Ret"] * 100
+    assert workbooks.read(path)["Ret"].tolist() == [0.0, 0.01, 0.02]
+
+
+def test_data_sources_read_workbooks(tmp_path):
+    path = _workbook(str(tmp_path / "a.xlsm"), ROWS)
+    source = data_sources.DataSource("investor:a@x.com", path)
+    assert source.format == "xlsm"
+    assert source.fetch()["Ret"].tolist() == [0.0, 0.01, 0.02]
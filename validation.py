@@ -0,0 +1,262 @@
+"""
+Validation pre-pass run once when a source is (re)read, instead of on every request.
+
+    python validation.py                 # fetch and validate every registered source
+    python validation.py static/A_Salim.csv --json
+
+`validate` checks a freshly read frame and returns a normalized copy:
+
+  * schema     investor sheets need Date, Ret, Historical Asset Value and
+               Contribution; fund sheets Date and Fund
+  * dates      parsed once ('17-Oct-24', else day-first)
+  * numbers    schema columns stored as text ('1,234', '12%', stray words)
+               are coerced like _to_num; cells that are not numbers become
+               NaN (a bad 'Historical Asset Value' on today's row then falls
+               back to the previous valid row). 'Hurdle Rate' is only coerced
+               when every cell parses, so bad cells keep falling back to the
+               investor's hurdle
+  * order      dates must increase; duplicates, gaps longer than GAP_DAYS
+               and outlier daily moves of the cumulative return are reported
+
+Blank rows are dropped. A frame whose dates parsed and that has no
+error-level issue (schema, unparseable dates, order, duplicates) is marked
+with attrs["validated"] (kept by pandas through copies and slices) so the
+request path skips its date parsing; any other frame keeps the readers'
+fallbacks. See `is_clean`. The last report of every source is kept in REPORTS
+and served by /api/data-quality.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from shared_frames import private_copy
+
+INVESTOR_COLUMNS = [
+    "Date", "Ret", "Bourse Historical Ret", "Gold Historical", "Dollar Historical",
+    "Historical Ret", "Historical Yearly Ret", "Historical Asset Value", "Contribution",
+]
+FUND_COLUMNS = ["Date", "Fund", "Firouzen", "Gold", "Dollar"]
+REQUIRED = {
+    "investor": ["Date", "Ret", "Historical Asset Value", "Contribution"],
+    "fund": ["Date", "Fund"],
+    "other": ["Date"],
+}
+RETURN_COLUMN = {"investor": "Ret", "fund": "Fund"}
+
+GAP_DAYS = int(os.environ.get("VALIDATION_GAP_DAYS", 5))
+OUTLIER_MOVE = float(os.environ.get("VALIDATION_OUTLIER_MOVE", 0.05))   # never flag daily moves below 5%
+OUTLIER_Z = float(os.environ.get("VALIDATION_OUTLIER_Z", 10.0))         # robust z-score of a flagged move
+MAX_EXAMPLES = 5
+
+# Last report per source location
+REPORTS = {}
+
+
+def kind_of(columns) -> str:
+    columns = set(columns)
+    if {"Ret", "Historical Asset Value"} <= columns:
+        return "investor"
+    if "Fund" in columns:
+        return "fund"
+    return "other"
+
+
+def is_clean(df) -> bool:
+    """
+    True for frames returned by validate with parsed dates and no error
+    issues (and their copies/slices).
+    """
+    return bool(df.attrs.get("validated"))
+
+
+def _examples(dates):
+    return [
+        d.strftime("%Y-%m-%d") if isinstance(d, pd.Timestamp) else None if pd.isna(d) else str(d)
+        for d in list(dates)[:MAX_EXAMPLES]
+    ]
+
+
+def _parse_dates(raw: pd.Series):
+    """(parsed dates or None, issue or None)."""
+    try:
+        return pd.to_datetime(raw, format="%d-%b-%y"), None
+    except (ValueError, TypeError):
+        pass
+    try:
+        parsed = pd.to_datetime(raw, dayfirst=True)
+        return parsed, ("warning", "Dates are not in the 17-Oct-24 format; parsed day-first")
+    except (ValueError, TypeError) as e:
+        return None, ("error", f"Unparseable dates: {e}")
+
+
+def _coerce_numeric(raw: pd.Series):
+    """(float series, mask of non-empty cells that are not numbers); numeric columns pass through."""
+    if pd.api.types.is_numeric_dtype(raw):
+        return raw, np.zeros(len(raw), dtype=bool)
+    present = raw.notna()
+    text = raw.astype("string").str.strip().str.replace("\u00A0", "", regex=False)
+    pct = text.str.endswith("%").fillna(False)
+    values = pd.to_numeric(text.str.replace("%", "", regex=False).str.replace(",", "", regex=False),
+                           errors="coerce").astype(float)
+    values = values.where(~pct, values / 100.0)
+    bad = (present & values.isna() & (text != "").fillna(False)).to_numpy(dtype=bool)
+    return values, bad
+
+
+def _outliers(dates, cum_ret):
+    """Rows whose daily move of the cumulative return is far outside the sheet's usual range."""
+    cum = pd.to_numeric(cum_ret, errors="coerce").to_numpy(dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        move = (1 + cum[1:]) / (1 + cum[:-1]) - 1
+    valid = np.isfinite(move)
+    if valid.sum() < 10:
+        return []
+    med = np.median(move[valid])
+    sigma = 1.4826 * np.median(np.abs(move[valid] - med))
+    limit = max(OUTLIER_MOVE, OUTLIER_Z * sigma)
+    flagged = np.flatnonzero(valid & (np.abs(move - med) > limit)) + 1
+    return [(dates.iloc[i], float(move[i - 1])) for i in flagged]
+
+
+def validate(df: pd.DataFrame, source: str | None = None) -> pd.DataFrame:
+    """
+    Validated, normalized copy of a freshly read frame. The report is stored
+    in REPORTS[source] when a source is given.
+    """
+    t0 = time.perf_counter()
+    issues = []
+
+    def issue(severity, check, message, dates=()):
+        entry = {"severity": severity, "check": check, "message": message}
+        if len(dates):
+            entry["dates"] = _examples(dates)
+        issues.append(entry)
+
+    blank = df.isna().all(axis=1)
+    if blank.any():
+        df = df[~blank].reset_index(drop=True)
+        issue("info", "blank_rows", f"{int(blank.sum())} blank rows dropped")
+    else:
+        df = private_copy(df)   # memory-mapped columns stay shared until coerced
+
+    kind = kind_of(df.columns)
+    missing = [c for c in REQUIRED[kind] if c not in df.columns]
+    if missing:
+        issue("error", "schema", f"Missing {kind} columns: {', '.join(missing)}")
+
+    parsed = False
+    if "Date" in df.columns:
+        dates, problem = _parse_dates(df["Date"])
+        if problem:
+            issue(problem[0], "dates", problem[1])
+        if dates is not None:
+            parsed = True
+            df["Date"] = dates
+            missing_dates = dates.isna()
+            if missing_dates.any():
+                issue("warning", "dates", f"{int(missing_dates.sum())} rows without a date")
+
+            known = dates[~missing_dates]
+            step = known.diff().dt.days.iloc[1:]
+            if (step < 0).any():
+                issue("error", "order", "Dates are not increasing", known.iloc[1:][step < 0])
+            duplicated = known[known.duplicated()]
+            if len(duplicated):
+                issue("error", "duplicates", f"{len(duplicated)} duplicated dates", duplicated)
+            gaps = known.iloc[1:][step > GAP_DAYS]
+            if len(gaps):
+                issue("warning", "gaps", f"{len(gaps)} gaps longer than {GAP_DAYS} days (dates after the gap)", gaps)
+
+    schema = INVESTOR_COLUMNS if kind == "investor" else FUND_COLUMNS if kind == "fund" else []
+    for col in [c for c in schema if c != "Date" and c in df.columns]:
+        values, bad = _coerce_numeric(df[col])
+        if bad.any():
+            where = df["Date"][bad] if "Date" in df.columns else ()
+            issue("warning", "numbers", f"{int(bad.sum())} non-numeric '{col}' cells set to NaN", where)
+        df[col] = values
+    if "Hurdle Rate" in df.columns:
+        values, bad = _coerce_numeric(df["Hurdle Rate"])
+        if bad.any():
+            where = df["Date"][bad] if "Date" in df.columns else ()
+            issue("warning", "numbers", f"{int(bad.sum())} non-numeric 'Hurdle Rate' cells (investor hurdle used)", where)
+        else:
+            df["Hurdle Rate"] = values
+
+    if parsed and kind in RETURN_COLUMN and RETURN_COLUMN[kind] in df.columns:
+        outliers = _outliers(df["Date"], df[RETURN_COLUMN[kind]])
+        if outliers:
+            issue("warning", "outliers",
+                  f"{len(outliers)} daily moves of '{RETURN_COLUMN[kind]}' beyond the usual range "
+                  f"(largest {max(abs(m) for _, m in outliers):.1%})",
+                  pd.Series([d for d, _ in outliers]))
+
+    ok = not any(i["severity"] == "error" for i in issues)
+    clean = parsed and ok
+    df.attrs["validated"] = clean
+    if source is not None:
+        REPORTS[source] = {
+            "source": source,
+            "kind": kind,
+            "rows": len(df),
+            "clean": clean,
+            "ok": ok,
+            "checked_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "seconds": round(time.perf_counter() - t0, 4),
+            "issues": issues,
+        }
+    return df
+
+
+def summary(source: str):
+    """Short form of the last report of `source` (None if never validated)."""
+    report = REPORTS.get(source)
+    if report is None:
+        return None
+    counts = {}
+    for i in report["issues"]:
+        counts[i["severity"]] = counts.get(i["severity"], 0) + 1
+    return {"clean": report["clean"], "ok": report["ok"], "errors": counts.get("error", 0),
+            "warnings": counts.get("warning", 0), "checked_at": report["checked_at"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate data sources")
+    parser.add_argument("locations", nargs="*", help="paths or links (default: every registered source)")
+    parser.add_argument("--json", action="store_true", help="print the full reports as JSON")
+    args = parser.parse_args()
+
+    import data_sources
+    locations = args.locations or data_sources.all_locations()
+    failed = 0
+    for location in locations:
+        source = data_sources.by_location(location)
+        try:
+            if source is not None:
+                source.fetch()
+            else:
+                validate(data_sources.READERS[data_sources._infer_format(location)](location), location)
+        except Exception as e:
+            failed += 1
+            print(f"❌ {location}: {e}", file=sys.stderr)
+            continue
+        report = REPORTS[location]
+        if args.json:
+            print(json.dumps(report, indent=2, ensure_ascii=False))
+            continue
+        mark = "✅" if report["ok"] else "⚠️"
+        print(f"{mark} {location}: {report['kind']}, {report['rows']} rows, clean={report['clean']}")
+        for i in report["issues"]:
+            dates = f" e.g. {', '.join(str(d) for d in i['dates'])}" if i.get("dates") else ""
+            print(f"    [{i['severity']}] {i['check']}: {i['message']}{dates}")
+        if not report["ok"]:
+            failed += 1
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
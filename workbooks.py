@@ -0,0 +1,242 @@
+"""
+Ingestion of the macro workbooks (static/*.xlsm) into the CSV schemas the
+analysis reads.
+
+    python workbooks.py                       # every static/*.xlsm
+    python workbooks.py static/A_Salim.xlsm --force
+    python workbooks.py --export-csv instance/workbook_csv
+
+Each workbook is opened read-only (openpyxl streams the rows without
+building the cell tree, and macros are never loaded). The first sheet whose
+header matches a known layout is extracted and normalized:
+
+    investor   Date, Ret, Bourse Historical Ret, Gold Historical,
+               Dollar Historical, Historical Ret, Historical Yearly Ret,
+               Historical Asset Value, Contribution (+ Hurdle Rate if present)
+    fund       Date, Fund, Firouzen, Gold, Dollar   (fund-data.csv)
+
+Missing columns are NaN, dates are written as '17-Oct-24' like the CSV
+exports, and other sheets (e.g. the Persian invoice table) are skipped.
+
+The extracted columns are cached as .npy files (shared_frames.write_frame)
+under WORKBOOK_CACHE_DIR/<sha256 of the workbook>, so re-uploading a set of
+workbooks only reprocesses the ones whose bytes changed. data_sources.py
+reads .xlsm/.xlsx locations through `read`.
+"""
+import argparse
+import glob
+import hashlib
+import io
+import json
+import os
+import shutil
+import sys
+import time
+import warnings
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from shared_frames import private_copy, read_frame, write_frame
+from validation import FUND_COLUMNS, INVESTOR_COLUMNS
+
+try:
+    import openpyxl
+    HAVE_OPENPYXL = True
+except ImportError:
+    HAVE_OPENPYXL = False
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+CACHE_DIR = os.environ.get("WORKBOOK_CACHE_DIR", os.path.join(BASE_DIR, "instance", "workbook_cache"))
+NORMALIZER_VERSION = 1   # bump when the normalization changes so cached extracts are redone
+
+OPTIONAL_COLUMNS = {"investor": ["Hurdle Rate"], "fund": []}
+
+# Header spellings used by the workbooks, by normalized name
+ALIASES = {"Fund Ret": "Fund"}
+
+
+def _layout(header):
+    """(kind, {column index: normalized name}) for a header row, or (None, {})."""
+    names = {}
+    for i, cell in enumerate(header):
+        if isinstance(cell, str) and cell.strip():
+            name = ALIASES.get(cell.strip(), cell.strip())
+            names.setdefault(name, i)
+    if {"Date", "Ret", "Historical Asset Value"} <= names.keys():
+        kind = "investor"
+    elif {"Date", "Fund"} <= names.keys():
+        kind = "fund"
+    else:
+        return None, {}
+    wanted = (INVESTOR_COLUMNS if kind == "investor" else FUND_COLUMNS) + OPTIONAL_COLUMNS[kind]
+    return kind, {i: name for name, i in names.items() if name in wanted}
+
+
+def _date_text(value):
+    if isinstance(value, (datetime, date)):
+        return f"{value.day}-{value.strftime('%b-%y')}"
+    if isinstance(value, str) and value.strip():
+        return value.strip()
+    return np.nan
+
+
+def _extract(source):
+    """(DataFrame, sheet, kind) of the first recognised sheet in a workbook path or file object."""
+    with warnings.catch_warnings():
+        # openpyxl warns about cells it cannot parse as dates; they become NaN like in the CSV
+        warnings.simplefilter("ignore", UserWarning)
+        wb = openpyxl.load_workbook(source, read_only=True, data_only=True, keep_vba=False)
+        try:
+            for ws in wb.worksheets:
+                rows = ws.iter_rows(values_only=True)
+                header = next(rows, None)
+                kind, columns = _layout(header or ())
+                if kind is None:
+                    continue
+                data = {name: [] for name in columns.values()}
+                for row in rows:
+                    values = [row[i] if i < len(row) else None for i in columns]
+                    if all(v is None or v == "" for v in values):
+                        continue
+                    for name, value in zip(columns.values(), values):
+                        data[name].append(value)
+                return _normalize(data, kind), ws.title, kind
+        finally:
+            wb.close()
+    raise ValueError("No sheet with an investor or fund header (Date, Ret, ... / Date, Fund)")
+
+
+def _normalize(data: dict, kind: str) -> pd.DataFrame:
+    order = INVESTOR_COLUMNS if kind == "investor" else FUND_COLUMNS
+    order = order + [c for c in OPTIONAL_COLUMNS[kind] if c in data]
+    rows = len(data["Date"])
+    frame = {}
+    for name in order:
+        if name == "Date":
+            frame[name] = [_date_text(v) for v in data[name]]
+        elif name in data:
+            frame[name] = pd.to_numeric(pd.Series(data[name], dtype=object), errors="coerce").to_numpy(dtype=float)
+        else:
+            frame[name] = np.full(rows, np.nan)
+    return pd.DataFrame(frame)
+
+
+# --- Cache ---
+def workbook_hash(source) -> str:
+    """sha256 of a workbook path or file object (read in 1 MiB blocks)."""
+    digest = hashlib.sha256()
+    f = open(source, "rb") if isinstance(source, str) else source
+    try:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    finally:
+        if isinstance(source, str):
+            f.close()
+        else:
+            f.seek(0)
+    return digest.hexdigest()
+
+
+def _entry_dir(digest: str) -> str:
+    return os.path.join(CACHE_DIR, f"{digest}-n{NORMALIZER_VERSION}")
+
+
+def load(source, force: bool = False):
+    """
+    (DataFrame, info) for a workbook path or file object, from the cache when
+    a workbook with the same bytes was already extracted. `info` records the
+    sheet, kind, row count and whether the cache was hit.
+    """
+    if not HAVE_OPENPYXL:
+        raise RuntimeError("openpyxl is required to read .xlsm workbooks (pip install openpyxl)")
+    digest = workbook_hash(source)
+    entry = _entry_dir(digest)
+    if not force:
+        df = read_frame(os.path.join(entry, "frame"))
+        if df is not None:
+            with open(os.path.join(entry, "info.json"), "r", encoding="utf-8") as f:
+                return df, {**json.load(f), "cached": True}
+
+    t0 = time.perf_counter()
+    df, sheet, kind = _extract(source)
+    info = {
+        "sha256": digest,
+        "sheet": sheet,
+        "kind": kind,
+        "rows": len(df),
+        "extract_seconds": round(time.perf_counter() - t0, 3),
+        "extracted_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+    # Build the entry aside and rename it into place, so concurrent readers never see half of it
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    staging = f"{entry}.staging-{os.getpid()}"
+    shutil.rmtree(staging, ignore_errors=True)
+    write_frame(df, os.path.join(staging, "frame"))
+    with open(os.path.join(staging, "info.json"), "w", encoding="utf-8") as f:
+        json.dump(info, f)
+    shutil.rmtree(entry, ignore_errors=True)
+    try:
+        os.rename(staging, entry)
+    except OSError:
+        shutil.rmtree(staging, ignore_errors=True)   # another process published it first
+    return df, {**info, "cached": False}
+
+
+def read(location) -> pd.DataFrame:
+    """Normalized frame of a workbook path or file object (data_sources READERS["xlsm"])."""
+    if isinstance(location, str) and location.startswith(("http://", "https://")):
+        import urllib.request
+        with urllib.request.urlopen(location, timeout=30) as r:
+            location = io.BytesIO(r.read())
+    # Callers parse and add columns in place: never hand out the cached frame itself
+    return private_copy(load(location)[0])
+
+
+def ingest(paths, force: bool = False, export_dir: str | None = None):
+    """Extract (or reuse) each workbook; returns one report dict per path."""
+    reports = []
+    for path in paths:
+        t0 = time.perf_counter()
+        try:
+            df, info = load(path, force=force)
+            report = {"path": path, **info}
+            if export_dir:
+                os.makedirs(export_dir, exist_ok=True)
+                out = os.path.join(export_dir, os.path.splitext(os.path.basename(path))[0] + ".csv")
+                df.to_csv(out, index=False)
+                report["csv"] = out
+        except Exception as e:
+            report = {"path": path, "error": f"{type(e).__name__}: {e}"}
+        report["seconds"] = round(time.perf_counter() - t0, 3)
+        reports.append(report)
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest macro workbooks into the CSV schemas")
+    parser.add_argument("paths", nargs="*", help="workbooks (default: static/*.xlsm)")
+    parser.add_argument("--force", action="store_true", help="re-extract even if the workbook is cached")
+    parser.add_argument("--export-csv", metavar="DIR", help="also write each normalized frame as DIR/<name>.csv")
+    args = parser.parse_args()
+
+    if not HAVE_OPENPYXL:
+        sys.exit("openpyxl is not installed (pip install openpyxl)")
+    paths = args.paths or sorted(glob.glob(os.path.join(BASE_DIR, "static", "*.xlsm")))
+
+    failed = 0
+    for r in ingest(paths, force=args.force, export_dir=args.export_csv):
+        name = os.path.basename(r["path"])
+        if "error" in r:
+            failed += 1
+            print(f"❌ {name}: {r['error']}")
+            continue
+        state = "cached" if r["cached"] else "extracted"
+        print(f"✅ {name}: {state} {r['kind']} sheet {r['sheet']!r}, {r['rows']} rows in {r['seconds']:.2f}s")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()